@@ -1,40 +1,156 @@
-import torch
-import json
+"""
+Xây dựng đồ thị cascade cho toàn bộ data/reddit_enriched_data.jsonl.
+
+- Streaming: đọc input từng dòng, không load toàn bộ file.
+- Skip-before-compute: bài đã có trong store bị bỏ qua TRƯỚC khi embed.
+- Checkpoint theo chunk: mỗi chunk được flush vào store, dừng giữa chừng chỉ mất chunk đang chạy.
+- Sharding: chia input theo hash(post_id) cho nhiều worker; mỗi shard ghi store riêng
+  rồi được gộp vào store chính.
+
+Chạy:
+    python build_final_graphs.py                               # 1 process
+    python build_final_graphs.py --workers 4                   # 4 shard chạy song song rồi gộp
+    python build_final_graphs.py --num-shards 4 --shard 2      # chỉ chạy shard 2 (vd. trên máy khác)
+    python build_final_graphs.py --num-shards 4 --merge        # gộp các shard đã xong
+"""
+
 import os
-from src.features.cascade_graph_builder import CascadeGraphBuilder
+import json
+import zlib
+import argparse
+import multiprocessing
+from typing import Dict, Iterator, List
 
-def main():
-    # Khai báo đầu vào và đầu ra
-    INPUT_FILE = "data/reddit_enriched_data.jsonl"
-    OUTPUT_FOLDER = "data/processed_graphs"
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-
-    # Khởi tạo Builder (Nó sẽ tự động gọi embedding_extractor bên trong)
-    # Lưu ý: Lần đầu chạy sẽ tốn thời gian tải model XLM-RoBERTa về máy
-    builder = CascadeGraphBuilder()
-
-    # Đọc dữ liệu đã làm giàu
-    items = []
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+from src.data.cascade_store import PackedCascadeStore, merge_stores
+
+# Khai báo đầu vào và đầu ra mặc định
+INPUT_FILE = "data/reddit_enriched_data.jsonl"
+# Một store duy nhất (x/edge_index nối liền + offset từng đồ thị) thay cho mỗi bài một file .pt
+OUTPUT_STORE = "data/processed_graphs.pack"
+
+
+def shard_of(post_id, num_shards: int) -> int:
+    """Shard ổn định giữa các lần chạy / các máy (không dùng hash() vì bị random hoá)."""
+    return zlib.crc32(str(post_id).encode('utf-8')) % num_shards
+
+
+def shard_store_path(output_store: str, shard: int, num_shards: int) -> str:
+    return f"{output_store}.shard{shard}-of{num_shards}"
+
+
+def iter_pending_items(input_file: str, done, shard: int = 0, num_shards: int = 1) -> Iterator[Dict]:
+    """Stream items of this shard whose graph is not built yet."""
+    with open(input_file, 'r', encoding='utf-8') as f:
         for line in f:
-            items.append(json.loads(line))
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            post_id = str(item.get('id'))
+            if num_shards > 1 and shard_of(post_id, num_shards) != shard:
+                continue
+            if any(post_id in store for store in done):
+                continue
+            yield item
+
+
+def build_shard(
+    input_file: str,
+    output_store: str,
+    shard: int = 0,
+    num_shards: int = 1,
+    chunk_size: int = 256
+) -> int:
+    """
+    Build graphs for one shard, checkpointing every chunk_size items.
+
+    Returns:
+        Number of graphs built in this run
+    """
+    # Import ở đây để mỗi worker tự load model của mình
+    from src.features.cascade_graph_builder import CascadeGraphBuilder
+
+    target = output_store if num_shards == 1 else shard_store_path(output_store, shard, num_shards)
+    done = []
+    if num_shards > 1 and os.path.exists(os.path.join(output_store, 'index.bin')):
+        # Bài đã được gộp vào store chính cũng coi như xong
+        done.append(PackedCascadeStore(output_store))
+
+    built = 0
+    builder = None
+    with PackedCascadeStore(target, mode='a') as store:
+        done.append(store)
+        print(f"🔎 [shard {shard}/{num_shards}] {len(store)} đồ thị đã có trong {target}")
+
+        chunk: List[Dict] = []
+
+        def run_chunk():
+            nonlocal built, builder
+            if builder is None:
+                # Lưu ý: Lần đầu chạy sẽ tốn thời gian tải model XLM-RoBERTa về máy
+                builder = CascadeGraphBuilder()
+            # Hàm này biến text -> vector số (x) và nối comment -> cạnh (edge_index)
+            for data in builder.process_dataset(chunk):
+                if data.post_id in store:
+                    continue
+                store.append(data)
+                built += 1
+            # Checkpoint: commit cả chunk
+            store.flush()
+            print(f"💾 [shard {shard}/{num_shards}] checkpoint: {len(store)} đồ thị (+{built} lần này)")
+
+        for item in iter_pending_items(input_file, done, shard, num_shards):
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                run_chunk()
+                chunk = []
+        if chunk:
+            run_chunk()
+
+    return built
+
+
+def _build_shard_worker(args):
+    return build_shard(*args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build cascade graphs into a packed store (resumable)')
+    parser.add_argument('--input', default=INPUT_FILE, help='Enriched JSONL with cascades')
+    parser.add_argument('--output', default=OUTPUT_STORE, help='Packed store directory')
+    parser.add_argument('--chunk-size', type=int, default=256, help='Items per checkpoint')
+    parser.add_argument('--num-shards', type=int, default=1, help='Split input by post_id hash into N shards')
+    parser.add_argument('--shard', type=int, default=None, help='Run only this shard (0-based)')
+    parser.add_argument('--workers', type=int, default=1, help='Run all shards locally with N processes, then merge')
+    parser.add_argument('--merge', action='store_true', help='Only merge finished shard stores into --output')
+    args = parser.parse_args()
+
+    num_shards = max(args.num_shards, args.workers)
+    shard_stores = [shard_store_path(args.output, i, num_shards) for i in range(num_shards)]
+
+    if args.merge:
+        existing = [p for p in shard_stores if os.path.exists(os.path.join(p, 'index.bin'))]
+        added = merge_stores(existing, args.output)
+        print(f"✅ Đã gộp {added} đồ thị từ {len(existing)} shard vào {args.output}")
+        return
+
+    if args.shard is not None:
+        built = build_shard(args.input, args.output, args.shard, num_shards, args.chunk_size)
+        print(f"✅ Shard {args.shard}/{num_shards}: +{built} đồ thị")
+        return
 
-    # Chạy dây chuyền xử lý hàng loạt
-    # Hàm này biến text -> vector số (x) và nối comment -> cạnh (edge_index)
-    graphs = builder.process_dataset(items)
+    if num_shards == 1:
+        built = build_shard(args.input, args.output, 0, 1, args.chunk_size)
+    else:
+        tasks = [(args.input, args.output, i, num_shards, args.chunk_size) for i in range(num_shards)]
+        # spawn: mỗi worker có torch/model riêng, không fork trạng thái CUDA
+        with multiprocessing.get_context('spawn').Pool(args.workers) as pool:
+            built = sum(pool.map(_build_shard_worker, tasks))
+        added = merge_stores(shard_stores, args.output)
+        print(f"🔗 Đã gộp {added} đồ thị từ {num_shards} shard")
 
-    # Lưu kết quả thành từng file .pt
-    # Lưu kết quả thành từng file .pt
-    for data in graphs:
-        save_path = os.path.join(OUTPUT_FOLDER, f"{data.post_id}.pt")
-        
-        # Kiểm tra nếu file đã tồn tại thì bỏ qua (Resume)
-        if os.path.exists(save_path):
-            print(f"⏩ [SKIP] Đồ thị đã tồn tại: {data.post_id}")
-            continue
+    print(f"✅ [NEW] {built} đồ thị mới")
+    print(f"💾 {args.output}: {len(PackedCascadeStore(args.output))} đồ thị")
 
-        torch.save(data, save_path)
-        print(f"✅ [NEW] Đã tạo đồ thị cho bài: {data.post_id}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
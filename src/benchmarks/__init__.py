@@ -0,0 +1,7 @@
+"""
+Performance benchmarks on synthetic data.
+
+- synthetic_data.py: CORE / EXTENDED schema corpora with JPEGs and comment cascades
+- tiny_models.py: small stand-ins for the XLM-R / CLIP extractors
+- run_benchmark.py: per-stage timings, throughput, peak memory and baseline comparison
+"""
@@ -0,0 +1,369 @@
+"""
+End-to-end benchmark on a synthetic corpus (see synthetic_data.py).
+
+Stages (each timed, with throughput and peak RSS):
+- text         FakedditDataProcessor.transform_to_extended over core.jsonl
+- image        ImageProcessor.process_image (decode, letterbox 224x224, JPEG save)
+               on the JPEG pool, read from disk instead of downloaded
+- embed        tiny text + image stand-in extractors over all posts
+- knn          InteractionGraphBuilder Top-K text + image edges, PyG Data assembly, cached symmetric CSR
+- cascade      CascadeGraphBuilder.process_dataset (structure + node embeddings)
+- train_epoch  one full-batch MultiModalFakeNewsGNN epoch (median of --epochs)
+- validation   one full-graph validation pass (median of --epochs)
+
+Results go to a JSON file; with --baseline they are compared stage by stage
+(throughput drop or peak memory growth beyond --tolerance = regression).
+
+Usage:
+    python src/benchmarks/run_benchmark.py --scale 1k --save_baseline
+    python src/benchmarks/run_benchmark.py --scale 1k                     # compare with baseline
+    python src/benchmarks/run_benchmark.py --scale 100k --stages knn train_epoch --threads 32
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+import statistics
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import torch
+import torch.nn as nn
+from PIL import Image
+from torch_geometric.data import Data
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Stage modules are imported up front so no stage pays for imports
+from src.benchmarks.synthetic_data import SCALES, ensure_corpus
+from src.benchmarks.tiny_models import TinyImageExtractor, TinyTextExtractor
+from src.data.fakeddit_preprocessor_image import ImageProcessor
+from src.data.fakeddit_process_text import FakedditDataProcessor
+from src.features.cascade_graph_builder import CascadeGraphBuilder
+from src.features.graph_builder import LABEL_TO_BINARY, LABEL_TO_IDX, InteractionGraphBuilder
+from src.models.cascade_gnn import MultiModalFakeNewsGNN
+from src.training.profiler import git_commit
+from src.training.train_gnn import class_weights, evaluate
+from src.utils.dataset_io import read_records
+from src.utils.pipeline_runner import PeakMemoryMonitor
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+STAGES = ['text', 'image', 'embed', 'knn', 'cascade', 'train_epoch', 'validation']
+DEPENDS = {'embed': ['image'], 'knn': ['embed'], 'train_epoch': ['knn'], 'validation': ['train_epoch']}
+
+
+def with_dependencies(stages: List[str]) -> List[str]:
+    needed = set()
+
+    def add(stage):
+        if stage not in needed:
+            needed.add(stage)
+            for dep in DEPENDS.get(stage, []):
+                add(dep)
+
+    for stage in stages:
+        add(stage)
+    return [s for s in STAGES if s in needed]
+
+
+class BenchmarkRun:
+    """
+    Runs the stages in order on one corpus directory, sharing intermediate state.
+    """
+
+    def __init__(self, work_dir: str, args):
+        self.work_dir = Path(work_dir)
+        self.args = args
+        self.state: Dict = {}
+        self.results: Dict[str, Dict] = {}
+
+    def timed(self, name: str, func: Callable[[], Dict], unit: str):
+        """Run a stage; func returns {'items': n, 'seconds': optional override, ...extra}."""
+        logger.info(f"▶ {name}")
+        with PeakMemoryMonitor() as mem:
+            start = time.perf_counter()
+            info = func()
+            elapsed = time.perf_counter() - start
+        seconds = info.pop('seconds', elapsed)
+        items = info.pop('items')
+        self.results[name] = {
+            'seconds': round(seconds, 4),
+            'items': items,
+            'unit': unit,
+            'throughput': round(items / seconds, 2) if seconds > 0 else 0.0,
+            'peak_mb': round(mem.peak_bytes / (1024 * 1024), 1),
+            **info,
+        }
+        logger.info(f"  {seconds:.2f}s, {self.results[name]['throughput']:.1f} {unit}/s, "
+                    f"peak {self.results[name]['peak_mb']:.0f} MB")
+
+    # ------------------------------------------------------------------ stages
+
+    def stage_text(self) -> Dict:
+        out = str(self.work_dir / 'text_stage')
+        processor = FakedditDataProcessor(input_file=str(self.work_dir / 'core.jsonl'),
+                                          output_02_dir=out, output_03_dir=out, min_text_length=1)
+        kept = total = 0
+        for record in read_records(str(self.work_dir / 'core.jsonl')):
+            record.pop('cascade', None)
+            total += 1
+            kept += processor.transform_to_extended(record) is not None
+        return {'items': total, 'kept': kept}
+
+    def stage_image(self) -> Dict:
+        raw_dir = self.work_dir / 'images' / 'raw'
+
+        class LocalImageProcessor(ImageProcessor):
+            """Reads the pool JPEG named in the media_url instead of downloading it."""
+
+            def _download_image(self, url: str):
+                return Image.open(raw_dir / Path(url).name)
+
+        processor = LocalImageProcessor(output_base_dir=str(self.work_dir))
+        processor.images_dir = self.work_dir / 'images' / 'processed'
+        processor.images_dir.mkdir(parents=True, exist_ok=True)
+        names = sorted(p.stem for p in raw_dir.glob('*.jpg'))
+        ok = sum(processor.process_image(f"https://i.redd.it/{n}.jpg", n) is not None for n in names)
+        return {'items': len(names), 'ok': ok}
+
+    def stage_embed(self) -> Dict:
+        columns = ['clean_text', 'raw_text', 'image_info.processed_path', 'label', 'split']
+        texts, paths, labels, splits = [], [], [], []
+        for rec in read_records(str(self.work_dir / 'extended.jsonl'), columns=columns):
+            texts.append(rec.get('clean_text') or rec.get('raw_text') or '')
+            paths.append((rec.get('image_info') or {}).get('processed_path', ''))
+            labels.append(rec.get('label', 'TRUE'))
+            splits.append(rec.get('split', 'train'))
+        text_ext = TinyTextExtractor(device='cpu')
+        image_ext = TinyImageExtractor(device='cpu')
+        self.state['text_emb'] = text_ext.batch_extract(texts, batch_size=256)
+        self.state['image_emb'] = image_ext.batch_extract(paths, batch_size=64)
+        self.state['labels'] = labels
+        self.state['splits'] = splits
+        return {'items': len(texts)}
+
+    def stage_knn(self) -> Dict:
+        text_emb, image_emb = self.state['text_emb'], self.state['image_emb']
+        N = text_emb.size(0)
+        builder = InteractionGraphBuilder(k_text=5, k_image=5, mode='scale' if N >= 5000 else 'prototype')
+        text_ei, text_ea = builder._compute_topk_edges(text_emb, builder.k_text, edge_type=0)
+        image_ei, image_ea = builder._compute_topk_edges(image_emb, builder.k_image, edge_type=1)
+        splits = self.state['splits']
+        labels = self.state['labels']
+        self.state['graph'] = Data(
+            x=torch.cat([text_emb, image_emb], dim=1),
+            edge_index=torch.cat([text_ei, image_ei], dim=1),
+            edge_attr=torch.cat([text_ea, image_ea], dim=0),
+            y=torch.tensor([LABEL_TO_IDX.get(label, 0) for label in labels], dtype=torch.long),
+            y_binary=torch.tensor([LABEL_TO_BINARY.get(label, 0) for label in labels], dtype=torch.long),
+            train_mask=torch.tensor([s == 'train' for s in splits]),
+            val_mask=torch.tensor([s == 'val' for s in splits]),
+            test_mask=torch.tensor([s == 'test' for s in splits]),
+            num_nodes=N
+        )
+        # As build_graph: the cached symmetric CSR / GCN normalisation is part of the stage
+        builder.add_adjacency(self.state['graph'])
+        return {'items': N, 'edges': int(self.state['graph'].num_edges)}
+
+    def stage_cascade(self) -> Dict:
+        builder = CascadeGraphBuilder(device='cpu', text_extractor=TinyTextExtractor(device='cpu'))
+        records = read_records(str(self.work_dir / 'core.jsonl'), columns=['id', 'raw_text', 'cascade'])
+        posts = nodes = edges = 0
+        while True:
+            chunk = list(islice(records, self.args.cascade_chunk))
+            if not chunk:
+                break
+            graphs = builder.process_dataset(chunk, batch_size=256)
+            posts += len(chunk)
+            nodes += sum(g.num_nodes for g in graphs)
+            edges += sum(g.num_edges for g in graphs)
+        return {'items': posts, 'nodes': nodes, 'edges': edges}
+
+    def _model(self):
+        if 'model' not in self.state:
+            data = self.state['graph']
+            torch.manual_seed(0)
+            self.state['model'] = MultiModalFakeNewsGNN(input_dim=data.x.size(1), hidden_dim=self.args.hidden_dim,
+                                                        num_classes=6, gnn_type=self.args.gnn_type)
+        return self.state['model']
+
+    def stage_train_epoch(self) -> Dict:
+        data = self.state['graph']
+        model = self._model()
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-3, weight_decay=5e-4)
+        criterion = nn.CrossEntropyLoss(weight=class_weights(data.y[data.train_mask].numpy(), 'cpu'))
+        times = []
+        for _ in range(self.args.epochs):
+            start = time.perf_counter()
+            model.train()
+            optimizer.zero_grad()
+            logits = model(data.x, data.edge_index, data.edge_attr)
+            loss = criterion(logits[data.train_mask], data.y[data.train_mask])
+            loss.backward()
+            optimizer.step()
+            times.append(time.perf_counter() - start)
+        return {'items': data.num_nodes, 'seconds': statistics.median(times), 'epochs': len(times)}
+
+    def stage_validation(self) -> Dict:
+        data = self.state['graph']
+        model = self._model()
+        times = []
+        for _ in range(self.args.epochs):
+            start = time.perf_counter()
+            # No shared engine: every pass recomputes, as after each training epoch
+            metrics = evaluate(model, data, data.val_mask, "val")
+            times.append(time.perf_counter() - start)
+        return {'items': data.num_nodes, 'seconds': statistics.median(times),
+                'val_f1_macro_6': round(metrics['val_f1_macro_6'], 4)}
+
+    def run(self, stages: List[str]) -> Dict[str, Dict]:
+        units = {'text': 'posts', 'image': 'images', 'embed': 'posts', 'knn': 'nodes', 'cascade': 'posts',
+                 'train_epoch': 'nodes', 'validation': 'nodes'}
+        for stage in stages:
+            self.timed(stage, getattr(self, f'stage_{stage}'), units[stage])
+        return self.results
+
+
+# -------------------------------------------------------------------- baseline
+
+def machine_info() -> Dict:
+    return {
+        'commit': git_commit(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'torch_threads': torch.get_num_threads(),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.15) -> List[Dict]:
+    """Stage-by-stage throughput / peak memory ratios against a baseline run."""
+    rows = []
+    for stage, now in current['stages'].items():
+        before = baseline.get('stages', {}).get(stage)
+        if before is None:
+            rows.append({'stage': stage, 'status': 'new'})
+            continue
+        speed = now['throughput'] / before['throughput'] if before['throughput'] else float('inf')
+        memory = now['peak_mb'] / before['peak_mb'] if before['peak_mb'] else 1.0
+        if speed < 1 - tolerance:
+            status = 'REGRESSION (speed)'
+        elif memory > 1 + tolerance:
+            status = 'REGRESSION (memory)'
+        elif speed > 1 + tolerance:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append({'stage': stage, 'baseline': before['throughput'], 'current': now['throughput'],
+                     'unit': now['unit'], 'speed_ratio': round(speed, 3), 'memory_ratio': round(memory, 3),
+                     'status': status})
+    return rows
+
+
+def print_results(report: Dict, comparison: Optional[List[Dict]] = None):
+    print("\n" + "=" * 78)
+    print(f"BENCHMARK {report['scale']} ({report['num_posts']} posts, {report['machine']['torch_threads']} threads)")
+    print("=" * 78)
+    print(f"{'stage':<13}{'seconds':>10}{'items':>10}{'throughput':>20}{'peak MB':>10}")
+    for stage, r in report['stages'].items():
+        print(f"{stage:<13}{r['seconds']:>10.3f}{r['items']:>10d}{r['throughput']:>12.1f} {r['unit']:<7}"
+              f"{r['peak_mb']:>10.0f}")
+    if comparison:
+        print(f"\n{'stage':<13}{'baseline':>12}{'current':>12}{'speed':>8}{'memory':>8}  status")
+        for row in comparison:
+            if row['status'] == 'new':
+                print(f"{row['stage']:<13}{'-':>12}{'-':>12}{'':>8}{'':>8}  new")
+                continue
+            print(f"{row['stage']:<13}{row['baseline']:>12.1f}{row['current']:>12.1f}"
+                  f"{row['speed_ratio']:>7.2f}x{row['memory_ratio']:>7.2f}x  {row['status']}")
+    print("=" * 78)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='End-to-end benchmark on a synthetic Fakeddit/Reddit corpus')
+    parser.add_argument('--scale', choices=list(SCALES), default='1k')
+    parser.add_argument('--num_posts', type=int, default=0, help='Overrides --scale')
+    parser.add_argument('--work_dir', default=None, help='Corpus directory (default: data/benchmarks/<scale>)')
+    parser.add_argument('--regenerate', action='store_true', help='Regenerate the corpus even if it exists')
+    parser.add_argument('--num_images', type=int, default=2000, help='JPEG pool size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help='Stages (prerequisites are added)')
+    parser.add_argument('--epochs', type=int, default=3, help='Training epochs / validation passes (median reported)')
+    parser.add_argument('--hidden_dim', type=int, default=64)
+    parser.add_argument('--gnn_type', choices=['gat', 'sage', 'gcn', 'rgcn'], default='gat')
+    parser.add_argument('--cascade_chunk', type=int, default=10000, help='Posts per cascade build chunk')
+    parser.add_argument('--threads', type=int, default=0, help='torch threads (0 = default)')
+    parser.add_argument('--output', default=None, help='Results JSON (default: reports/benchmarks/<scale>_<time>.json)')
+    parser.add_argument('--baseline', default=None, help='Baseline JSON (default: reports/benchmarks/baseline_<scale>.json)')
+    parser.add_argument('--save_baseline', action='store_true', help='Write this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed relative slowdown / memory growth')
+    parser.add_argument('--fail_on_regression', action='store_true', help='Exit with status 1 on a regression')
+    return parser
+
+
+def run(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    scale = args.scale if not args.num_posts else f"{args.num_posts}"
+    num_posts = args.num_posts or SCALES[args.scale]
+    work_dir = args.work_dir or os.path.join('data', 'benchmarks', scale)
+
+    start = time.perf_counter()
+    meta = ensure_corpus(work_dir, num_posts, seed=args.seed, num_images=args.num_images, regenerate=args.regenerate)
+    logger.info(f"Corpus {work_dir}: {meta['num_posts']} posts, {meta['num_comments']} comments "
+                f"({'reused' if meta.get('reused') else f'generated in {time.perf_counter() - start:.1f}s'})")
+
+    results = BenchmarkRun(work_dir, args).run(with_dependencies(args.stages))
+    report = {
+        'scale': scale,
+        'num_posts': meta['num_posts'],
+        'num_comments': meta['num_comments'],
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': machine_info(),
+        'settings': {k: getattr(args, k) for k in ('epochs', 'hidden_dim', 'gnn_type', 'num_images', 'seed')},
+        'stages': results,
+    }
+
+    reports_dir = Path('reports') / 'benchmarks'
+    output = Path(args.output or reports_dir / f"{scale}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    baseline_path = Path(args.baseline or reports_dir / f"baseline_{scale}.json")
+    comparison = None
+    if baseline_path.exists() and not args.save_baseline:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            comparison = compare(report, json.load(f), args.tolerance)
+        report['comparison'] = {'baseline': str(baseline_path), 'stages': comparison}
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    print_results(report, comparison)
+    print(f"Results:  {output}")
+    if args.save_baseline:
+        print(f"Baseline: {baseline_path}")
+
+    regressions = [r for r in comparison or [] if r['status'].startswith('REGRESSION')]
+    if regressions:
+        logger.warning(f"{len(regressions)} stage(s) regressed vs {baseline_path}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
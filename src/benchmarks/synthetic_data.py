@@ -0,0 +1,326 @@
+"""
+Synthetic Fakeddit / Reddit corpus for benchmarks (no real data, no network).
+
+Generates, for `num_posts` posts:
+- core.jsonl      CORE_SCHEMA records as written by reddit_crawler.py (id, timestamp,
+                  label, raw_text, media_url, user_id, retweet_count, comment_count,
+                  cascade, metadata.subreddit)
+- extended.jsonl  EXTENDED_SCHEMA records of the same posts (clean_text, text_features,
+                  image_info, 6-class label, split) as consumed by graph_builder.py
+- images/raw/     a pool of random JPEGs; posts reference the pool round-robin
+
+Size distributions follow the shape of the real crawl:
+- title length: lognormal word count (median ~11 words), Zipf-distributed vocabulary,
+  some URLs, mentions, emoji and ALL-CAPS titles
+- image size: lognormal width/height around 640x480, clipped to [64, 2048]
+- cascade size: heavy-tailed (lognormal, ~35% of posts without comments, capped),
+  reply trees mostly shallow (top-level replies + preferential attachment),
+  reply delays lognormal (minutes to days); comments in DFS order like the crawler
+
+Usage:
+    python src/benchmarks/synthetic_data.py --scale 1k --out data/benchmarks/1k
+    corpus = SyntheticCorpus(num_posts=1000, seed=0)
+    for record in corpus.core_records(): ...
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.features.graph_builder import LABEL_TO_IDX
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+LABELS = list(LABEL_TO_IDX)
+# Fakeddit-like imbalance over the 6 classes
+LABEL_PROBS = [0.30, 0.12, 0.10, 0.08, 0.28, 0.12]
+SUBREDDITS = ["worldnews", "news", "politics", "technology", "conspiracy"]
+SPLIT_PROBS = {'train': 0.7, 'val': 0.15, 'test': 0.15}
+
+VOCAB_SIZE = 20000
+SYLLABLES = ['ka', 'lo', 're', 'mi', 'tu', 'sen', 'ar', 'po', 'li', 'de', 'van', 'to', 'ne', 'ri', 'sa', 'co',
+             'ber', 'un', 'tra', 'gi', 'mo', 'ex', 'al', 'in']
+# Frequent real words (incl. the sentiment words of fakeddit_process_text.py)
+COMMON_WORDS = ['the', 'a', 'to', 'of', 'in', 'and', 'is', 'for', 'on', 'says', 'new', 'after', 'report',
+                'government', 'police', 'people', 'president', 'video', 'shows', 'true', 'false', 'fake',
+                'good', 'bad', 'lie', 'wrong', 'great', 'honest', 'breaking', 'world', 'court', 'election']
+EMOJI = ['😂', '🔥', '😡', '👀', '🇺🇸', '💯']
+
+
+class SyntheticCorpus:
+    """
+    Deterministic generator of posts, images and comment cascades.
+    """
+
+    def __init__(
+        self,
+        num_posts: int,
+        seed: int = 0,
+        num_images: int = 2000,
+        max_comments: int = 500,
+        media_ratio: float = 0.85,
+        video_ratio: float = 0.03,
+        start_time: int = 1_600_000_000
+    ):
+        """
+        Args:
+            num_posts: Posts to generate
+            num_images: JPEG pool size (posts with media reference the pool round-robin)
+            max_comments: Cap of the cascade size
+            media_ratio: Share of posts with a media_url
+            video_ratio: Share of media posts whose URL is a video
+        """
+        self.num_posts = num_posts
+        self.seed = seed
+        self.num_images = max(1, min(num_images, num_posts))
+        self.max_comments = max_comments
+        self.media_ratio = media_ratio
+        self.video_ratio = video_ratio
+        self.start_time = start_time
+
+        rng = np.random.default_rng(seed)
+        self.vocab = COMMON_WORDS + [
+            ''.join(rng.choice(SYLLABLES, size=rng.integers(1, 4))) + str(i % 7 if i % 5 == 0 else '')
+            for i in range(VOCAB_SIZE - len(COMMON_WORDS))
+        ]
+        # Zipf-like word frequencies
+        ranks = np.arange(1, VOCAB_SIZE + 1)
+        self.word_cdf = np.cumsum(1.0 / ranks ** 1.07)
+        self.word_cdf /= self.word_cdf[-1]
+        self.vocab_array = np.array(self.vocab, dtype=object)
+        self.num_users = max(10, num_posts // 3)
+
+    # ------------------------------------------------------------------ pieces
+
+    def _texts(self, rng: np.random.Generator, n: int, median: float, sigma: float) -> List[List[str]]:
+        """n word lists: lognormal lengths, Zipf words (one vectorised draw for all)."""
+        counts = np.clip(rng.lognormal(np.log(median), sigma, size=n), 1, 300).astype(np.int64)
+        words = self.vocab_array[np.searchsorted(self.word_cdf, rng.random(int(counts.sum())))]
+        return [w.tolist() for w in np.split(words, np.cumsum(counts)[:-1])]
+
+    def _title(self, rng: np.random.Generator) -> str:
+        words = self._texts(rng, 1, median=11, sigma=0.55)[0]
+        if rng.random() < 0.08:
+            words = [w.upper() for w in words]
+        else:
+            words[0] = words[0].capitalize()
+        if rng.random() < 0.10:
+            words.insert(int(rng.integers(0, len(words) + 1)), f"https://t.co/{rng.integers(1e9):x}")
+        if rng.random() < 0.05:
+            words.insert(0, f"@{self.vocab[int(rng.integers(100, VOCAB_SIZE))]}")
+        if rng.random() < 0.07:
+            words.append(EMOJI[int(rng.integers(len(EMOJI)))])
+        return ' '.join(words) + ('?' if rng.random() < 0.1 else '')
+
+    def _user(self, rng: np.random.Generator) -> str:
+        # Few heavy posters, long tail
+        return f"user_{int(rng.zipf(1.6)) % self.num_users:07d}"
+
+    def image_name(self, idx: int) -> str:
+        return f"img_{idx % self.num_images:07d}"
+
+    def _cascade(self, rng: np.random.Generator, post_id: str, post_time: int) -> List[Dict]:
+        if rng.random() < 0.35:
+            return []
+        size = int(np.clip(rng.lognormal(np.log(8), 1.3), 1, self.max_comments))
+        parents = np.full(size, -1, dtype=np.int64)
+        # Top-level reply, else preferential attachment to an earlier comment
+        # (uniform pick from a list holding every comment once per reply it got, plus once)
+        nested = rng.random(size) >= 0.45
+        picks = rng.random(size)
+        pool = [0]
+        for i in range(1, size):
+            if nested[i]:
+                parents[i] = pool[int(picks[i] * len(pool))]
+                pool.append(parents[i])
+            pool.append(i)
+        delays = np.sort(rng.lognormal(np.log(1800), 1.6, size=size)).astype(np.int64) + 30
+        children = [[] for _ in range(size)]
+        roots = []
+        for i, p in enumerate(parents):
+            (roots if p < 0 else children[p]).append(i)
+
+        texts = self._texts(rng, size, median=18, sigma=0.9)
+        users = rng.zipf(1.6, size=size) % self.num_users
+        nodes = []
+        stack = [(i, post_id, 1) for i in reversed(roots)]
+        while stack:
+            i, parent_id, level = stack.pop()
+            comment_id = f"{post_id}_c{i}"
+            nodes.append({
+                "id": comment_id,
+                "parent_id": parent_id,
+                "user_id": f"user_{int(users[i]):07d}",
+                "timestamp": int(post_time + delays[i]),
+                "text": ' '.join(texts[i]),
+                "level": level,
+            })
+            stack.extend((c, comment_id, level + 1) for c in reversed(children[i]))
+        return nodes
+
+    # ----------------------------------------------------------------- records
+
+    def _post(self, idx: int) -> Dict:
+        rng = np.random.default_rng([self.seed, idx])
+        post_id = f"syn{idx:08d}"
+        post_time = self.start_time + idx * 37 + int(rng.integers(0, 3600))
+        label = LABELS[int(rng.choice(len(LABELS), p=LABEL_PROBS))]
+        r = rng.random()
+        if r < self.media_ratio * (1 - self.video_ratio):
+            media_url = f"https://i.redd.it/{self.image_name(idx)}.jpg"
+        elif r < self.media_ratio:
+            media_url = f"https://v.redd.it/{post_id}.mp4"
+        else:
+            media_url = ""
+        cascade = self._cascade(rng, post_id, post_time)
+        split = rng.choice(list(SPLIT_PROBS), p=list(SPLIT_PROBS.values()))
+        return {
+            "id": post_id,
+            "timestamp": post_time,
+            "label": label,
+            "raw_text": self._title(rng),
+            "media_url": media_url,
+            "user_id": self._user(rng),
+            "retweet_count": 0,
+            "comment_count": len(cascade),
+            "cascade": cascade,
+            "metadata": {"source": "synthetic", "subreddit": SUBREDDITS[idx % len(SUBREDDITS)]},
+            "split": str(split),
+        }
+
+    def core_records(self) -> Iterator[Dict]:
+        """CORE_SCHEMA records (crawler layout; `split` kept for the extended view)."""
+        for idx in range(self.num_posts):
+            yield self._post(idx)
+
+    @staticmethod
+    def to_extended(record: Dict, processor, processed_dir: str) -> Optional[Dict]:
+        """
+        EXTENDED_SCHEMA view of a core record, produced by FakedditDataProcessor itself.
+
+        The 6-class label is kept (graph_builder.py maps it to LABEL_TO_IDX) and
+        image_info points at the processed copy of the pool image.
+        """
+        media = record['media_url']
+        has_image = media.endswith('.jpg')
+        source = dict(record)
+        if has_image:
+            source['image_info'] = {
+                "processed_path": os.path.join(processed_dir, Path(media).name),
+                "image_size": [224, 224],
+                "is_video": False,
+                "keyframe_paths": [],
+            }
+        extended = processor.transform_to_extended(source)
+        if extended is None:
+            return None
+        extended['label'] = record['label']
+        extended['image_info']['is_video'] = media.endswith('.mp4')
+        extended.update({k: record[k] for k in ('comment_count', 'metadata', 'split')})
+        return extended
+
+    def write_images(self, out_dir: str, quality: int = 90) -> int:
+        """Random JPEG pool: smooth colour fields (upsampled noise) at lognormal sizes."""
+        from PIL import Image
+
+        out = Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        for idx in range(self.num_images):
+            path = out / f"{self.image_name(idx)}.jpg"
+            if path.exists():
+                continue
+            rng = np.random.default_rng([self.seed, 10**9 + idx])
+            w, h = (int(np.clip(v, 64, 2048)) for v in rng.lognormal(np.log([640, 480]), 0.45))
+            cells = rng.integers(0, 256, size=(int(rng.integers(4, 24)), int(rng.integers(4, 24)), 3), dtype=np.uint8)
+            image = Image.fromarray(cells, 'RGB').resize((w, h), Image.BILINEAR)
+            image.save(path, 'JPEG', quality=quality)
+        return self.num_images
+
+    def write(self, out_dir: str) -> Dict:
+        """
+        Write core.jsonl, extended.jsonl, images/raw/ and meta.json into out_dir.
+
+        Returns:
+            meta dict (counts, sizes, seconds)
+        """
+        out = Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        processed_dir = str(out / 'images' / 'processed')
+        from src.data.fakeddit_process_text import FakedditDataProcessor
+        processor = FakedditDataProcessor(input_file=str(out / 'core.jsonl'), output_02_dir=str(out),
+                                          output_03_dir=str(out), min_text_length=1)
+        posts = comments = extended_count = 0
+        with open(out / 'core.jsonl', 'w', encoding='utf-8') as core_f, \
+                open(out / 'extended.jsonl', 'w', encoding='utf-8') as ext_f:
+            for record in self.core_records():
+                split = record.pop('split')
+                core_f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                record['split'] = split
+                extended = self.to_extended(record, processor, processed_dir)
+                if extended is not None:
+                    ext_f.write(json.dumps(extended, ensure_ascii=False) + '\n')
+                    extended_count += 1
+                posts += 1
+                comments += record['comment_count']
+        self.write_images(str(out / 'images' / 'raw'))
+        meta = {
+            'num_posts': posts,
+            'num_extended': extended_count,
+            'num_comments': comments,
+            'num_images': self.num_images,
+            'seed': self.seed,
+            'max_comments': self.max_comments,
+            'core_bytes': (out / 'core.jsonl').stat().st_size,
+            'extended_bytes': (out / 'extended.jsonl').stat().st_size,
+            'seconds': round(time.perf_counter() - start, 2),
+        }
+        with open(out / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+
+def ensure_corpus(out_dir: str, num_posts: int, seed: int = 0, num_images: int = 2000,
+                  regenerate: bool = False) -> Dict:
+    """Generate the corpus unless out_dir already holds one with the same parameters."""
+    meta_path = Path(out_dir) / 'meta.json'
+    if meta_path.exists() and not regenerate:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        expected = min(num_images, num_posts)
+        if (meta.get('num_posts'), meta.get('seed'), meta.get('num_images')) == (num_posts, seed, expected):
+            meta['reused'] = True
+            return meta
+    return SyntheticCorpus(num_posts, seed=seed, num_images=num_images).write(out_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Fakeddit/Reddit corpus')
+    parser.add_argument('--scale', choices=list(SCALES), default='1k')
+    parser.add_argument('--num_posts', type=int, default=0, help='Overrides --scale')
+    parser.add_argument('--num_images', type=int, default=2000, help='JPEG pool size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='Output directory (default: data/benchmarks/<scale>)')
+    args = parser.parse_args()
+
+    num_posts = args.num_posts or SCALES[args.scale]
+    out = args.out or os.path.join('data', 'benchmarks', args.scale)
+    print(f"🧪 Generating {num_posts} synthetic posts into {out}")
+    meta = SyntheticCorpus(num_posts, seed=args.seed, num_images=args.num_images).write(out)
+    print(f"✓ {meta['num_posts']} posts, {meta['num_comments']} comments, {meta['num_images']} images "
+          f"in {meta['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
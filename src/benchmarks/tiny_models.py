@@ -0,0 +1,115 @@
+"""
+Tiny stand-ins for the XLM-R / CLIP extractors (benchmarks, no downloads).
+
+Same interface as TextEmbeddingExtractor / ImageEmbeddingExtractor
+(model_name, embedding_dim, extract, batch_extract), so they plug into
+InteractionGraphBuilder and CascadeGraphBuilder. Weights are fixed random
+(seeded); the point is a realistic data path, not useful embeddings:
+- text: hashed word ids -> EmbeddingBag(mean) -> Linear -> tanh -> L2-normalised
+- image: JPEG decode -> RGB -> resize 224x224 (as the CLIP processor) -> small CNN
+"""
+
+import zlib
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+
+
+class TinyTextExtractor:
+    """
+    Hashing bag-of-words encoder.
+    """
+
+    def __init__(self, embedding_dim: int = 64, num_buckets: int = 1 << 18, device: Optional[str] = None, seed: int = 0):
+        self.model_name = 'tiny-text'
+        self.device = device or 'cpu'
+        self.num_buckets = num_buckets
+        self._dim = embedding_dim
+        torch.manual_seed(seed)
+        self.bag = nn.EmbeddingBag(num_buckets, 2 * embedding_dim, mode='mean').to(self.device).eval()
+        self.proj = nn.Linear(2 * embedding_dim, embedding_dim).to(self.device).eval()
+
+    @property
+    def embedding_dim(self) -> int:
+        return self._dim
+
+    def _tokens(self, text: str) -> List[int]:
+        words = text.lower().split() if isinstance(text, str) else []
+        return [zlib.crc32(w.encode('utf-8')) % self.num_buckets for w in words[:256]] or [0]
+
+    def extract(self, text: str) -> torch.Tensor:
+        return self.batch_extract([text])[0]
+
+    @torch.no_grad()
+    def batch_extract(self, texts: List[str], batch_size: int = 32) -> torch.Tensor:
+        if not texts:
+            return torch.zeros(0, self._dim)
+        out = []
+        for start in range(0, len(texts), batch_size):
+            tokens = [self._tokens(t) for t in texts[start:start + batch_size]]
+            flat = torch.tensor([i for t in tokens for i in t], dtype=torch.long, device=self.device)
+            offsets = torch.tensor(np.cumsum([0] + [len(t) for t in tokens[:-1]]), dtype=torch.long, device=self.device)
+            h = torch.tanh(self.proj(self.bag(flat, offsets)))
+            out.append(F.normalize(h, p=2, dim=-1).cpu())
+        return torch.cat(out)
+
+
+class TinyImageExtractor:
+    """
+    Small CNN over 224x224 RGB crops.
+    """
+
+    def __init__(self, embedding_dim: int = 32, image_size: int = 224, device: Optional[str] = None, seed: int = 0):
+        self.model_name = 'tiny-image'
+        self.device = device or 'cpu'
+        self.image_size = image_size
+        self._dim = embedding_dim
+        torch.manual_seed(seed)
+        self.net = nn.Sequential(
+            nn.Conv2d(3, 16, kernel_size=8, stride=8),
+            nn.ReLU(),
+            nn.Conv2d(16, 32, kernel_size=3, stride=2, padding=1),
+            nn.ReLU(),
+            nn.AdaptiveAvgPool2d(1),
+            nn.Flatten(),
+            nn.Linear(32, embedding_dim),
+        ).to(self.device).eval()
+
+    @property
+    def embedding_dim(self) -> int:
+        return self._dim
+
+    def _load(self, image_path: str) -> Optional[torch.Tensor]:
+        from PIL import Image
+
+        if not image_path or not Path(image_path).exists():
+            return None
+        try:
+            image = Image.open(image_path).convert('RGB').resize((self.image_size, self.image_size))
+        except Exception as e:
+            logger.warning(f"Error processing image {image_path}: {e}")
+            return None
+        return torch.from_numpy(np.asarray(image, dtype=np.float32) / 255.0).permute(2, 0, 1)
+
+    def extract(self, image_path: str) -> torch.Tensor:
+        return self.batch_extract([image_path])[0]
+
+    @torch.no_grad()
+    def batch_extract(self, image_paths: List[str], batch_size: int = 16) -> torch.Tensor:
+        out = torch.zeros(len(image_paths), self._dim)
+        for start in range(0, len(image_paths), batch_size):
+            loaded = [(i, self._load(p)) for i, p in enumerate(image_paths[start:start + batch_size], start)]
+            loaded = [(i, t) for i, t in loaded if t is not None]
+            if not loaded:
+                continue
+            idx = torch.tensor([i for i, _ in loaded])
+            h = self.net(torch.stack([t for _, t in loaded]).to(self.device))
+            out[idx] = F.normalize(h, p=2, dim=-1).cpu()
+        return out
@@ -0,0 +1,252 @@
+"""
+Cascade Graph Dataset for graph-level (per post) classification.
+
+- Reads cascades from the packed store (data/processed_graphs.pack) or from a
+  folder of per-post .pt files (data/processed_graphs).
+- SizeBucketSampler groups graphs of similar node count into batches under a
+  node budget, so batch sizes are balanced and no batch is dominated by one
+  huge cascade.
+- Batches are collated as a disjoint union (x concatenated, edge_index offset,
+  `batch` vector), the same layout as torch_geometric.data.Batch.
+
+Usage:
+    dataset = CascadeGraphDataset('data/processed_graphs.pack', labels={'abc': 1, ...})
+    sampler = SizeBucketSampler(dataset.sizes, max_nodes=4096, shuffle=True)
+    loader = make_cascade_loader(dataset, sampler, num_workers=4)
+    for batch in loader:
+        ...  # batch.x, batch.edge_index, batch.batch, batch.y
+"""
+
+import os
+import glob
+import json
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler
+from torch_geometric.data import Data
+
+from src.data.cascade_store import PackedCascadeStore
+
+
+def collate_cascades(graphs: Sequence[Data]) -> Data:
+    """
+    Disjoint-union collation of cascade graphs.
+
+    Returns:
+        Data with x, edge_index (offset per graph), batch, ptr, post_id list,
+        and y / graph_attr stacked when present.
+    """
+    sizes = torch.tensor([g.num_nodes for g in graphs], dtype=torch.long)
+    ptr = torch.zeros(len(graphs) + 1, dtype=torch.long)
+    ptr[1:] = torch.cumsum(sizes, 0)
+
+    edge_index = torch.cat([g.edge_index + ptr[i] for i, g in enumerate(graphs)], dim=1)
+    batch = Data(x=torch.cat([g.x for g in graphs]), edge_index=edge_index)
+    batch.batch = torch.repeat_interleave(torch.arange(len(graphs)), sizes)
+    batch.ptr = ptr
+    batch.post_id = [g.post_id for g in graphs]
+    batch.num_graphs = len(graphs)
+    if all(getattr(g, 'y', None) is not None for g in graphs):
+        batch.y = torch.stack([torch.as_tensor(g.y).view(()) for g in graphs])
+    if all(getattr(g, 'graph_attr', None) is not None for g in graphs):
+        batch.graph_attr = torch.stack([g.graph_attr for g in graphs])
+    return batch
+
+
+class CascadeGraphDataset(Dataset):
+    """
+    Cascade graphs with graph-level labels.
+
+    Indexing with a list of indices returns one collated batch (used with
+    SizeBucketSampler as a batch sampler, so collation happens in the workers).
+    """
+
+    def __init__(
+        self,
+        source: str,
+        labels: Optional[Dict[str, int]] = None,
+        post_ids: Optional[Sequence[str]] = None,
+        graph_attr: Optional[Dict[str, Sequence[float]]] = None
+    ):
+        """
+        Args:
+            source: Packed store directory or folder of .pt files
+            labels: {post_id: class index}; graphs without a label are dropped when given
+            post_ids: Restrict to these post_ids (e.g. one split)
+            graph_attr: {post_id: graph-level feature vector} (e.g. propagation features)
+        """
+        self.source = str(source)
+        self.is_packed = os.path.exists(os.path.join(self.source, 'index.bin'))
+        self.labels = labels
+        self.graph_attr = graph_attr
+        self._store = None
+
+        if self.is_packed:
+            store = PackedCascadeStore(self.source)
+            all_ids = store.post_ids
+            all_sizes = store.num_nodes
+        else:
+            all_ids, all_sizes, self._files = self._scan_folder(self.source)
+
+        keep = set(post_ids) if post_ids is not None else None
+        self._positions = [
+            i for i, pid in enumerate(all_ids)
+            if (keep is None or pid in keep) and (labels is None or pid in labels)
+        ]
+        self.post_ids = [all_ids[i] for i in self._positions]
+        self.sizes = np.asarray([int(all_sizes[i]) for i in self._positions], dtype=np.int64)
+
+    @staticmethod
+    def _scan_folder(folder: str):
+        """post_id + num_nodes of every .pt file, cached in <folder>/.sizes.json by (size, mtime)."""
+        cache_path = os.path.join(folder, '.sizes.json')
+        cache = {}
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+
+        files = sorted(glob.glob(os.path.join(folder, '*.pt')))
+        ids, sizes, changed = [], [], False
+        for filepath in files:
+            st = os.stat(filepath)
+            key = os.path.basename(filepath)
+            stamp = f"{st.st_size}:{st.st_mtime_ns}"
+            entry = cache.get(key)
+            if not entry or entry[0] != stamp:
+                data = torch.load(filepath, map_location='cpu', weights_only=False)
+                post_id = str(getattr(data, 'post_id', None) or key[:-len('.pt')])
+                entry = cache[key] = [stamp, post_id, int(data.num_nodes)]
+                changed = True
+            ids.append(entry[1])
+            sizes.append(entry[2])
+
+        if changed:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+        return ids, sizes, files
+
+    def __getstate__(self):
+        # Không pickle memmap sang worker: mỗi worker tự mở store
+        state = self.__dict__.copy()
+        state['_store'] = None
+        return state
+
+    def _get_store(self) -> PackedCascadeStore:
+        if self._store is None:
+            self._store = PackedCascadeStore(self.source)
+        return self._store
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _load(self, idx: int) -> Data:
+        position = self._positions[idx]
+        if self.is_packed:
+            data = self._get_store()[position]
+        else:
+            data = torch.load(self._files[position], map_location='cpu', weights_only=False)
+        post_id = self.post_ids[idx]
+        data.post_id = post_id
+        if self.labels is not None:
+            data.y = torch.tensor(self.labels[post_id], dtype=torch.long)
+        if self.graph_attr is not None:
+            data.graph_attr = torch.as_tensor(self.graph_attr[post_id], dtype=torch.float)
+        return data
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (list, tuple)):
+            return collate_cascades([self._load(i) for i in idx])
+        return self._load(idx)
+
+
+class SizeBucketSampler(Sampler):
+    """
+    Batch sampler that groups graphs of similar size under a node budget.
+
+    Graphs are sorted by node count (random tie-breaking), cut into buckets of
+    `bucket_size` neighbours, and each bucket is packed greedily into batches
+    of at most `max_nodes` nodes / `max_graphs` graphs. Batch order is shuffled.
+    """
+
+    def __init__(
+        self,
+        sizes: Sequence[int],
+        max_nodes: int = 4096,
+        max_graphs: int = 512,
+        bucket_size: int = 2048,
+        shuffle: bool = True,
+        seed: int = 42
+    ):
+        """
+        Args:
+            sizes: Node count of every graph
+            max_nodes: Node budget per batch (a single larger graph gets its own batch)
+            max_graphs: Max graphs per batch
+            bucket_size: Graphs per size bucket before packing
+            shuffle: Shuffle within equal sizes and across batches (per epoch)
+            seed: Base random seed (epoch is added)
+        """
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.max_nodes = max_nodes
+        self.max_graphs = max_graphs
+        self.bucket_size = bucket_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def _batches(self) -> List[List[int]]:
+        rng = np.random.default_rng(self.seed + self.epoch)
+        if self.shuffle:
+            order = np.lexsort((rng.random(len(self.sizes)), self.sizes))
+        else:
+            order = np.argsort(self.sizes, kind='stable')
+
+        batches = []
+        for start in range(0, len(order), self.bucket_size):
+            batch, nodes = [], 0
+            for idx in order[start:start + self.bucket_size]:
+                size = int(self.sizes[idx])
+                if batch and (nodes + size > self.max_nodes or len(batch) >= self.max_graphs):
+                    batches.append(batch)
+                    batch, nodes = [], 0
+                batch.append(int(idx))
+                nodes += size
+            if batch:
+                batches.append(batch)
+
+        if self.shuffle:
+            rng.shuffle(batches)
+        return batches
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self._batches())
+
+    def __len__(self) -> int:
+        return len(self._batches())
+
+    def padding_ratio(self) -> float:
+        """Wasted fraction if every graph in a batch were padded to the batch's largest graph."""
+        total, padded = 0, 0
+        for batch in self._batches():
+            sizes = self.sizes[batch]
+            total += int(sizes.sum())
+            padded += int(sizes.max()) * len(batch)
+        return 1.0 - total / padded if padded else 0.0
+
+
+def make_cascade_loader(
+    dataset: CascadeGraphDataset,
+    sampler: SizeBucketSampler,
+    num_workers: int = 0,
+    prefetch_factor: int = 4
+) -> DataLoader:
+    """DataLoader whose workers load + collate whole batches (batch_size=None)."""
+    kwargs = {}
+    if num_workers > 0:
+        kwargs = {'persistent_workers': True, 'prefetch_factor': prefetch_factor}
+    return DataLoader(dataset, sampler=sampler, batch_size=None, num_workers=num_workers, **kwargs)
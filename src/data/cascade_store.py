@@ -0,0 +1,406 @@
+"""
+Packed Cascade Store.
+
+Stores many small cascade graphs in one directory instead of one .pt file per post:
+
+    <root>/
+        meta.json        feature dim / dtype
+        x.bin            float32 [total_nodes, D]   (all graphs concatenated)
+        edges.bin        int32   [total_edges, 2]   (local node indices per graph)
+        index.bin        int64   [num_graphs, 4]    (node_offset, num_nodes, edge_offset, num_edges)
+        post_ids.jsonl   one post_id per graph (same order as index.bin)
+
+x.bin / edges.bin are memory-mapped for reading, so random access to one graph
+only touches its own slice. Appends only add bytes at the end; index.bin is
+written last on flush() and is the commit point (a crash mid-write leaves the
+previously flushed graphs intact, the torn tail is truncated on next open).
+
+Usage:
+    store = PackedCascadeStore('data/processed_graphs.pack', mode='a')
+    store.append(data)          # PyG Data with x, edge_index, post_id
+    store.flush()
+
+    store = PackedCascadeStore('data/processed_graphs.pack')
+    data = store.get('abc123')
+    for data in store.iter_by_size():
+        ...
+"""
+
+import os
+import json
+import glob
+import argparse
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+import torch
+from torch_geometric.data import Data
+
+STORE_VERSION = 1
+X_DTYPE = np.float32
+EDGE_DTYPE = np.int32
+INDEX_COLUMNS = 4  # node_offset, num_nodes, edge_offset, num_edges
+INDEX_RECORD_BYTES = INDEX_COLUMNS * 8
+
+
+class PackedCascadeStore:
+    """
+    Append-only, memory-mapped store of cascade graphs.
+    """
+
+    def __init__(self, root: str, mode: str = 'r'):
+        """
+        Args:
+            root: Store directory
+            mode: 'r' (read-only) or 'a' (read + append, creates the store if missing)
+        """
+        if mode not in ('r', 'a'):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.root = Path(root)
+        self.mode = mode
+
+        if mode == 'a':
+            self.root.mkdir(parents=True, exist_ok=True)
+        elif not (self.root / 'index.bin').exists():
+            raise FileNotFoundError(f"Packed store not found: {self.root}")
+
+        self.feat_dim = None
+        meta_path = self.root / 'meta.json'
+        if meta_path.exists():
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.feat_dim = json.load(f)['feat_dim']
+
+        self._index = np.zeros((0, INDEX_COLUMNS), dtype=np.int64)
+        self._post_ids: List[str] = []
+        self._id_to_idx: Dict[str, int] = {}
+        self._x_mmap = None
+        self._edge_mmap = None
+
+        # Pending (not yet committed) appends
+        self._pending_index: List[List[int]] = []
+        self._files = None
+
+        self._load()
+
+    # ------------------------------------------------------------------ #
+    # Loading / recovery
+    # ------------------------------------------------------------------ #
+
+    def _load(self):
+        index_path = self.root / 'index.bin'
+        if index_path.exists():
+            raw = np.fromfile(index_path, dtype=np.int64)
+            num_graphs = raw.size // INDEX_COLUMNS
+            self._index = raw[:num_graphs * INDEX_COLUMNS].reshape(num_graphs, INDEX_COLUMNS)
+
+        post_ids_path = self.root / 'post_ids.jsonl'
+        if post_ids_path.exists():
+            with open(post_ids_path, 'r', encoding='utf-8') as f:
+                self._post_ids = [json.loads(line) for line, _ in zip(f, range(len(self._index)))]
+        if len(self._post_ids) < len(self._index):
+            # post_ids được ghi trước index -> thiếu nghĩa là store hỏng
+            raise ValueError(f"Corrupt store {self.root}: {len(self._post_ids)} post_ids for {len(self._index)} graphs")
+        self._id_to_idx = {pid: i for i, pid in enumerate(self._post_ids)}
+
+        if self.mode == 'a':
+            self._truncate_uncommitted()
+        self._x_mmap = None
+        self._edge_mmap = None
+
+    def _truncate_uncommitted(self):
+        """Drop bytes written after the last flush (e.g. crash during append)."""
+        total_nodes, total_edges = self._totals()
+        if self.feat_dim is not None:
+            self._truncate(self.root / 'x.bin', total_nodes * self.feat_dim * np.dtype(X_DTYPE).itemsize)
+        self._truncate(self.root / 'edges.bin', total_edges * 2 * np.dtype(EDGE_DTYPE).itemsize)
+        self._truncate(self.root / 'index.bin', len(self._index) * INDEX_RECORD_BYTES)
+
+        post_ids_path = self.root / 'post_ids.jsonl'
+        if post_ids_path.exists():
+            with open(post_ids_path, 'rb') as f:
+                lines = f.readlines()
+            if len(lines) != len(self._index):
+                with open(post_ids_path, 'wb') as f:
+                    f.writelines(lines[:len(self._index)])
+
+    @staticmethod
+    def _truncate(path: Path, size: int):
+        if path.exists() and os.path.getsize(path) != size:
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+
+    def _totals(self):
+        if len(self._index) == 0:
+            return 0, 0
+        last = self._index[-1]
+        return int(last[0] + last[1]), int(last[2] + last[3])
+
+    def _mmaps(self):
+        """Memory-map x.bin / edges.bin (re-mapped lazily after appends)."""
+        if self._x_mmap is None:
+            total_nodes, total_edges = self._totals()
+            self._x_mmap = (
+                np.memmap(self.root / 'x.bin', dtype=X_DTYPE, mode='r', shape=(total_nodes, self.feat_dim))
+                if total_nodes else np.zeros((0, self.feat_dim or 0), dtype=X_DTYPE)
+            )
+            self._edge_mmap = (
+                np.memmap(self.root / 'edges.bin', dtype=EDGE_DTYPE, mode='r', shape=(total_edges, 2))
+                if total_edges else np.zeros((0, 2), dtype=EDGE_DTYPE)
+            )
+        return self._x_mmap, self._edge_mmap
+
+    # ------------------------------------------------------------------ #
+    # Writing
+    # ------------------------------------------------------------------ #
+
+    def _open_files(self):
+        if self._files is None:
+            self._files = {
+                'x': open(self.root / 'x.bin', 'ab'),
+                'edges': open(self.root / 'edges.bin', 'ab'),
+                'post_ids': open(self.root / 'post_ids.jsonl', 'a', encoding='utf-8'),
+            }
+        return self._files
+
+    def append(self, data: Data):
+        """
+        Append one graph (committed on the next flush()).
+
+        Args:
+            data: PyG Data with x [N, D], edge_index [2, E] and post_id
+        """
+        if self.mode != 'a':
+            raise IOError("Store opened read-only")
+        post_id = str(data.post_id)
+        if post_id in self._id_to_idx:
+            raise ValueError(f"post_id already in store: {post_id}")
+
+        x = data.x.detach().cpu().numpy().astype(X_DTYPE, copy=False)
+        if self.feat_dim is None:
+            self.feat_dim = int(x.shape[1])
+            with open(self.root / 'meta.json', 'w', encoding='utf-8') as f:
+                json.dump({'version': STORE_VERSION, 'feat_dim': self.feat_dim, 'x_dtype': 'float32'}, f)
+        elif x.shape[1] != self.feat_dim:
+            raise ValueError(f"Feature dim {x.shape[1]} != store feature dim {self.feat_dim}")
+
+        edge_index = data.edge_index
+        edges = (edge_index.t().cpu().numpy() if edge_index is not None and edge_index.numel()
+                 else np.zeros((0, 2), dtype=np.int64))
+
+        if self._pending_index:
+            prev = self._pending_index[-1]
+            node_offset, edge_offset = prev[0] + prev[1], prev[2] + prev[3]
+        else:
+            node_offset, edge_offset = self._totals()
+
+        files = self._open_files()
+        files['x'].write(np.ascontiguousarray(x).tobytes())
+        files['edges'].write(np.ascontiguousarray(edges, dtype=EDGE_DTYPE).tobytes())
+        files['post_ids'].write(json.dumps(post_id) + '\n')
+
+        self._pending_index.append([node_offset, int(x.shape[0]), edge_offset, int(edges.shape[0])])
+        self._id_to_idx[post_id] = len(self._post_ids)
+        self._post_ids.append(post_id)
+
+    def extend(self, graphs: Sequence[Data]):
+        for data in graphs:
+            self.append(data)
+
+    def flush(self):
+        """Commit pending appends: data files first, index.bin last."""
+        if not self._pending_index:
+            return
+        files = self._open_files()
+        for f in files.values():
+            f.flush()
+            os.fsync(f.fileno())
+
+        pending = np.asarray(self._pending_index, dtype=np.int64)
+        with open(self.root / 'index.bin', 'ab') as f:
+            f.write(pending.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._index = np.concatenate([self._index, pending])
+        self._pending_index = []
+        self._x_mmap = None
+        self._edge_mmap = None
+
+    def close(self):
+        if self.mode == 'a':
+            self.flush()
+        if self._files is not None:
+            for f in self._files.values():
+                f.close()
+            self._files = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, post_id) -> bool:
+        return str(post_id) in self._id_to_idx
+
+    @property
+    def post_ids(self) -> List[str]:
+        return self._post_ids[:len(self._index)]
+
+    @property
+    def num_nodes(self) -> np.ndarray:
+        """Nodes per graph [num_graphs]."""
+        return self._index[:, 1]
+
+    @property
+    def num_edges(self) -> np.ndarray:
+        """Edges per graph [num_graphs]."""
+        return self._index[:, 3]
+
+    def _check(self, idx: int) -> int:
+        if idx < 0:
+            idx += len(self._index)
+        if not 0 <= idx < len(self._index):
+            raise IndexError(f"Graph {idx} out of range (0..{len(self._index) - 1})")
+        return idx
+
+    def edge_index(self, idx: int) -> torch.Tensor:
+        """edge_index [2, E] of graph idx (does not touch x.bin)."""
+        idx = self._check(idx)
+        _, edge_mmap = self._mmaps()
+        _, _, e_off, e_num = self._index[idx]
+        edges = np.asarray(edge_mmap[e_off:e_off + e_num], dtype=np.int64)
+        return torch.from_numpy(np.ascontiguousarray(edges.T))
+
+    def __getitem__(self, idx: int) -> Data:
+        idx = self._check(idx)
+        x_mmap, _ = self._mmaps()
+        n_off, n_num, _, _ = self._index[idx]
+        # np.array: copy out of the read-only mmap
+        x = torch.from_numpy(np.array(x_mmap[n_off:n_off + n_num]))
+        data = Data(x=x, edge_index=self.edge_index(idx))
+        data.post_id = self._post_ids[idx]
+        data.num_nodes = int(n_num)
+        return data
+
+    def get(self, post_id) -> Data:
+        """Random access by post_id."""
+        idx = self._id_to_idx.get(str(post_id))
+        if idx is None or idx >= len(self._index):
+            raise KeyError(post_id)
+        return self[idx]
+
+    def __iter__(self) -> Iterator[Data]:
+        for idx in range(len(self._index)):
+            yield self[idx]
+
+    def order_by_size(self, descending: bool = False) -> np.ndarray:
+        """Graph indices sorted by num_nodes (stable)."""
+        sizes = -self.num_nodes if descending else self.num_nodes
+        return np.argsort(sizes, kind='stable')
+
+    def iter_by_size(self, descending: bool = False) -> Iterator[Data]:
+        """Iterate graphs ordered by number of nodes."""
+        for idx in self.order_by_size(descending):
+            yield self[int(idx)]
+
+    def collate(self, indices: Sequence[int]) -> Data:
+        """
+        Disjoint union of several graphs (PyG Batch layout: batch vector + ptr).
+        """
+        x_mmap, edge_mmap = self._mmaps()
+        indices = [self._check(int(i)) for i in indices]
+        rows = self._index[indices]
+        sizes = rows[:, 1]
+        ptr = np.concatenate([[0], np.cumsum(sizes)])
+
+        xs = [x_mmap[n_off:n_off + n_num] for n_off, n_num, _, _ in rows]
+        edges = [
+            np.asarray(edge_mmap[e_off:e_off + e_num], dtype=np.int64) + ptr[k]
+            for k, (_, _, e_off, e_num) in enumerate(rows)
+        ]
+        x = torch.from_numpy(np.concatenate(xs) if xs else np.zeros((0, self.feat_dim or 0), dtype=X_DTYPE))
+        edge = np.concatenate(edges) if edges else np.zeros((0, 2), dtype=np.int64)
+
+        data = Data(x=x, edge_index=torch.from_numpy(np.ascontiguousarray(edge.T)))
+        data.batch = torch.repeat_interleave(torch.arange(len(indices)), torch.from_numpy(sizes))
+        data.ptr = torch.from_numpy(ptr)
+        data.post_id = [self._post_ids[i] for i in indices]
+        data.num_graphs = len(indices)
+        return data
+
+    def nbytes(self, idx: int) -> int:
+        """On-disk bytes used by graph idx (x + edges)."""
+        _, n_num, _, e_num = self._index[self._check(idx)]
+        return int(n_num * (self.feat_dim or 0) * np.dtype(X_DTYPE).itemsize
+                   + e_num * 2 * np.dtype(EDGE_DTYPE).itemsize)
+
+
+def merge_stores(sources: Sequence[str], root: str, flush_every: int = 1000) -> int:
+    """
+    Append graphs from other stores (e.g. per-shard stores) into root, skipping post_ids already present.
+    Sources without index.bin (e.g. a shard that had nothing to build) are skipped.
+
+    Returns:
+        Number of graphs added
+    """
+    added = 0
+    with PackedCascadeStore(root, mode='a') as store:
+        for source in sources:
+            if not (Path(source) / 'index.bin').exists():
+                continue
+            src_store = PackedCascadeStore(source)
+            for idx, post_id in enumerate(src_store.post_ids):
+                if post_id in store:
+                    continue
+                store.append(src_store[idx])
+                added += 1
+                if added % flush_every == 0:
+                    store.flush()
+    return added
+
+
+def pack_graph_folder(folder: str, root: str) -> int:
+    """
+    Convert a folder of per-post .pt files into a packed store (skips post_ids already packed).
+
+    Returns:
+        Number of graphs added
+    """
+    added = 0
+    with PackedCascadeStore(root, mode='a') as store:
+        for filepath in sorted(glob.glob(os.path.join(folder, "*.pt"))):
+            data = torch.load(filepath, map_location='cpu', weights_only=False)
+            if getattr(data, 'post_id', None) is None:
+                data.post_id = os.path.basename(filepath)[:-len('.pt')]
+            if data.post_id in store:
+                continue
+            store.append(data)
+            added += 1
+            if added % 1000 == 0:
+                store.flush()
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack per-post cascade .pt files into one store')
+    parser.add_argument('--from-folder', default='data/processed_graphs', help='Folder of .pt files')
+    parser.add_argument('--out', default='data/processed_graphs.pack', help='Packed store directory')
+    args = parser.parse_args()
+
+    added = pack_graph_folder(args.from_folder, args.out)
+    store = PackedCascadeStore(args.out)
+    print(f"✅ Packed {added} new graphs -> {args.out} ({len(store)} graphs, {int(store.num_nodes.sum())} nodes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@
 PyTorch Geometric Dataset for Fake News Detection.
 
 Wrapper for loading unified graph with train/val/test masks.
+
+Also exposes the symmetrised CSR/CSC adjacency cached in the graph file by
+InteractionGraphBuilder (built once on load for graphs saved without it).
 """
 
 import torch
@@ -9,6 +12,10 @@ from torch_geometric.data import Data
 from typing import Optional
 from pathlib import Path
 
+from src.features.graph_builder import (
+    InteractionGraphBuilder, adjacency_tensor, has_adjacency, symmetric_edge_index
+)
+
 
 class FakeNewsGraphDataset:
     """
@@ -47,6 +54,10 @@ class FakeNewsGraphDataset:
         print(f"📥 Loading graph from: {self.graph_path}")
         self._graph = torch.load(self.graph_path, weights_only=False)
         print(f"✓ Graph loaded: {self._graph.num_nodes} nodes, {self._graph.num_edges} edges")
+        if not has_adjacency(self._graph):
+            # Older graph files: build it for this session (re-run preprocessor_graph to persist it)
+            print("⚠️ No cached adjacency in the graph file, building it now")
+            InteractionGraphBuilder.add_adjacency(self._graph)
     
     @property
     def graph(self) -> Data:
@@ -72,6 +83,29 @@ class FakeNewsGraphDataset:
         self._load_graph()
         return self._graph.test_mask
     
+    def adjacency(self, normalized: bool = False, layout: str = 'csr') -> torch.Tensor:
+        """
+        Symmetrised adjacency as a sparse tensor [N, N] (views of the cached arrays).
+        
+        Args:
+            normalized: False -> A (values 1), True -> D^-1/2 (A + I) D^-1/2 as GCNConv
+            layout: 'csr' or 'csc'
+        """
+        self._load_graph()
+        return adjacency_tensor(self._graph, normalized=normalized, layout=layout)
+    
+    @property
+    def symmetric_edge_index(self) -> torch.Tensor:
+        """Symmetrised, deduplicated edges [2, E'] sorted by target."""
+        self._load_graph()
+        return symmetric_edge_index(self._graph)
+    
+    @property
+    def degree(self) -> torch.Tensor:
+        """Node degrees in the symmetrised graph [N]."""
+        self._load_graph()
+        return self._graph.adj_deg
+    
     @property
     def num_classes(self) -> int:
         """Return number of classes (6 for multiclass)."""
@@ -9,6 +9,11 @@ import os
 from pathlib import Path
 from datetime import datetime
 
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
 print("=" * 60)
 print("IMAGE PREPROCESSOR V3 - SHARED + INDIVIDUAL OUTPUTS")
 print("=" * 60)
@@ -23,6 +28,7 @@ os.environ['PYTHONWARNINGS'] = 'ignore'
 print("Importing libraries...")
 
 import json
+import itertools
 import logging
 from typing import Dict, List, Optional, Tuple
 import requests
@@ -38,6 +44,9 @@ print("  ✓ PIL")
 from tqdm import tqdm
 print("  ✓ tqdm")
 
+from src.utils.jsonl_index import JsonlOffsetIndex
+from src.utils.dataset_io import count_records, is_parquet_path, read_records
+
 print()
 print("All imports successful! Starting processor...")
 print()
@@ -104,15 +113,11 @@ class OutputFileManager:
     
     @staticmethod
     def count_existing_records(file_path: str) -> int:
-        """Đếm số records đã có trong file"""
+        """Đếm số records đã có trong file (dùng offset index, chỉ quét phần mới append)"""
         if not os.path.exists(file_path):
             return 0
         
-        count = 0
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for _ in f:
-                count += 1
-        return count
+        return len(JsonlOffsetIndex(file_path))
 
 
 class ImageProcessor:
@@ -322,21 +327,26 @@ class ImageProcessor:
         processed_records = []
         
         try:
-            # Read input file
+            # Read input file: stream only the first max_samples records
+            # (JSONL via the offset index, Parquet via the dataset reader)
             print("Reading input file...")
-            with open(input_jsonl, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            lines = lines[:self.max_samples]
+            if is_parquet_path(input_jsonl):
+                total_available = count_records(input_jsonl)
+                num_lines = total_available if self.max_samples is None else min(total_available, self.max_samples)
+                lines = itertools.islice(read_records(input_jsonl), num_lines)
+            else:
+                index = JsonlOffsetIndex(input_jsonl)
+                num_lines = len(index) if self.max_samples is None else min(len(index), self.max_samples)
+                lines = index.iter_lines(0, num_lines)
             
-            print(f"Total records to process: {len(lines)}")
+            print(f"Total records to process: {num_lines}")
             print("=" * 60)
             print()
             
             # Process each line
-            for line in tqdm(lines, desc="Processing images", ncols=80):
+            for line in tqdm(lines, total=num_lines, desc="Processing images", ncols=80):
                 try:
-                    record = json.loads(line.strip())
+                    record = line if isinstance(line, dict) else json.loads(line.strip())
                     self.stats["total_records"] += 1
                     
                     if 'media_url' not in record or not record['media_url']:
@@ -450,7 +460,7 @@ def main():
     parser.add_argument(
         '--input',
         default='data/01_raw/Fakeddit/Fakeddit_pilot_processed_200.jsonl',
-        help='Path to input JSONL file'
+        help='Path to input JSONL file (or Parquet file/dataset)'
     )
     parser.add_argument(
         '--batch-name',
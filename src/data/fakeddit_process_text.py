@@ -43,6 +43,8 @@ from datetime import datetime
 
 print("  ✓ Basic imports")
 
+from src.utils.dataset_io import is_parquet_path, read_records, write_records
+
 try:
     from tqdm import tqdm
     print("  ✓ tqdm")
@@ -121,19 +123,21 @@ class FakedditDataProcessor:
         min_text_length: int = 5,
         max_text_length: int = 5000,
         train_ratio: float = 0.7,
-        val_ratio: float = 0.15
+        val_ratio: float = 0.15,
+        output_format: str = 'jsonl'
     ):
         """
         Initialize the processor
         
         Args:
-            input_file: Path to input JSONL (01_raw)
+            input_file: Path to input JSONL or Parquet (01_raw)
             output_02_dir: Output directory for 02_processed
             output_03_dir: Output directory for 03_clean
             min_text_length: Minimum clean_text character length
             max_text_length: Maximum clean_text character length
             train_ratio: Training set ratio
             val_ratio: Validation set ratio
+            output_format: 03_clean format - 'jsonl', 'parquet' (partitioned by split) or 'both'
         """
         self.input_file = Path(input_file)
         self.output_02_dir = Path(output_02_dir)
@@ -143,6 +147,7 @@ class FakedditDataProcessor:
         self.train_ratio = train_ratio
         self.val_ratio = val_ratio
         self.test_ratio = 1 - train_ratio - val_ratio
+        self.output_format = output_format
         
         # Create timestamp for this run
         self.run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -512,20 +517,25 @@ class FakedditDataProcessor:
         print(f"Reading: {self.input_file}")
         
         raw_records = []
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                if not line.strip():
-                    continue
-                
+        if is_parquet_path(self.input_file):
+            for record in read_records(str(self.input_file)):
                 self.stats['total_input_records'] += 1
-                
-                try:
-                    record = json.loads(line.strip())
-                    raw_records.append(record)
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Invalid JSON at line {line_num}: {e}")
-                    self.stats['invalid_json'] += 1
-                    continue
+                raw_records.append(record)
+        else:
+            with open(self.input_file, 'r', encoding='utf-8') as f:
+                for line_num, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    
+                    self.stats['total_input_records'] += 1
+                    
+                    try:
+                        record = json.loads(line.strip())
+                        raw_records.append(record)
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Invalid JSON at line {line_num}: {e}")
+                        self.stats['invalid_json'] += 1
+                        continue
         
         print(f"✓ Loaded {len(raw_records)} records from 01_raw")
         print()
@@ -603,12 +613,19 @@ class FakedditDataProcessor:
         output_03_fakeddit = self.output_03_dir / "Fakeddit"
         output_03_fakeddit.mkdir(parents=True, exist_ok=True)
         
-        for split_name, split_data in [('train', train_set), ('val', val_set), ('test', test_set)]:
-            output_file = output_03_fakeddit / f"{split_name}.jsonl"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                for record in split_data:
-                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
-            print(f"✓ Saved {split_name}.jsonl ({len(split_data)} records)")
+        if self.output_format in ('jsonl', 'both'):
+            for split_name, split_data in [('train', train_set), ('val', val_set), ('test', test_set)]:
+                output_file = output_03_fakeddit / f"{split_name}.jsonl"
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    for record in split_data:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                print(f"✓ Saved {split_name}.jsonl ({len(split_data)} records)")
+        
+        if self.output_format in ('parquet', 'both'):
+            # Columnar copy: dataset.parquet/split=train|val|test/, image_info & text_features as structs
+            parquet_dir = output_03_fakeddit / "dataset.parquet"
+            write_records(train_set + val_set + test_set, str(parquet_dir), fmt='parquet', partition_cols=['split'])
+            print("✓ Saved dataset.parquet (partitioned by split)")
         
         # Save statistics
         all_records = train_set + val_set + test_set
@@ -682,6 +699,12 @@ def main():
         default=None,
         help='Name of the batch (e.g., "batch_200_400") to create a separate folder in 03_clean'
     )
+    parser.add_argument(
+        '--format',
+        choices=['jsonl', 'parquet', 'both'],
+        default='jsonl',
+        help='Output format for 03_clean splits (parquet = partitioned by split)'
+    )
     
     args = parser.parse_args()
     
@@ -743,7 +766,8 @@ def main():
         min_text_length=5,
         max_text_length=5000,
         train_ratio=0.7,
-        val_ratio=0.15
+        val_ratio=0.15,
+        output_format=args.format
     )
     
     # Run processing
@@ -0,0 +1,414 @@
+"""
+Cluster partitioning of the Top-K interaction graph (Cluster-GCN style).
+
+The graph is split into `num_parts` balanced clusters, nodes are renumbered so
+every cluster is one contiguous range, and the partitioned graph is cached on
+disk next to the graph file (computed once):
+
+    <graph>.parts<P>/
+        meta.json       num_parts, dim, method, edge cut, graph stamp (written last)
+        perm.npy        int64 [N]  new id -> original node id
+        part_ptr.npy    int64 [P + 1] node range of every cluster
+        x.npy           float32 [N, D] features in cluster order
+        y.npy           int64 [N]
+        split.npy       int8 [N]  0 train, 1 val, 2 test, -1 none
+        edges.npy       int64 [2, E] (new ids), grouped by target cluster
+        edge_ptr.npy    int64 [P + 1] edge range of every target cluster
+        edge_attr.npy   int8 [E] edge types (0 text, 1 image)
+
+A training step loads a random union of clusters: contiguous x / y slices and
+the edges of the chosen target clusters whose source is also chosen, so memory
+per step is bounded by the clusters' size, never by the whole graph.
+
+Partitioning:
+- 'metis': METIS via pymetis (optional dependency).
+- 'lpa':   size-constrained label propagation (vectorised numpy): communities
+           capped at the cluster size, packed into clusters, then refined.
+- 'auto':  metis if pymetis is installed, else lpa.
+
+Usage:
+    parts = GraphPartition.load_or_build('data/04_graph/fakeddit_graph.pt', num_parts=64)
+    sub = parts.subgraph([3, 17, 40])   # Data with x, edge_index, edge_attr, y, masks, n_id
+"""
+
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import torch
+from torch_geometric.data import Data
+
+try:
+    import pymetis
+    HAS_METIS = True
+except ImportError:
+    HAS_METIS = False
+
+logger = logging.getLogger(__name__)
+
+SPLIT_CODES = {'train': 0, 'val': 1, 'test': 2}
+
+
+def partition_cache_dir(graph_path: Union[str, Path], num_parts: int) -> Path:
+    """<graph>.parts<P>/ next to the graph file."""
+    graph_path = Path(graph_path)
+    return graph_path.with_name(f"{graph_path.stem}.parts{num_parts}")
+
+
+def _undirected_csr(edge_index: np.ndarray, num_nodes: int):
+    """Symmetric, loop-free, unweighted adjacency (scipy CSR)."""
+    import scipy.sparse as sp
+
+    src, dst = edge_index
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+    adj = sp.coo_matrix(
+        (np.ones(2 * src.size, dtype=np.float32), (np.concatenate([src, dst]), np.concatenate([dst, src]))),
+        shape=(num_nodes, num_nodes)
+    ).tocsr()
+    adj.data[:] = 1.0  # duplicates collapse to one edge
+    return adj
+
+
+def _constrained_lpa(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    labels: np.ndarray,
+    num_labels: int,
+    capacity: int,
+    min_size: int,
+    iterations: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Size-constrained label propagation rounds over an undirected edge list.
+
+    Every round, a random half of the nodes (to avoid oscillation) wants to
+    join the label most of its neighbours carry; moves are accepted in order
+    of gain while the target stays <= capacity and the source >= min_size
+    (sizes taken at the start of the round, so both bounds always hold).
+    """
+    num_nodes = labels.size
+    for it in range(iterations):
+        active = rng.random(num_nodes) < 0.5
+        sel = active[rows]
+        key = rows[sel] * num_labels + labels[cols[sel]]
+        uniq, counts = np.unique(key, return_counts=True)
+        node, cand = uniq // num_labels, uniq % num_labels
+
+        own = np.zeros(num_nodes, dtype=np.int64)
+        is_own = cand == labels[node]
+        own[node[is_own]] = counts[is_own]
+
+        # Best label per node: most neighbours, random tie-break
+        best = np.lexsort((rng.random(uniq.size), -counts, node))
+        first = best[np.r_[True, node[best][1:] != node[best][:-1]]]
+        mv_node, mv_to = node[first], cand[first]
+        mv_gain = counts[first] - own[mv_node]
+        want = (mv_to != labels[mv_node]) & (mv_gain > 0)
+        mv_node, mv_to, mv_gain = mv_node[want], mv_to[want], mv_gain[want]
+        if mv_node.size == 0:
+            break
+
+        sizes = np.bincount(labels, minlength=num_labels)
+        o = np.lexsort((-mv_gain, mv_to))
+        mv_node, mv_to, mv_gain = mv_node[o], mv_to[o], mv_gain[o]
+        rank = np.arange(mv_to.size) - np.searchsorted(mv_to, mv_to, side='left')
+        ok = rank < (capacity - sizes)[mv_to]
+        mv_node, mv_to, mv_gain = mv_node[ok], mv_to[ok], mv_gain[ok]
+
+        mv_from = labels[mv_node]
+        o = np.lexsort((-mv_gain, mv_from))
+        mv_node, mv_to, mv_from = mv_node[o], mv_to[o], mv_from[o]
+        rank = np.arange(mv_from.size) - np.searchsorted(mv_from, mv_from, side='left')
+        accept = rank < (sizes - min_size)[mv_from]
+        if not accept.any():
+            break
+        labels[mv_node[accept]] = mv_to[accept]
+        logger.debug(f"LPA round {it}: moved {int(accept.sum())} nodes")
+    return labels
+
+
+def label_propagation_partition(
+    edge_index: np.ndarray,
+    num_nodes: int,
+    num_parts: int,
+    iterations: int = 20,
+    imbalance: float = 0.05,
+    seed: int = 42
+) -> np.ndarray:
+    """
+    Balanced partition by size-constrained label propagation (multilevel-lite).
+
+    1. Community detection: every node starts in its own community, LPA with
+       communities capped at the cluster capacity.
+    2. Packing: nodes ordered by community, cut into P equal contiguous ranges.
+    3. Refinement: LPA over the P clusters, keeping every cluster within
+       (1 +- imbalance) * N / P.
+
+    Returns:
+        Cluster id of every node [N]
+    """
+    rng = np.random.default_rng(seed)
+    adj = _undirected_csr(edge_index, num_nodes)
+    rows = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(adj.indptr))
+    cols = adj.indices.astype(np.int64)
+    capacity = int(np.ceil(num_nodes / num_parts * (1 + imbalance)))
+    min_size = int(np.floor(num_nodes / num_parts * (1 - imbalance)))
+
+    # 1. Communities (cap keeps every community packable into one cluster)
+    community = _constrained_lpa(rows, cols, np.arange(num_nodes, dtype=np.int64), num_nodes,
+                                 capacity, 0, iterations, rng)
+
+    # 2. Lay nodes out community by community and cut into P equal ranges
+    #    (perfect balance; at most P - 1 communities are split at a boundary)
+    order = np.argsort(community, kind='stable')
+    parts = np.empty(num_nodes, dtype=np.int64)
+    parts[order] = np.arange(num_nodes, dtype=np.int64) * num_parts // max(num_nodes, 1)
+
+    # 3. Balanced refinement over clusters
+    return _constrained_lpa(rows, cols, parts, num_parts, capacity, min_size, iterations, rng)
+
+
+def metis_partition(edge_index: np.ndarray, num_nodes: int, num_parts: int) -> np.ndarray:
+    """METIS k-way partition via pymetis."""
+    adj = _undirected_csr(edge_index, num_nodes)
+    _, membership = pymetis.part_graph(num_parts, xadj=adj.indptr, adjncy=adj.indices)
+    return np.asarray(membership, dtype=np.int64)
+
+
+def resolve_method(method: str) -> str:
+    """'auto' -> 'metis' when pymetis is installed, else 'lpa'."""
+    if method == 'auto':
+        method = 'metis' if HAS_METIS else 'lpa'
+    if method == 'metis' and not HAS_METIS:
+        raise ImportError("method='metis' needs pymetis (pip install pymetis)")
+    return method
+
+
+def edge_cut(edge_index: np.ndarray, parts: np.ndarray) -> float:
+    """Fraction of edges whose endpoints are in different clusters."""
+    if edge_index.shape[1] == 0:
+        return 0.0
+    return float(np.mean(parts[edge_index[0]] != parts[edge_index[1]]))
+
+
+class GraphPartition:
+    """
+    Cluster-ordered graph on disk (memory-mapped), loaded one cluster union at a time.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        Args:
+            root: Cache directory written by GraphPartition.build
+        """
+        self.root = Path(root)
+        with open(self.root / 'meta.json', 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.num_parts = self.meta['num_parts']
+        self.part_ptr = np.load(self.root / 'part_ptr.npy')
+        self.edge_ptr = np.load(self.root / 'edge_ptr.npy')
+        self._arrays = None
+
+    def _open(self) -> dict:
+        # mmap lazily: each DataLoader worker opens its own maps
+        if self._arrays is None:
+            self._arrays = {
+                name: np.load(self.root / f'{name}.npy', mmap_mode='r')
+                for name in ('perm', 'x', 'y', 'split', 'edges', 'edge_attr')
+            }
+        return self._arrays
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_arrays'] = None
+        return state
+
+    @property
+    def part_sizes(self) -> np.ndarray:
+        return np.diff(self.part_ptr)
+
+    def split_parts(self, split: str) -> np.ndarray:
+        """Clusters that contain at least one node of the split."""
+        split_arr = self._open()['split']
+        code = SPLIT_CODES[split]
+        return np.array([
+            p for p in range(self.num_parts)
+            if np.any(split_arr[self.part_ptr[p]:self.part_ptr[p + 1]] == code)
+        ], dtype=np.int64)
+
+    def subgraph(self, clusters: Sequence[int]) -> Data:
+        """
+        Union of clusters as one Data (local node ids, edges inside the union only).
+        """
+        arrays = self._open()
+        clusters = np.unique(np.asarray(clusters, dtype=np.int64))
+        starts, ends = self.part_ptr[clusters], self.part_ptr[clusters + 1]
+        sizes = ends - starts
+
+        def take(arr):
+            return np.concatenate([arr[s:e] for s, e in zip(starts, ends)])
+
+        # new (global, cluster-ordered) id -> local id, via the cluster offsets
+        local_start = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        edge_blocks = [arrays['edges'][:, self.edge_ptr[c]:self.edge_ptr[c + 1]] for c in clusters]
+        attr_blocks = [arrays['edge_attr'][self.edge_ptr[c]:self.edge_ptr[c + 1]] for c in clusters]
+        edges = np.concatenate(edge_blocks, axis=1) if edge_blocks else np.zeros((2, 0), dtype=np.int64)
+        attrs = np.concatenate(attr_blocks) if attr_blocks else np.zeros(0, dtype=np.int8)
+
+        src_cluster = np.searchsorted(self.part_ptr, edges[0], side='right') - 1
+        pos = np.searchsorted(clusters, src_cluster)
+        pos = np.minimum(pos, clusters.size - 1)
+        keep = clusters[pos] == src_cluster
+        edges, attrs = edges[:, keep], attrs[keep]
+
+        def to_local(ids):
+            c = np.searchsorted(self.part_ptr, ids, side='right') - 1
+            idx = np.searchsorted(clusters, c)
+            return ids - self.part_ptr[c] + local_start[idx]
+
+        split_arr = take(arrays['split'])
+        data = Data(
+            x=torch.from_numpy(take(arrays['x'])),
+            edge_index=torch.from_numpy(np.stack([to_local(edges[0]), to_local(edges[1])])),
+            edge_attr=torch.from_numpy(attrs.astype(np.int64)).view(-1, 1),
+            y=torch.from_numpy(take(arrays['y'])),
+        )
+        for split, code in SPLIT_CODES.items():
+            data[f'{split}_mask'] = torch.from_numpy(split_arr == code)
+        data.n_id = torch.from_numpy(take(arrays['perm']))
+        return data
+
+    @classmethod
+    def build(
+        cls,
+        data: Data,
+        root: Union[str, Path],
+        num_parts: int = 64,
+        method: str = 'auto',
+        stamp: Optional[str] = None,
+        chunk_size: int = 65536
+    ) -> 'GraphPartition':
+        """
+        Partition `data` and write the cluster-ordered graph to root/.
+
+        Args:
+            data: Full graph (x, edge_index, edge_attr, y, train/val/test masks)
+            root: Output directory
+            num_parts: Number of clusters
+            method: 'auto', 'metis' or 'lpa'
+            stamp: Graph stamp stored in meta.json (cache validation)
+            chunk_size: Rows per feature copy
+        """
+        method = resolve_method(method)
+
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        meta_path = root / 'meta.json'
+        if meta_path.exists():
+            meta_path.unlink()  # meta.json is the commit point
+
+        start = time.perf_counter()
+        num_nodes = data.num_nodes
+        edge_index = data.edge_index.cpu().numpy()
+        if method == 'metis':
+            parts = metis_partition(edge_index, num_nodes, num_parts)
+        else:
+            parts = label_propagation_partition(edge_index, num_nodes, num_parts)
+        partition_s = time.perf_counter() - start
+
+        perm = np.argsort(parts, kind='stable')
+        new_id = np.empty(num_nodes, dtype=np.int64)
+        new_id[perm] = np.arange(num_nodes, dtype=np.int64)
+        part_ptr = np.searchsorted(parts[perm], np.arange(num_parts + 1))
+
+        np.save(root / 'perm.npy', perm)
+        np.save(root / 'part_ptr.npy', part_ptr)
+
+        x_out = np.lib.format.open_memmap(str(root / 'x.npy'), mode='w+', dtype=np.float32,
+                                          shape=(num_nodes, data.x.size(1)))
+        perm_t = torch.from_numpy(perm)
+        for s in range(0, num_nodes, chunk_size):
+            x_out[s:s + chunk_size] = data.x[perm_t[s:s + chunk_size]].float().numpy()
+        x_out.flush()
+        del x_out
+
+        np.save(root / 'y.npy', data.y.cpu().numpy()[perm].astype(np.int64))
+        split = np.full(num_nodes, -1, dtype=np.int8)
+        for name, code in SPLIT_CODES.items():
+            mask = getattr(data, f'{name}_mask', None)
+            if mask is not None:
+                split[mask.cpu().numpy()] = code
+        np.save(root / 'split.npy', split[perm])
+
+        # Edges in new ids, grouped by the target's cluster
+        src, dst = new_id[edge_index[0]], new_id[edge_index[1]]
+        target_part = parts[edge_index[1]]
+        order = np.argsort(target_part, kind='stable')
+        np.save(root / 'edges.npy', np.stack([src[order], dst[order]]))
+        np.save(root / 'edge_ptr.npy', np.searchsorted(target_part[order], np.arange(num_parts + 1)))
+        edge_attr = getattr(data, 'edge_attr', None)
+        if edge_attr is None:
+            attrs = np.zeros(edge_index.shape[1], dtype=np.int8)
+        else:
+            attrs = edge_attr.view(-1).cpu().numpy().astype(np.int8)
+        np.save(root / 'edge_attr.npy', attrs[order])
+
+        sizes = np.diff(part_ptr)
+        meta = {
+            'num_parts': int(num_parts),
+            'num_nodes': int(num_nodes),
+            'num_edges': int(edge_index.shape[1]),
+            'dim': int(data.x.size(1)),
+            'method': method,
+            'edge_cut': round(edge_cut(edge_index, parts), 4),
+            'max_part_nodes': int(sizes.max(initial=0)),
+            'min_part_nodes': int(sizes.min()) if sizes.size else 0,
+            'graph_stamp': stamp,
+            'partition_seconds': round(partition_s, 3),
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        logger.info(
+            f"Partitioned {num_nodes} nodes into {num_parts} clusters ({method}): "
+            f"edge cut {meta['edge_cut']:.3f}, sizes {meta['min_part_nodes']}-{meta['max_part_nodes']}, "
+            f"{meta['seconds']:.1f}s"
+        )
+        return cls(root)
+
+    @classmethod
+    def load_or_build(
+        cls,
+        graph_path: Union[str, Path],
+        num_parts: int = 64,
+        method: str = 'auto',
+        force: bool = False
+    ) -> 'GraphPartition':
+        """
+        Reuse <graph>.parts<P>/ if it was built from the same graph file with the same
+        method ('auto' resolved first), otherwise (re)build it.
+
+        The graph is only loaded (memory-mapped) when the cache is missing or stale.
+        """
+        method = resolve_method(method)
+        root = partition_cache_dir(graph_path, num_parts)
+        st = os.stat(graph_path)
+        stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        if not force and (root / 'meta.json').exists():
+            cached = cls(root)
+            if cached.meta.get('graph_stamp') == stamp and cached.meta.get('method') == method:
+                logger.info(f"Using cached partition: {root} ({method})")
+                return cached
+            if cached.meta.get('method') != method:
+                logger.info(f"Cached partition was built with {cached.meta.get('method')}, rebuilding with {method}")
+
+        torch.serialization.add_safe_globals([Data])
+        data = torch.load(graph_path, map_location='cpu', weights_only=False, mmap=True)
+        logger.info(f"Partitioning graph ({data.num_nodes} nodes) -> {root}")
+        return cls.build(data, root, num_parts=num_parts, method=method, stamp=stamp)
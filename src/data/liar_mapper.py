@@ -1,12 +1,16 @@
 import pandas as pd
-import json
 import os
+import sys
 import time
 import random
 import logging
 import zipfile
 from datetime import datetime
 
+# Thêm project root vào sys.path để import src.utils khi chạy trực tiếp file này
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.utils.dataset_io import write_records
+
 # IMPORT THƯ VIỆN KAGGLE API
 from kaggle.api.kaggle_api_extended import KaggleApi
 
@@ -179,16 +183,14 @@ def map_liar_to_core_schema(
     os.makedirs(output_dir, exist_ok=True)
 
     jsonl_path = os.path.join(output_dir, f"liar_mapped_{len(mapped_records)}.jsonl")
-    with open(jsonl_path, "w", encoding="utf-8") as f:
-        for r in mapped_records:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    write_records(mapped_records, jsonl_path, fmt="jsonl")
 
     logging.info(f"Tạo JSONL thành công: {jsonl_path}")
 
-    # Optional: Lưu Parquet cho Big Data
+    # Optional: Lưu Parquet cho Big Data (user_credit_history lưu dạng struct lồng nhau)
     if save_parquet:
         parquet_path = jsonl_path.replace(".jsonl", ".parquet")
-        pd.DataFrame(mapped_records).to_parquet(parquet_path, index=False)
+        write_records(mapped_records, parquet_path, fmt="parquet")
         logging.info(f"Đã tạo file Parquet: {parquet_path}")
 
     return mapped_records
@@ -28,7 +28,7 @@ def build_graph_from_jsonl(
     Build interaction graph from merged JSONL file.
     
     Args:
-        input_path: Path to merged JSONL
+        input_path: Path to merged JSONL or Parquet dataset
         output_path: Path to output .pt file
         text_model: HuggingFace text model name
         image_model: HuggingFace CLIP model name
@@ -36,7 +36,7 @@ def build_graph_from_jsonl(
         k_image: Top-K image neighbors
         mode: 'prototype' or 'scale'
     """
-    from src.features.embedding_extractor import TextEmbeddingExtractor, ImageEmbeddingExtractor
+    from src.features.embedding_extractor import create_extractors
     from src.features.graph_builder import InteractionGraphBuilder
     
     print("=" * 60)
@@ -53,8 +53,8 @@ def build_graph_from_jsonl(
     
     # Create extractors
     print("🚀 Initializing embedding extractors...")
-    text_ext = TextEmbeddingExtractor(model_name=text_model)
-    image_ext = ImageEmbeddingExtractor(model_name=image_model)
+    # Snapshot / running extractor server when available (see src/features/model_snapshot.py)
+    text_ext, image_ext = create_extractors(text_model=text_model, image_model=image_model)
     
     # Create builder
     builder = InteractionGraphBuilder(
@@ -96,7 +96,7 @@ def main():
     parser.add_argument(
         '--input',
         default='data/04_graph/merged_data.jsonl',
-        help='Path to merged JSONL file'
+        help='Path to merged JSONL file (or split-partitioned Parquet dataset)'
     )
     parser.add_argument(
         '--output',
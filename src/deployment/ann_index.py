@@ -0,0 +1,95 @@
+"""
+Cosine Top-K index over the graph's node embeddings.
+
+Uses FAISS when installed (exact IndexFlatIP for small graphs, HNSW above
+`hnsw_threshold` nodes); otherwise falls back to an exact PyTorch matmul +
+topk over the database in chunks, so memory stays at batch x chunk_size.
+
+Usage:
+    index = NeighbourIndex(F.normalize(text_embeddings, dim=1))
+    scores, idx = index.search(F.normalize(queries, dim=1), k=20)
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+import torch
+
+try:
+    import faiss
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+logger = logging.getLogger(__name__)
+
+
+class NeighbourIndex:
+    """
+    Inner-product Top-K over L2-normalised vectors (= cosine similarity).
+    """
+
+    def __init__(
+        self,
+        embeddings: torch.Tensor,
+        hnsw_threshold: int = 100000,
+        hnsw_m: int = 32,
+        ef_search: int = 128,
+        chunk_size: int = 262144,
+        use_faiss: bool = True
+    ):
+        """
+        Args:
+            embeddings: [N, D] L2-normalised database vectors
+            hnsw_threshold: Above this many nodes FAISS uses HNSW instead of a flat index
+            hnsw_m / ef_search: HNSW graph degree / search breadth
+            chunk_size: Database rows per matmul in the PyTorch fallback
+            use_faiss: Set False to force the exact PyTorch path
+        """
+        self.embeddings = embeddings.float().contiguous()
+        self.num_items = embeddings.size(0)
+        self.chunk_size = chunk_size
+        self.index = None
+
+        if use_faiss and HAS_FAISS and self.num_items:
+            dim = embeddings.size(1)
+            if self.num_items > hnsw_threshold:
+                self.index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+                self.index.hnsw.efSearch = ef_search
+            else:
+                self.index = faiss.IndexFlatIP(dim)
+            self.index.add(np.ascontiguousarray(self.embeddings.numpy(), dtype=np.float32))
+        logger.info(f"NeighbourIndex: {self.num_items} items, "
+                    f"{type(self.index).__name__ if self.index is not None else 'torch exact'}")
+
+    def search(self, queries: torch.Tensor, k: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Args:
+            queries: [B, D] L2-normalised query vectors
+            k: Neighbours per query (clipped to the index size)
+
+        Returns:
+            (scores [B, k], indices [B, k]), best first
+        """
+        k = min(k, self.num_items)
+        queries = queries.float().contiguous()
+        if k <= 0:
+            return queries.new_zeros((queries.size(0), 0)), torch.zeros((queries.size(0), 0), dtype=torch.long)
+
+        if self.index is not None:
+            scores, idx = self.index.search(np.ascontiguousarray(queries.numpy(), dtype=np.float32), k)
+            return torch.from_numpy(scores), torch.from_numpy(idx).long()
+
+        best_scores, best_idx = None, None
+        for start in range(0, self.num_items, self.chunk_size):
+            block = self.embeddings[start:start + self.chunk_size]
+            scores, idx = (queries @ block.t()).topk(min(k, block.size(0)), dim=1)
+            idx += start
+            if best_scores is not None:
+                scores = torch.cat([best_scores, scores], dim=1)
+                idx = torch.cat([best_idx, idx], dim=1)
+                scores, order = scores.topk(k, dim=1)
+                idx = idx.gather(1, order)
+            best_scores, best_idx = scores, idx
+        return best_scores, best_idx
@@ -1,2 +1,184 @@
-from fastapi import FastAPI
-app=FastAPI()
\ No newline at end of file
+"""
+Online scoring service (CPU only).
+
+POST /predict        one post   -> label, binary verdict, class probabilities
+POST /predict/batch  many posts -> list of results
+GET  /health         readiness
+GET  /stats          latency percentiles, batch sizes, queue depth
+
+Requests are grouped by src/deployment/micro_batcher.py into micro-batches
+(size or deadline); each batch goes through one XLM-R + one CLIP forward and
+one GNN forward over the posts' ego-networks (src/deployment/predictor.py).
+
+Configuration (CLI flags or environment variables):
+    FAKENEWS_GRAPH, FAKENEWS_CHECKPOINT, FAKENEWS_GNN_TYPE, FAKENEWS_HIDDEN_DIM,
+    FAKENEWS_MAX_BATCH, FAKENEWS_MAX_WAIT_MS, FAKENEWS_P99_MS, FAKENEWS_WORKERS,
+    FAKENEWS_EXTRACTORS (1 = load XLM-R/CLIP, 0 = requests must carry 'embedding')
+
+Usage:
+    python src/deployment/api.py --port 8000 --workers 2 --p99-target-ms 300
+    curl -X POST localhost:8000/predict -H 'Content-Type: application/json' -d '{"clean_text": "..."}'
+"""
+
+import os
+import sys
+import argparse
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# CPU only: hide GPUs before torch is imported
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '')
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import torch
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from src.deployment.micro_batcher import MicroBatcher
+from src.deployment.predictor import DEFAULT_CHECKPOINT, DEFAULT_GRAPH, Predictor
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def load_config() -> Dict:
+    env = os.environ.get
+    return {
+        'graph': env('FAKENEWS_GRAPH', DEFAULT_GRAPH),
+        'checkpoint': env('FAKENEWS_CHECKPOINT', DEFAULT_CHECKPOINT),
+        'gnn_type': env('FAKENEWS_GNN_TYPE', 'gat'),
+        'hidden_dim': int(env('FAKENEWS_HIDDEN_DIM', 256)),
+        'max_batch_size': int(env('FAKENEWS_MAX_BATCH', 32)),
+        'max_wait_ms': float(env('FAKENEWS_MAX_WAIT_MS', 10)),
+        'p99_target_ms': float(env('FAKENEWS_P99_MS', 300)),
+        'workers': int(env('FAKENEWS_WORKERS', 1)),
+        'extractors': env('FAKENEWS_EXTRACTORS', '1') == '1',
+    }
+
+
+class PostIn(BaseModel):
+    id: Optional[str] = None
+    clean_text: Optional[str] = None
+    image_path: Optional[str] = None
+    embedding: Optional[List[float]] = None  # precomputed [text || image], skips the extractors
+
+
+class BatchIn(BaseModel):
+    posts: List[PostIn]
+
+
+def build_predictor(config: Dict) -> Predictor:
+    # Chia đều CPU cho các worker, tránh oversubscription
+    threads = max(1, (os.cpu_count() or 1) // config['workers'])
+    torch.set_num_threads(threads)
+
+    text_ext = image_ext = None
+    if config['extractors']:
+        from src.features.embedding_extractor import create_extractors
+        text_ext, image_ext = create_extractors(device='cpu')
+    return Predictor(
+        graph_path=config['graph'],
+        checkpoint_path=config['checkpoint'],
+        gnn_type=config['gnn_type'],
+        hidden_dim=config['hidden_dim'],
+        text_extractor=text_ext,
+        image_extractor=image_ext,
+        device='cpu'
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    config = load_config()
+    predictor = build_predictor(config)
+    batcher = MicroBatcher(
+        predictor.predict_batch,
+        max_batch_size=config['max_batch_size'],
+        max_wait_ms=config['max_wait_ms'],
+        p99_target_ms=config['p99_target_ms'],
+        workers=config['workers']
+    )
+    await batcher.start()
+    app.state.predictor = predictor
+    app.state.batcher = batcher
+    logger.info(f"Scoring service ready: {config}")
+    yield
+    await batcher.stop()
+
+
+app = FastAPI(title='Fake News Scoring', lifespan=lifespan)
+
+
+def _item(post: PostIn) -> Dict:
+    return post.model_dump() if hasattr(post, 'model_dump') else post.dict()
+
+
+@app.post('/predict')
+async def predict(post: PostIn):
+    try:
+        return await app.state.batcher.submit(_item(post))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.post('/predict/batch')
+async def predict_batch(batch: BatchIn):
+    try:
+        return await app.state.batcher.submit_many([_item(p) for p in batch.posts])
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.get('/health')
+async def health():
+    return {'status': 'ok', 'nodes': app.state.predictor.num_nodes}
+
+
+@app.get('/stats')
+async def stats():
+    return app.state.batcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake news online scoring service (CPU)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--graph', default=None, help='Interaction graph .pt')
+    parser.add_argument('--checkpoint', default=None, help='GNN checkpoint')
+    parser.add_argument('--gnn-type', default=None, choices=['gat', 'sage', 'gcn', 'rgcn'])
+    parser.add_argument('--hidden-dim', type=int, default=None)
+    parser.add_argument('--max-batch-size', type=int, default=None, help='Max posts per micro-batch')
+    parser.add_argument('--max-wait-ms', type=float, default=None, help='Max wait of the first post in a batch')
+    parser.add_argument('--p99-target-ms', type=float, default=None, help='p99 latency target (adapts batching)')
+    parser.add_argument('--workers', type=int, default=None, help='Concurrent batches (CPU threads split between them)')
+    parser.add_argument('--no-extractors', action='store_true', help="Don't load XLM-R/CLIP; posts must carry 'embedding'")
+    args = parser.parse_args()
+
+    overrides = {
+        'FAKENEWS_GRAPH': args.graph,
+        'FAKENEWS_CHECKPOINT': args.checkpoint,
+        'FAKENEWS_GNN_TYPE': args.gnn_type,
+        'FAKENEWS_HIDDEN_DIM': args.hidden_dim,
+        'FAKENEWS_MAX_BATCH': args.max_batch_size,
+        'FAKENEWS_MAX_WAIT_MS': args.max_wait_ms,
+        'FAKENEWS_P99_MS': args.p99_target_ms,
+        'FAKENEWS_WORKERS': args.workers,
+        'FAKENEWS_EXTRACTORS': '0' if args.no_extractors else None,
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[key] = str(value)
+
+    import uvicorn
+    # One process: the batcher owns concurrency (workers = concurrent batches)
+    uvicorn.run(app, host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Offline bulk scoring of crawled posts (nightly job).
+
+Streams posts (default: label == 'Unlabeled', as written by RedditCrawler)
+from JSONL or Parquet in chunks and scores them with the inductive Predictor:
+
+    read (main) -> embed (XLM-R + CLIP, worker processes) -> GNN (main) -> write (main)
+
+Stages are pipelined: while the main process runs the GNN on chunk i and
+writes it, the workers are already embedding chunks i+1 .. i+inflight.
+Results are appended chunk by chunk, in input order, and a progress file
+(`<output>.progress.json`) is committed after every chunk, so an interrupted
+run resumes where it stopped (output written after the last commit is
+discarded first). Rows/sec of every stage are logged periodically and at the end.
+
+Output:
+    .jsonl           one line per post: id, label, label_idx, binary, prob_fake, probs
+    .parquet / dir   one part-NNNNNN.parquet per chunk
+
+Usage:
+    python src/deployment/bulk_score.py --input data/reddit_realtime_data.jsonl \\
+        --output data/05_predictions/reddit_scores.jsonl --workers 4 --chunk_size 512
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.deployment.predictor import DEFAULT_CHECKPOINT, DEFAULT_GRAPH, Predictor, format_results, post_image, post_text
+from src.utils.dataset_io import is_parquet_path, read_records
+from src.utils.jsonl_index import JsonlOffsetIndex
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+STAGES = ('read', 'embed', 'gnn', 'write')
+
+
+# ---------------------------------------------------------------------- #
+# Input
+# ---------------------------------------------------------------------- #
+def _slim(record: Dict) -> Dict:
+    """Only what the embedding stage needs crosses the process boundary."""
+    return {
+        'id': record.get('id'),
+        'text': post_text(record),
+        'image': post_image(record),
+        'embedding': record.get('embedding'),
+    }
+
+
+def iter_chunks(
+    path: str,
+    start: int,
+    chunk_size: int,
+    labels: Optional[List[str]]
+) -> Iterator[Tuple[int, List[Dict]]]:
+    """
+    Yields (input position after the chunk, posts) from `start` on.
+
+    JSONL positions are line numbers (resume seeks through the offset index);
+    Parquet positions count the rows that pass the label filter.
+    """
+    allowed = set(labels) if labels else None
+    chunk = []
+    if is_parquet_path(path):
+        records = read_records(path, filters={'label': labels} if labels else None)
+        position = start
+        for record in islice(records, start, None):
+            position += 1
+            chunk.append(_slim(record))
+            if len(chunk) == chunk_size:
+                yield position, chunk
+                chunk = []
+    else:
+        index = JsonlOffsetIndex(path)
+        position = start
+        for line in index.iter_lines(start):
+            position += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Invalid JSON at {path}:{position}, skipped")
+                continue
+            if allowed is not None and record.get('label') not in allowed:
+                continue
+            chunk.append(_slim(record))
+            if len(chunk) == chunk_size:
+                yield position, chunk
+                chunk = []
+    if chunk:
+        yield position, chunk
+
+
+# ---------------------------------------------------------------------- #
+# Embedding workers
+# ---------------------------------------------------------------------- #
+_text_extractor = None
+_image_extractor = None
+_dims = (768, 512)
+
+
+def init_worker(load_extractors: bool, threads: int, dims: Tuple[int, int]):
+    """Load XLM-R / CLIP once per worker process."""
+    global _text_extractor, _image_extractor, _dims
+    torch.set_num_threads(threads)
+    _dims = dims
+    if load_extractors:
+        from src.features.embedding_extractor import create_extractors
+        _text_extractor, _image_extractor = create_extractors(device='cpu')
+
+
+def embed_chunk(posts: List[Dict]) -> Tuple[np.ndarray, float]:
+    """[len(posts), text_dim + image_dim] float32 embeddings and the compute time."""
+    start = time.perf_counter()
+    text_dim, image_dim = _dims
+    x = np.zeros((len(posts), text_dim + image_dim), dtype=np.float32)
+    todo = []
+    for i, post in enumerate(posts):
+        if post.get('embedding') is not None:
+            x[i] = np.asarray(post['embedding'], dtype=np.float32)
+        else:
+            todo.append(i)
+    if todo and _text_extractor is not None:
+        x[todo, :text_dim] = _text_extractor.batch_extract([posts[i]['text'] for i in todo]).float().numpy()
+    if todo and _image_extractor is not None:
+        x[todo, text_dim:] = _image_extractor.batch_extract([posts[i]['image'] for i in todo]).float().numpy()
+    return x, time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------- #
+# Output + progress
+# ---------------------------------------------------------------------- #
+class ScoreWriter:
+    """
+    Append-only writer with a progress file committed after every chunk.
+    """
+
+    def __init__(self, output: str, restart: bool = False):
+        self.output = Path(output)
+        self.parquet = is_parquet_path(output)
+        self.progress_path = Path(str(self.output).rstrip('/') + '.progress.json')
+        self.state = {'position': 0, 'rows': 0, 'chunks': 0, 'bytes': 0}
+
+        if restart:
+            self.progress_path.unlink(missing_ok=True)
+        if self.progress_path.exists():
+            with open(self.progress_path, 'r', encoding='utf-8') as f:
+                self.state.update(json.load(f))
+        elif not self.parquet and self.output.exists():
+            self.output.unlink()
+        self._discard_uncommitted()
+
+    def _discard_uncommitted(self):
+        if self.parquet:
+            self.output.mkdir(parents=True, exist_ok=True)
+            for part in self.output.glob('part-*.parquet'):
+                if int(part.stem.split('-')[1]) >= self.state['chunks']:
+                    part.unlink()
+        else:
+            self.output.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.output, 'ab') as f:
+                f.truncate(self.state['bytes'])
+
+    def write(self, results: List[Dict], position: int):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.Table.from_pylist(results), str(self.output / f"part-{self.state['chunks']:06d}.parquet"))
+        else:
+            with open(self.output, 'a', encoding='utf-8') as f:
+                for result in results:
+                    f.write(json.dumps(result, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.state['bytes'] = self.output.stat().st_size
+
+        self.state['position'] = position
+        self.state['rows'] += len(results)
+        self.state['chunks'] += 1
+        # Commit point: atomic replace of the progress file
+        tmp = self.progress_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.progress_path)
+
+
+# ---------------------------------------------------------------------- #
+# Driver
+# ---------------------------------------------------------------------- #
+def stage_report(rows: Dict[str, int], seconds: Dict[str, float], wall: float) -> str:
+    parts = [f"{s}: {rows[s] / seconds[s]:,.0f} rows/s" if seconds[s] > 0 else f"{s}: -" for s in STAGES]
+    total = rows['write']
+    return f"{total:,} rows in {wall:.1f}s ({total / max(wall, 1e-9):,.0f} rows/s overall) | " + " | ".join(parts)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Offline bulk scoring of crawled posts')
+    parser.add_argument('--input', default='data/reddit_realtime_data.jsonl', help='JSONL or Parquet input')
+    parser.add_argument('--output', default='data/05_predictions/reddit_scores.jsonl', help='.jsonl or .parquet output')
+    parser.add_argument('--graph', default=DEFAULT_GRAPH, help='Interaction graph .pt')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='GNN checkpoint')
+    parser.add_argument('--gnn_type', choices=['gat', 'sage', 'gcn', 'rgcn'], default='gat')
+    parser.add_argument('--hidden_dim', type=int, default=256)
+    parser.add_argument('--text_dim', type=int, default=768, help='Width of the text part of the node features')
+    parser.add_argument('--labels', nargs='*', default=['Unlabeled'], help='Labels to score (empty = all posts)')
+    parser.add_argument('--chunk_size', type=int, default=512, help='Posts per chunk')
+    parser.add_argument('--workers', type=int, default=2, help='Embedding processes (0 = in the main process)')
+    parser.add_argument('--inflight', type=int, default=0, help='Chunks queued ahead of the GNN (default: 2 x workers)')
+    parser.add_argument('--no_extractors', action='store_true', help="Don't load XLM-R/CLIP (posts must carry 'embedding')")
+    parser.add_argument('--restart', action='store_true', help='Ignore previous progress and rewrite the output')
+    parser.add_argument('--report_every', type=int, default=20, help='Log stage throughput every N chunks')
+    return parser
+
+
+def run(argv: Optional[List[str]] = None) -> Dict:
+    args = build_parser().parse_args(argv)
+    cpus = os.cpu_count() or 1
+
+    writer = ScoreWriter(args.output, restart=args.restart)
+    if writer.state['position']:
+        logger.info(f"▶️ Resuming at input position {writer.state['position']} ({writer.state['rows']} rows already scored)")
+
+    torch.set_num_threads(max(1, cpus - args.workers) if args.workers else cpus)
+    predictor = Predictor(graph_path=args.graph, checkpoint_path=args.checkpoint, gnn_type=args.gnn_type,
+                          hidden_dim=args.hidden_dim, text_dim=args.text_dim)
+    dims = (args.text_dim, predictor.x.size(1) - args.text_dim)
+    init_args = (not args.no_extractors, max(1, cpus // max(args.workers, 1)), dims)
+
+    rows = {s: 0 for s in STAGES}
+    seconds = {s: 0.0 for s in STAGES}
+    wall_start = time.perf_counter()
+    chunks = iter_chunks(args.input, writer.state['position'], args.chunk_size, args.labels or None)
+
+    def next_chunk():
+        start = time.perf_counter()
+        item = next(chunks, None)
+        seconds['read'] += time.perf_counter() - start
+        if item is not None:
+            rows['read'] += len(item[1])
+        return item
+
+    def score(posts, x, embed_time, position):
+        rows['embed'] += len(posts)
+        seconds['embed'] += embed_time
+        start = time.perf_counter()
+        probs = predictor.predict_embeddings(torch.from_numpy(x))
+        results = format_results(posts, probs)
+        seconds['gnn'] += time.perf_counter() - start
+        rows['gnn'] += len(posts)
+
+        start = time.perf_counter()
+        writer.write(results, position)
+        seconds['write'] += time.perf_counter() - start
+        rows['write'] += len(results)
+        if writer.state['chunks'] % args.report_every == 0:
+            logger.info(stage_report(rows, seconds, time.perf_counter() - wall_start))
+
+    if args.workers == 0:
+        init_worker(*init_args)
+        while (item := next_chunk()) is not None:
+            position, posts = item
+            score(posts, *embed_chunk(posts), position)
+    else:
+        inflight = args.inflight or 2 * args.workers
+        # spawn: torch thread pools of the parent are not fork-safe
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=mp.get_context('spawn'),
+                                 initializer=init_worker, initargs=init_args) as pool:
+            pending = deque()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < inflight:
+                    item = next_chunk()
+                    if item is None:
+                        exhausted = True
+                        break
+                    position, posts = item
+                    pending.append((position, posts, pool.submit(embed_chunk, posts)))
+                if not pending:
+                    break
+                # Results are consumed in input order so the progress position stays monotonic
+                position, posts, future = pending.popleft()
+                score(posts, *future.result(), position)
+
+    wall = time.perf_counter() - wall_start
+    report = stage_report(rows, seconds, wall)
+    print("\n" + "=" * 30)
+    print("BULK SCORING")
+    print("=" * 30)
+    print(report.replace(' | ', '\n'))
+    print(f"Output: {args.output} ({writer.state['rows']:,} rows total)")
+    print("=" * 30)
+    return {'rows': rows, 'seconds': seconds, 'wall': wall, 'state': dict(writer.state)}
+
+
+if __name__ == "__main__":
+    run()
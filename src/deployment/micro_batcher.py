@@ -0,0 +1,187 @@
+"""
+Dynamic micro-batching for the scoring service.
+
+Requests are queued and grouped into one batch when either `max_batch_size`
+items are waiting or the oldest item has waited `max_wait_ms`. Up to `workers`
+batches run concurrently in a thread pool (torch releases the GIL inside its
+kernels), each through a single batched predict call.
+
+Latency control: the batcher keeps the last `window` request latencies and,
+after every batch, adapts the effective wait / batch size so the observed p99
+stays under `p99_target_ms` (multiplicative decrease when above target,
+additive increase when comfortably below, bounded by the configured maximums).
+The batch size is only cut when a single batch's compute time is itself a large
+share of the target; queueing delay under a burst is handled by the wait alone,
+since smaller batches would lower throughput exactly when it is needed.
+
+Usage:
+    batcher = MicroBatcher(predictor.predict_batch, max_batch_size=32, max_wait_ms=10, p99_target_ms=250, workers=2)
+    await batcher.start()
+    result = await batcher.submit(item)
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Size-or-deadline request batching with a p99 latency target.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 10.0,
+        p99_target_ms: float = 250.0,
+        workers: int = 1,
+        max_queue: int = 10000,
+        window: int = 2000
+    ):
+        """
+        Args:
+            predict_fn: Batched function, len(output) == len(input)
+            max_batch_size: Upper bound on items per batch
+            max_wait_ms: Upper bound on how long the first item of a batch waits
+            p99_target_ms: End-to-end (queue + compute) p99 latency target
+            workers: Batches computed concurrently
+            max_queue: Pending items before submit() rejects (back-pressure)
+            window: Latencies kept for percentile statistics
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.p99_target_ms = p99_target_ms
+        self.workers = workers
+        self.max_queue = max_queue
+
+        # Effective limits, adapted to the latency target
+        self.batch_limit = max_batch_size
+        self.wait_ms = max_wait_ms
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight = set()
+        self._latencies = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self.total_items = 0
+        self.total_batches = 0
+        self.rejected = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scorer')
+        self._task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result (raises RuntimeError when the queue is full)."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise RuntimeError('Scoring queue is full')
+        return await future
+
+    async def submit_many(self, items: List[Any]) -> List[Any]:
+        return await asyncio.gather(*(self.submit(item) for item in items))
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            deadline = first[2] + self.wait_ms / 1000.0
+            while len(batch) < self.batch_limit:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Drain whatever is already waiting (no extra wait)
+            while len(batch) < self.batch_limit and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            await self._slots.acquire()
+            started = time.perf_counter()
+            task = loop.run_in_executor(self._executor, self.predict_fn, [b[0] for b in batch])
+            finisher = asyncio.ensure_future(self._finish(task, batch, started))
+            self._inflight.add(finisher)
+            finisher.add_done_callback(self._inflight.discard)
+
+    async def _finish(self, task, batch, started):
+        try:
+            results = await task
+            done = time.perf_counter()
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            done = time.perf_counter()
+            logger.exception("Batch prediction failed")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+        for _, _, enqueued in batch:
+            self._latencies.append((done - enqueued) * 1000.0)
+        self._batch_sizes.append(len(batch))
+        self.total_items += len(batch)
+        self.total_batches += 1
+        self._adapt((done - started) * 1000.0)
+
+    def _adapt(self, compute_ms: float):
+        """AIMD on the effective wait and batch size to keep p99 under target."""
+        if len(self._latencies) < 20:
+            return
+        p99 = float(np.percentile(self._latencies, 99))
+        if p99 > self.p99_target_ms:
+            self.wait_ms = max(0.0, self.wait_ms * 0.5)
+            if compute_ms > 0.5 * self.p99_target_ms:
+                self.batch_limit = max(1, self.batch_limit // 2)
+        elif p99 < 0.7 * self.p99_target_ms:
+            self.wait_ms = min(self.max_wait_ms, self.wait_ms + 0.5)
+            self.batch_limit = min(self.max_batch_size, self.batch_limit + 1)
+
+    def stats(self) -> Dict[str, float]:
+        lat = np.asarray(self._latencies) if self._latencies else np.zeros(1)
+        return {
+            'p50_ms': round(float(np.percentile(lat, 50)), 2),
+            'p95_ms': round(float(np.percentile(lat, 95)), 2),
+            'p99_ms': round(float(np.percentile(lat, 99)), 2),
+            'p99_target_ms': self.p99_target_ms,
+            'mean_batch_size': round(float(np.mean(self._batch_sizes)), 2) if self._batch_sizes else 0.0,
+            'batch_limit': self.batch_limit,
+            'wait_ms': round(self.wait_ms, 2),
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'workers': self.workers,
+            'total_items': self.total_items,
+            'total_batches': self.total_batches,
+            'rejected': self.rejected,
+        }
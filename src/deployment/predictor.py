@@ -1 +1,416 @@
-class Predictor: pass
\ No newline at end of file
+"""
+Inductive predictor: score new posts against the trained interaction graph.
+
+A new post is embedded (XLM-R text || CLIP image), attached to the existing
+graph exactly the way InteractionGraphBuilder would have attached it:
+- outgoing edges to its Top-K text / image neighbours (relation 0 / 1),
+- incoming edges from existing posts that would now have it in their Top-K
+  (its similarity beats their current K-th neighbour; their existing edges
+  are kept as they are),
+and the GNN runs only on what the post changes: hidden states of all existing
+nodes are computed once at start-up and cached per layer, and for each layer
+only the nodes that both feed the post's final state and are reached by the
+post (its L-hop ego-network) are recomputed. Per-request cost is O(K^L), not
+O(N). Neighbours come from an ANN index (FAISS when installed, see
+src/deployment/ann_index.py).
+
+Posts of one batch are attached independently, so a prediction never depends
+on what else was in the batch.
+
+Usage:
+    predictor = Predictor('data/04_graph/fakeddit_graph.pt', 'models/checkpoints/best_gnn_model.pt')
+    result = predictor.predict({'clean_text': '...', 'image_path': 'data/images/x.jpg'})
+    results = predictor.predict_batch(items)
+"""
+
+import sys
+import logging
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch_geometric.data import Data
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.deployment.ann_index import NeighbourIndex
+from src.features.graph_builder import LABEL_TO_IDX
+from src.models.cascade_gnn import MultiModalFakeNewsGNN
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRAPH = 'data/04_graph/fakeddit_graph.pt'
+DEFAULT_CHECKPOINT = 'models/checkpoints/best_gnn_model.pt'
+IDX_TO_LABEL = {idx: label for label, idx in LABEL_TO_IDX.items()}
+# classes 0,1,2 -> True, classes 3,4,5 -> Fake
+BINARY_FAKE_FROM = 3
+
+
+def post_text(item: Dict) -> str:
+    return item.get('clean_text') or item.get('raw_text') or item.get('text') or ''
+
+
+def post_image(item: Dict) -> str:
+    return item.get('image_path') or (item.get('image_info') or {}).get('processed_path') or ''
+
+
+def format_results(items: List[Dict], probs: torch.Tensor) -> List[Dict]:
+    """
+    Per item: id, label, label_idx, binary ('True'/'Fake'), prob_fake, probs {label: p}
+    """
+    results = []
+    for item, p in zip(items, probs):
+        idx = int(p.argmax())
+        results.append({
+            'id': item.get('id'),
+            'label': IDX_TO_LABEL[idx],
+            'label_idx': idx,
+            'binary': 'Fake' if idx >= BINARY_FAKE_FROM else 'True',
+            'prob_fake': round(float(p[BINARY_FAKE_FROM:].sum()), 6),
+            'probs': {IDX_TO_LABEL[i]: round(float(v), 6) for i, v in enumerate(p.tolist())},
+        })
+    return results
+
+
+class Predictor:
+    """
+    Batch inductive inference for unseen posts (CPU by default).
+    """
+
+    def __init__(
+        self,
+        graph_path: str = DEFAULT_GRAPH,
+        checkpoint_path: str = DEFAULT_CHECKPOINT,
+        gnn_type: str = 'gat',
+        hidden_dim: int = 256,
+        num_layers: int = 2,
+        k_text: int = 5,
+        k_image: int = 5,
+        text_extractor=None,
+        image_extractor=None,
+        text_dim: int = 768,
+        candidate_factor: int = 4,
+        device: str = 'cpu',
+        use_faiss: bool = True
+    ):
+        """
+        Args:
+            graph_path: Interaction graph the model was trained on (.pt)
+            checkpoint_path: MultiModalFakeNewsGNN state_dict
+            gnn_type / hidden_dim / num_layers: Must match the checkpoint
+            k_text / k_image: Top-K used when the graph was built
+            text_extractor / image_extractor: Embedding extractors (None = zeros for that modality)
+            text_dim: Width of the text part of x (XLM-R: 768)
+            candidate_factor: Candidates checked for incoming edges = K * candidate_factor
+            device: Torch device (the service runs on 'cpu')
+            use_faiss: Use FAISS for the neighbour search when installed
+        """
+        self.device = torch.device(device)
+        self.k = {0: k_text, 1: k_image}
+        self.text_dim = text_dim
+        self.candidate_factor = candidate_factor
+        self.text_extractor = text_extractor
+        self.image_extractor = image_extractor
+
+        torch.serialization.add_safe_globals([Data])
+        graph = torch.load(graph_path, map_location='cpu', weights_only=False)
+        self.x = graph.x.float()
+        self.num_nodes = graph.num_nodes
+        edge_index = graph.edge_index
+        edge_type = graph.edge_attr.view(-1) if graph.edge_attr is not None else torch.zeros_like(edge_index[0])
+
+        self.model = MultiModalFakeNewsGNN(
+            input_dim=self.x.size(1),
+            hidden_dim=hidden_dim,
+            num_classes=len(LABEL_TO_IDX),
+            num_layers=num_layers,
+            gnn_type=gnn_type
+        )
+        self.model.load_state_dict(torch.load(checkpoint_path, map_location='cpu', weights_only=False))
+        self.model.to(self.device).eval()
+
+        # Normalised embeddings per relation (0 = text, 1 = image) for cosine Top-K
+        self.embeddings = {
+            0: F.normalize(self.x[:, :text_dim], p=2, dim=1),
+            1: F.normalize(self.x[:, text_dim:], p=2, dim=1),
+        }
+        self.index = {rel: NeighbourIndex(emb, use_faiss=use_faiss) for rel, emb in self.embeddings.items()}
+
+        # Incoming CSR: sources of every node, grouped by target
+        order = torch.argsort(edge_index[1], stable=True)
+        self.in_src = edge_index[0][order].numpy()
+        self.in_type = edge_type[order].numpy()
+        counts = np.bincount(edge_index[1].numpy(), minlength=self.num_nodes)
+        self.in_ptr = np.concatenate([[0], np.cumsum(counts)])
+        # Outgoing CSR (targets only): who a node's state reaches
+        order = torch.argsort(edge_index[0], stable=True)
+        self.out_dst = edge_index[1][order].numpy()
+        counts = np.bincount(edge_index[0].numpy(), minlength=self.num_nodes)
+        self.out_ptr = np.concatenate([[0], np.cumsum(counts)])
+
+        # Similarity of every node's K-th neighbour per relation (from its existing out-edges)
+        self.kth_sim = torch.full((self.num_nodes, 2), float('inf'))
+        for rel in (0, 1):
+            mask = edge_type == rel
+            src, dst = edge_index[0][mask], edge_index[1][mask]
+            if src.numel():
+                sims = (self.embeddings[rel][src] * self.embeddings[rel][dst]).sum(dim=1)
+                self.kth_sim[:, rel] = torch.full((self.num_nodes,), float('inf')).scatter_reduce(
+                    0, src, sims, reduce='amin', include_self=True
+                )
+
+        self._build_cache(edge_index, edge_type)
+        self.last_touched = 0
+        logger.info(f"Predictor ready: {self.num_nodes} nodes, {edge_index.size(1)} edges, "
+                    f"{len(self.hidden)} cached layer(s)")
+
+    # ------------------------------------------------------------------ #
+    # Embedding
+    # ------------------------------------------------------------------ #
+    def embed(self, items: List[Dict]) -> torch.Tensor:
+        """
+        One text forward + one image forward for the whole batch.
+
+        Items may carry a precomputed 'embedding' ([text || image]) to skip the extractors.
+        """
+        x = torch.zeros(len(items), self.x.size(1))
+        todo = [i for i, item in enumerate(items) if item.get('embedding') is None]
+        for i, item in enumerate(items):
+            if item.get('embedding') is not None:
+                x[i] = torch.as_tensor(item['embedding'], dtype=torch.float)
+        if not todo:
+            return x
+        if self.text_extractor is not None:
+            x[todo, :self.text_dim] = self.text_extractor.batch_extract([post_text(items[i]) for i in todo]).float()
+        if self.image_extractor is not None:
+            x[todo, self.text_dim:] = self.image_extractor.batch_extract([post_image(items[i]) for i in todo]).float()
+        return x
+
+    # ------------------------------------------------------------------ #
+    # Attachment
+    # ------------------------------------------------------------------ #
+    def neighbours(self, queries: torch.Tensor, rel: int, k: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Top-k existing nodes by cosine similarity through the ANN index: (scores [B, k], indices [B, k])."""
+        return self.index[rel].search(queries, k)
+
+    def attach(self, x_new: torch.Tensor) -> List[Dict[str, np.ndarray]]:
+        """
+        Edges of every new post to the existing graph.
+
+        Returns:
+            Per post: {'out': targets, 'out_type', 'in': sources, 'in_type'}
+        """
+        parts = {0: x_new[:, :self.text_dim], 1: x_new[:, self.text_dim:]}
+        attached = [{'out': [], 'out_type': [], 'in': [], 'in_type': []} for _ in range(x_new.size(0))]
+        for rel, k in self.k.items():
+            if k <= 0:
+                continue
+            queries = F.normalize(parts[rel], p=2, dim=1)
+            scores, idx = self.neighbours(queries, rel, k * self.candidate_factor)
+            # Incoming: candidates whose K-th neighbour is less similar than the new post
+            incoming = scores >= self.kth_sim[idx, rel]
+            for b in range(x_new.size(0)):
+                attached[b]['out'].append(idx[b, :k].numpy())
+                attached[b]['out_type'].append(np.full(min(k, idx.size(1)), rel))
+                src = idx[b][incoming[b]].numpy()
+                attached[b]['in'].append(src)
+                attached[b]['in_type'].append(np.full(src.size, rel))
+        return [{key: np.concatenate(v).astype(np.int64) for key, v in a.items()} for a in attached]
+
+    # ------------------------------------------------------------------ #
+    # Ego-network + affected nodes
+    # ------------------------------------------------------------------ #
+    def _in_edges(self, v: int, attachment: Dict[str, np.ndarray], out_count: Dict[int, List[int]]):
+        """Sources and relations of v's incoming edges in the graph augmented with the new post (-1)."""
+        if v == -1:
+            return attachment['in'], attachment['in_type']
+        s, e = self.in_ptr[v], self.in_ptr[v + 1]
+        sources, rels = self.in_src[s:e], self.in_type[s:e]
+        if v in out_count:
+            sources = np.concatenate([sources, np.full(len(out_count[v]), -1)])
+            rels = np.concatenate([rels, out_count[v]])
+        return sources, rels
+
+    @staticmethod
+    def _bfs(start: int, step, depth: int) -> Dict[int, int]:
+        dist = {start: 0}
+        frontier = [start]
+        for d in range(1, depth + 1):
+            nxt = []
+            for v in frontier:
+                for u in step(v).tolist():
+                    if u not in dist:
+                        dist[u] = d
+                        nxt.append(u)
+            frontier = nxt
+        return dist
+
+    def affected_layers(self, attachment: Dict[str, np.ndarray]) -> List[List[int]]:
+        """
+        Nodes whose layer-l state must be recomputed for the new post (-1), l = 1..L.
+
+        Layer l needs the nodes the post's final state depends on (upstream <= L-l
+        hops) whose cached state is stale (downstream <= l hops of the post; one
+        more hop for GCN, whose normalisation also sees the changed degrees).
+        Everything else comes from the cached hidden states, so the work is
+        bounded by the ego-network (~K^L nodes), not by the graph size.
+
+        Returns:
+            targets[l - 1]: global ids (new post = -1 first)
+        """
+        out_count: Dict[int, List[int]] = {}
+        for t, r in zip(attachment['out'].tolist(), attachment['out_type'].tolist()):
+            out_count.setdefault(t, []).append(r)
+        in_set = set(attachment['in'].tolist())
+
+        def upstream(v):
+            return self._in_edges(v, attachment, out_count)[0]
+
+        def downstream(v):
+            if v == -1:
+                return attachment['out']
+            nodes = self.out_dst[self.out_ptr[v]:self.out_ptr[v + 1]]
+            return np.append(nodes, -1) if v in in_set else nodes
+
+        L = self.model.num_layers
+        extra = 1 if self.model.gnn_type == 'gcn' else 0
+        up = self._bfs(-1, upstream, L - 1)
+        down = self._bfs(-1, downstream, L - 1 + extra)
+        targets = []
+        for l in range(1, L + 1):
+            stale = [v for v, d in up.items()
+                     if v != -1 and d <= L - l and down.get(v, L + extra + 1) <= l + extra]
+            targets.append([-1] + sorted(stale))
+        return targets
+
+    # ------------------------------------------------------------------ #
+    # Cached hidden states
+    # ------------------------------------------------------------------ #
+    @torch.no_grad()
+    def _build_cache(self, edge_index: torch.Tensor, edge_type: torch.Tensor):
+        """States of layers 1..L-1 for all existing nodes (layer 0 is node-wise, computed on demand)."""
+        model = self.model
+        edge_index = edge_index.to(self.device)
+        edge_attr = edge_type.view(-1, 1).to(self.device)
+        self.hidden: Dict[int, torch.Tensor] = {}
+        h = model.input_layer(self.x.to(self.device))
+        for i in range(model.num_layers - 1):
+            h = model.layer_update(i, h, model.conv(i, h, edge_index, edge_attr))
+            self.hidden[i + 1] = h.cpu()
+        # GCN: full-graph degree (in-edges + self loop), as gcn_norm computes it
+        not_loop = edge_index[0] != edge_index[1]
+        self.degree = torch.bincount(edge_index[1][not_loop].cpu(), minlength=self.num_nodes).float() + 1
+
+    def _state(self, layer: int, nodes: torch.Tensor) -> torch.Tensor:
+        if layer == 0:
+            return self.model.input_layer(self.x[nodes].to(self.device))
+        return self.hidden[layer][nodes].to(self.device)
+
+    def _gcn_conv(self, i: int, h: torch.Tensor, edge_index: torch.Tensor, degree: torch.Tensor) -> torch.Tensor:
+        """GCNConv on a partial graph with full-graph degrees (self loops excluded from edge_index)."""
+        conv = self.model.gnn_layers[i]
+        xw = conv.lin(h)
+        src, dst = edge_index
+        norm = (degree[src] * degree[dst]).rsqrt().unsqueeze(1)
+        out = (xw / degree.unsqueeze(1)).index_add_(0, dst, xw[src] * norm)
+        return out + conv.bias if conv.bias is not None else out
+
+    # ------------------------------------------------------------------ #
+    # Prediction
+    # ------------------------------------------------------------------ #
+    @torch.no_grad()
+    def predict_embeddings(self, x_new: torch.Tensor) -> torch.Tensor:
+        """
+        Class probabilities [B, 6] for already-embedded new posts.
+
+        Layer by layer, only the affected nodes of every post are recomputed
+        (all posts of the batch in one conv call, as a disjoint union); their
+        neighbours' states come from the cache or from the previous layer.
+        """
+        model = self.model
+        is_gcn = model.gnn_type == 'gcn'
+        attachments = self.attach(x_new)
+        plans = [self.affected_layers(a) for a in attachments]
+        out_counts = []
+        for a in attachments:
+            counts: Dict[int, List[int]] = {}
+            for t, r in zip(a['out'].tolist(), a['out_type'].tolist()):
+                counts.setdefault(t, []).append(r)
+            out_counts.append(counts)
+
+        # Layer 0: only the new posts themselves are fresh
+        prev = model.input_layer(x_new.to(self.device))
+        prev_rows = [{-1: b} for b in range(len(attachments))]
+
+        for l in range(1, model.num_layers + 1):
+            fresh_rows, cached_nodes, cached_pos, fresh_pos = [], [], [], []
+            src_l, dst_l, types, degrees, target_rows, rows = [], [], [], [], [], []
+            offset = 0
+            for b, (attachment, plan) in enumerate(zip(attachments, plans)):
+                targets = plan[l - 1]
+                local = {v: j for j, v in enumerate(targets)}
+                order = list(targets)
+                for v in targets:
+                    sources, rels = self._in_edges(v, attachment, out_counts[b])
+                    for u, r in zip(sources.tolist(), rels.tolist()):
+                        if is_gcn and u == v:
+                            continue
+                        if u not in local:
+                            local[u] = len(order)
+                            order.append(u)
+                        src_l.append(offset + local[u])
+                        dst_l.append(offset + local[v])
+                        types.append(r)
+                for j, u in enumerate(order):
+                    if u in prev_rows[b]:
+                        fresh_pos.append(offset + j)
+                        fresh_rows.append(prev_rows[b][u])
+                    else:
+                        cached_pos.append(offset + j)
+                        cached_nodes.append(u)
+                if is_gcn:
+                    n_in = int((attachment['in'] >= 0).sum())
+                    degrees.append(torch.tensor(
+                        [n_in + 1.0 if u == -1 else float(self.degree[u]) + len(out_counts[b].get(u, ())) for u in order]
+                    ))
+                rows.append({v: len(target_rows) + j for j, v in enumerate(targets)})
+                target_rows.extend(range(offset, offset + len(targets)))
+                offset += len(order)
+
+            h = prev.new_empty((offset, model.hidden_dim))
+            if cached_nodes:
+                h[torch.tensor(cached_pos)] = self._state(l - 1, torch.tensor(cached_nodes))
+            h[torch.tensor(fresh_pos)] = prev[torch.tensor(fresh_rows)]
+            edge_index = torch.tensor([src_l, dst_l], dtype=torch.long, device=self.device).view(2, -1)
+            if is_gcn:
+                h_new = self._gcn_conv(l - 1, h, edge_index, torch.cat(degrees).to(self.device))
+            else:
+                edge_attr = torch.tensor(types, dtype=torch.long, device=self.device).view(-1, 1)
+                h_new = model.conv(l - 1, h, edge_index, edge_attr)
+            target_rows = torch.tensor(target_rows, device=self.device)
+            prev = model.layer_update(l - 1, h[target_rows], h_new[target_rows])
+            prev_rows = rows
+
+        roots = torch.tensor([rows[-1] for rows in prev_rows], device=self.device)
+        self.last_touched = sum(len(t) for plan in plans for t in plan)
+        return F.softmax(model.classifier(prev[roots]), dim=-1).cpu()
+
+    def predict_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        Score new posts.
+
+        Returns:
+            Per item: label, label_idx, binary ('True'/'Fake'), prob_fake, probs {label: p}
+        """
+        if not items:
+            return []
+        return format_results(items, self.predict_embeddings(self.embed(items)))
+
+    def predict(self, item: Dict) -> Dict:
+        """Score a single new post."""
+        return self.predict_batch([item])[0]
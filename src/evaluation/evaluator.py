@@ -1 +1,232 @@
-class Evaluator: pass
\ No newline at end of file
+"""
+Evaluation report for 6-class fake news predictions.
+
+Overall 6-class / binary accuracy and F1 with bootstrap confidence intervals,
+per-class precision / recall / F1 / support, and the same metrics broken down
+by subgroup (source_dataset, subreddit, split). All numbers come from
+confusion matrices built on-device (src/evaluation/metrics.py).
+
+Usage:
+    python src/evaluation/evaluator.py --graph data/04_graph/fakeddit_graph.pt \\
+        --checkpoint models/checkpoints/best_gnn_model.pt --gnn_type gat \\
+        --data data/03_clean/Fakeddit/merged.jsonl --mask test --output reports/test_eval.json
+
+    evaluator = Evaluator(preds, targets, groups={'split': split_names})
+    evaluator.print_report()
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.evaluation.metrics import (
+    METRIC_NAMES, NUM_CLASSES, bootstrap_ci, confusion_matrix, metrics_from_confusion,
+    per_class_stats, subgroup_metrics
+)
+from src.features.graph_builder import LABEL_TO_IDX
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LABEL_NAMES = [label for label, _ in sorted(LABEL_TO_IDX.items(), key=lambda kv: kv[1])]
+# Subgroup -> record fields to try, first present wins (crawler keeps subreddit under metadata)
+GROUP_FIELDS = {
+    'source_dataset': ['source_dataset'],
+    'subreddit': ['metadata.subreddit', 'subreddit'],
+    'split': ['split'],
+}
+
+
+def _field(record: Dict, dotted: str):
+    value = record
+    for part in dotted.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def load_groups(data_path: str, num_nodes: Optional[int] = None) -> Dict[str, List[str]]:
+    """
+    Subgroup values per node, read from the records the graph was built from
+    (nodes follow record order, as in InteractionGraphBuilder.build_graph).
+    """
+    from src.utils.dataset_io import read_records
+
+    columns = [f for fields in GROUP_FIELDS.values() for f in fields]
+    groups = {name: [] for name in GROUP_FIELDS}
+    for record in read_records(data_path, columns=columns):
+        for name, fields in GROUP_FIELDS.items():
+            value = next((v for v in (_field(record, f) for f in fields) if v is not None), None)
+            groups[name].append('unknown' if value is None else str(value))
+    if num_nodes is not None and len(groups['split']) != num_nodes:
+        raise ValueError(f"{data_path} has {len(groups['split'])} records but the graph has {num_nodes} nodes")
+    # Drop groupings that carry no information
+    return {name: values for name, values in groups.items() if len(set(values)) > 1 or values[:1] != ['unknown']}
+
+
+class Evaluator:
+    """
+    Metrics, confidence intervals and subgroup breakdowns for one set of predictions.
+    """
+
+    def __init__(
+        self,
+        preds,
+        targets,
+        groups: Optional[Dict[str, Sequence]] = None,
+        n_resamples: int = 2000,
+        alpha: float = 0.05,
+        seed: int = 42,
+        label_names: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            preds / targets: 6-class labels (tensor on any device, numpy or list)
+            groups: {column: value per sample} for subgroup breakdowns
+            n_resamples: Bootstrap resamples for the CIs (0 = no CIs)
+            alpha: 0.05 -> 95% intervals
+            label_names: Class names (default: LABEL_TO_IDX order)
+        """
+        self.preds = preds
+        self.targets = targets
+        self.groups = groups or {}
+        self.n_resamples = n_resamples
+        self.alpha = alpha
+        self.seed = seed
+        self.label_names = label_names or LABEL_NAMES
+        self.cm = confusion_matrix(preds, targets, NUM_CLASSES)
+
+    def overall(self) -> Dict:
+        report = {'n': int(self.cm.sum())}
+        report.update({k: float(v) for k, v in metrics_from_confusion(self.cm).items()})
+        if self.n_resamples:
+            report['ci'] = bootstrap_ci(cm=self.cm, n_resamples=self.n_resamples, alpha=self.alpha, seed=self.seed)
+        return report
+
+    def per_class(self) -> Dict[str, Dict[str, float]]:
+        stats = per_class_stats(self.cm)
+        return {
+            name: {k: float(stats[k][i]) for k in ('precision', 'recall', 'f1', 'support')}
+            for i, name in enumerate(self.label_names)
+        }
+
+    def subgroups(self) -> Dict:
+        if not self.groups:
+            return {}
+        return subgroup_metrics(self.preds, self.targets, self.groups, n_resamples=self.n_resamples,
+                                alpha=self.alpha, seed=self.seed)
+
+    def report(self) -> Dict:
+        start = time.perf_counter()
+        report = {
+            'overall': self.overall(),
+            'per_class': self.per_class(),
+            'confusion_matrix': self.cm.cpu().tolist(),
+            'subgroups': self.subgroups(),
+            'n_resamples': self.n_resamples,
+            'alpha': self.alpha,
+        }
+        report['seconds'] = round(time.perf_counter() - start, 4)
+        return report
+
+    @staticmethod
+    def _fmt(value: float, ci: Optional[Dict], key: str) -> str:
+        if ci is None:
+            return f"{value:.4f}"
+        low, high = ci[key]
+        return f"{value:.4f} [{low:.4f}, {high:.4f}]"
+
+    def print_report(self, report: Optional[Dict] = None):
+        report = report or self.report()
+        overall = report['overall']
+        ci = overall.get('ci')
+        level = f"{100 * (1 - self.alpha):.0f}% CI" if ci else ''
+        print("\n" + "=" * 60)
+        print(f"EVALUATION (n={overall['n']}) {level}")
+        print("=" * 60)
+        print(f"6-Class Accuracy:  {self._fmt(overall['acc_6'], ci, 'acc_6')}")
+        print(f"6-Class Macro-F1:  {self._fmt(overall['f1_macro_6'], ci, 'f1_macro_6')}")
+        print(f"Binary Accuracy:   {self._fmt(overall['acc_bin'], ci, 'acc_bin')}")
+        print(f"Binary F1:         {self._fmt(overall['f1_bin'], ci, 'f1_bin')}")
+
+        print(f"\n{'class':<15}{'precision':>10}{'recall':>10}{'f1':>10}{'support':>10}")
+        for name, stats in report['per_class'].items():
+            print(f"{name:<15}{stats['precision']:>10.4f}{stats['recall']:>10.4f}{stats['f1']:>10.4f}{int(stats['support']):>10d}")
+
+        for column, values in report['subgroups'].items():
+            print(f"\n{column:<20}{'n':>8}" + ''.join(f"{m:>12}" for m in METRIC_NAMES))
+            for name, entry in sorted(values.items(), key=lambda kv: -kv[1]['n']):
+                print(f"{name[:19]:<20}{entry['n']:>8d}" + ''.join(f"{entry[m]:>12.4f}" for m in METRIC_NAMES))
+        print("=" * 60)
+        print(f"({report['seconds'] * 1000:.1f} ms, {self.n_resamples} bootstrap resamples)")
+
+    def save(self, path: str, report: Optional[Dict] = None) -> Dict:
+        report = report or self.report()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate a trained MultiModalFakeNewsGNN with CIs and subgroups')
+    parser.add_argument('--graph', default='data/04_graph/fakeddit_graph.pt', help='Path to graph .pt file')
+    parser.add_argument('--checkpoint', default='models/checkpoints/best_gnn_model.pt', help='Model state_dict')
+    parser.add_argument('--gnn_type', choices=['gat', 'sage', 'gcn', 'rgcn'], default='gat')
+    parser.add_argument('--hidden_dim', type=int, default=256)
+    parser.add_argument('--data', default=None, help='Records the graph was built from (for source_dataset / subreddit groups)')
+    parser.add_argument('--mask', choices=['train', 'val', 'test', 'all'], default='test', help='Nodes to evaluate')
+    parser.add_argument('--n_boot', type=int, default=2000, help='Bootstrap resamples (0 = no CIs)')
+    parser.add_argument('--alpha', type=float, default=0.05, help='1 - confidence level')
+    parser.add_argument('--output', default=None, help='Optional JSON report path')
+    args = parser.parse_args()
+
+    from torch_geometric.data import Data
+    from src.models.cascade_gnn import MultiModalFakeNewsGNN
+    from src.models.inference_engine import GNNInferenceEngine
+
+    torch.serialization.add_safe_globals([Data])
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    data = torch.load(args.graph, map_location=device, weights_only=False)
+    model = MultiModalFakeNewsGNN(input_dim=data.x.size(1), hidden_dim=args.hidden_dim,
+                                  num_classes=NUM_CLASSES, gnn_type=args.gnn_type).to(device)
+    model.load_state_dict(torch.load(args.checkpoint, map_location=device, weights_only=False))
+    preds, _ = GNNInferenceEngine(model).predict(data.x, data.edge_index, data.edge_attr)
+
+    # Split of every node from the masks; richer groups from the source records
+    split = np.full(data.num_nodes, 'unknown', dtype=object)
+    for name in ('train', 'val', 'test'):
+        split[data[f'{name}_mask'].cpu().numpy()] = name
+    groups = load_groups(args.data, data.num_nodes) if args.data else {}
+    groups['split'] = split.tolist()
+
+    mask = torch.ones(data.num_nodes, dtype=torch.bool, device=device) if args.mask == 'all' else data[f'{args.mask}_mask']
+    keep = mask.cpu().numpy()
+    groups = {name: np.asarray(values, dtype=object)[keep].tolist() for name, values in groups.items()}
+    if args.mask != 'all':
+        groups.pop('split')
+
+    evaluator = Evaluator(preds[mask], data.y[mask], groups=groups, n_resamples=args.n_boot, alpha=args.alpha)
+    report = evaluator.report()
+    evaluator.print_report(report)
+    if args.output:
+        evaluator.save(args.output, report)
+        logger.info(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
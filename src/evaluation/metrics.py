@@ -1 +1,214 @@
-def f1(): pass
\ No newline at end of file
+"""
+Torch-native classification metrics from confusion matrices.
+
+Everything is derived from one bincount per call, on whatever device the
+predictions live on, and works on batches of confusion matrices [..., C, C]
+(rows = true class, columns = predicted class). That makes three things cheap:
+- epoch-time validation metrics without a numpy/sklearn round trip,
+- bootstrap confidence intervals: resampling n posts with replacement only
+  changes how many posts fall into each confusion cell, so a resample is a
+  multinomial draw over the C*C cells (sampled as chained binomials, O(C^2)
+  per resample, independent of n) and thousands of resamples are one batch,
+- per-subgroup breakdowns: one bincount over (group, true, pred) gives a
+  [G, C, C] batch.
+
+Conventions follow sklearn: macro-F1 averages over classes present in the
+targets or the predictions, zero divisions count as 0, binary F1 is the F1
+of the positive class (Fake).
+
+Usage:
+    cm = confusion_matrix(preds, targets, 6)
+    report = classification_metrics(preds, targets)           # 6-class + binary
+    ci = bootstrap_ci(preds, targets, n_resamples=2000)       # {metric: (low, high)}
+    groups = subgroup_metrics(preds, targets, {'split': split_names})
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+NUM_CLASSES = 6
+# classes 0,1,2 -> 0 (True), classes 3,4,5 -> 1 (Fake)
+BINARY_FAKE_FROM = 3
+METRIC_NAMES = ('acc_6', 'f1_macro_6', 'acc_bin', 'f1_bin')
+
+
+def _as_tensor(values, device: Optional[torch.device] = None) -> torch.Tensor:
+    if isinstance(values, torch.Tensor):
+        return values.long() if device is None else values.long().to(device)
+    return torch.as_tensor(np.asarray(values), dtype=torch.long, device=device)
+
+
+def confusion_matrix(preds, targets, num_classes: int = NUM_CLASSES) -> torch.Tensor:
+    """[C, C] counts (rows = true, columns = predicted), on the inputs' device."""
+    preds = _as_tensor(preds)
+    targets = _as_tensor(targets, preds.device)
+    return torch.bincount(targets * num_classes + preds, minlength=num_classes * num_classes).view(num_classes, num_classes)
+
+
+def grouped_confusion(preds, targets, group_ids, num_groups: int, num_classes: int = NUM_CLASSES) -> torch.Tensor:
+    """[G, C, C] confusion matrices of every group from one bincount."""
+    preds = _as_tensor(preds)
+    targets = _as_tensor(targets, preds.device)
+    group_ids = _as_tensor(group_ids, preds.device)
+    cells = num_classes * num_classes
+    flat = group_ids * cells + targets * num_classes + preds
+    return torch.bincount(flat, minlength=num_groups * cells).view(num_groups, num_classes, num_classes)
+
+
+def to_binary(cm: torch.Tensor, fake_from: int = BINARY_FAKE_FROM) -> torch.Tensor:
+    """Collapse [..., 6, 6] into [..., 2, 2] (True = classes < fake_from, Fake = the rest)."""
+    num_classes = cm.size(-1)
+    fold = torch.zeros(num_classes, 2, dtype=torch.float64, device=cm.device)
+    fold[:fake_from, 0] = 1
+    fold[fake_from:, 1] = 1
+    return fold.t() @ cm.double() @ fold
+
+
+def per_class_stats(cm: torch.Tensor) -> Dict[str, torch.Tensor]:
+    """Precision / recall / F1 / support per class: each [..., C]."""
+    cm = cm.double()
+    tp = cm.diagonal(dim1=-2, dim2=-1)
+    support = cm.sum(dim=-1)
+    predicted = cm.sum(dim=-2)
+    precision = torch.where(predicted > 0, tp / predicted.clamp(min=1), torch.zeros_like(tp))
+    recall = torch.where(support > 0, tp / support.clamp(min=1), torch.zeros_like(tp))
+    denom = precision + recall
+    f1 = torch.where(denom > 0, 2 * precision * recall / denom.clamp(min=1e-12), torch.zeros_like(tp))
+    return {'precision': precision, 'recall': recall, 'f1': f1, 'support': support, 'predicted': predicted}
+
+
+def accuracy(cm: torch.Tensor) -> torch.Tensor:
+    cm = cm.double()
+    total = cm.sum(dim=(-2, -1))
+    return torch.where(total > 0, cm.diagonal(dim1=-2, dim2=-1).sum(-1) / total.clamp(min=1), torch.zeros_like(total))
+
+
+def macro_f1(cm: torch.Tensor) -> torch.Tensor:
+    """Mean F1 over classes that occur in targets or predictions (sklearn 'macro')."""
+    stats = per_class_stats(cm)
+    present = (stats['support'] + stats['predicted']) > 0
+    return (stats['f1'] * present).sum(-1) / present.sum(-1).clamp(min=1)
+
+
+def metrics_from_confusion(cm6: torch.Tensor, fake_from: int = BINARY_FAKE_FROM) -> Dict[str, torch.Tensor]:
+    """6-class + binary accuracy / F1 for a (batch of) 6-class confusion matrices."""
+    cm_bin = to_binary(cm6, fake_from)
+    return {
+        'acc_6': accuracy(cm6),
+        'f1_macro_6': macro_f1(cm6),
+        'acc_bin': accuracy(cm_bin),
+        'f1_bin': per_class_stats(cm_bin)['f1'][..., 1],
+    }
+
+
+def classification_metrics(preds, targets, num_classes: int = NUM_CLASSES, prefix: str = '') -> Dict[str, float]:
+    """
+    Args:
+        preds / targets: 6-class labels (tensor on any device, numpy or list)
+        prefix: Key prefix, e.g. 'val_' -> 'val_acc_6'
+
+    Returns:
+        {acc_6, f1_macro_6, acc_bin, f1_bin} as Python floats
+    """
+    cm = confusion_matrix(preds, targets, num_classes)
+    return {f'{prefix}{k}': float(v) for k, v in metrics_from_confusion(cm).items()}
+
+
+def sample_confusions(
+    cm: torch.Tensor,
+    n_resamples: int,
+    generator: Optional[torch.Generator] = None
+) -> torch.Tensor:
+    """
+    Bootstrap resamples of a confusion matrix: [R, C, C].
+
+    Multinomial(n, cm / n) over the cells, drawn as chained binomials
+    (cell i gets Binomial(remaining, p_i / remaining mass)).
+    """
+    shape = cm.shape
+    counts = cm.reshape(-1).double().cpu()
+    n = counts.sum()
+    out = torch.zeros(n_resamples, counts.numel(), dtype=torch.float64)
+    if n == 0:
+        return out.view(n_resamples, *shape)
+    probs = counts / n
+    remaining = torch.full((n_resamples,), float(n), dtype=torch.float64)
+    mass = 1.0
+    nonzero = torch.nonzero(counts).view(-1).tolist()
+    for j, i in enumerate(nonzero):
+        if j == len(nonzero) - 1:
+            out[:, i] = remaining
+            break
+        p = min(1.0, float(probs[i]) / mass) if mass > 0 else 0.0
+        draw = torch.binomial(remaining, torch.full_like(remaining, p), generator=generator)
+        out[:, i] = draw
+        remaining = remaining - draw
+        mass -= float(probs[i])
+    return out.view(n_resamples, *shape)
+
+
+def bootstrap_ci(
+    preds=None,
+    targets=None,
+    cm: Optional[torch.Tensor] = None,
+    n_resamples: int = 2000,
+    alpha: float = 0.05,
+    seed: int = 42,
+    num_classes: int = NUM_CLASSES
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Percentile bootstrap confidence intervals of the confusion-derived metrics.
+
+    Args:
+        preds / targets: 6-class labels, or pass `cm` directly
+        n_resamples: Bootstrap resamples (all computed as one batch)
+        alpha: 0.05 -> 95% interval
+
+    Returns:
+        {metric: (low, high)}
+    """
+    if cm is None:
+        cm = confusion_matrix(preds, targets, num_classes)
+    generator = torch.Generator().manual_seed(seed)
+    samples = metrics_from_confusion(sample_confusions(cm, n_resamples, generator))
+    q = torch.tensor([alpha / 2, 1 - alpha / 2], dtype=torch.float64)
+    return {k: tuple(float(x) for x in torch.quantile(v, q)) for k, v in samples.items()}
+
+
+def subgroup_metrics(
+    preds,
+    targets,
+    groups: Dict[str, Sequence],
+    n_resamples: int = 0,
+    alpha: float = 0.05,
+    seed: int = 42,
+    num_classes: int = NUM_CLASSES
+) -> Dict[str, Dict[str, Dict]]:
+    """
+    Metrics per value of every grouping column.
+
+    Args:
+        groups: {column: value per sample}, e.g. {'subreddit': [...], 'split': [...]}
+        n_resamples: > 0 adds bootstrap CIs per group
+
+    Returns:
+        {column: {value: {'n', metrics..., 'ci': {metric: (low, high)}}}}
+    """
+    preds = _as_tensor(preds)
+    targets = _as_tensor(targets, preds.device)
+    report = {}
+    for column, values in groups.items():
+        values = np.asarray([str(v) if v is not None else 'unknown' for v in values])
+        names, codes = np.unique(values, return_inverse=True)
+        cms = grouped_confusion(preds, targets, codes, len(names), num_classes)
+        metrics = metrics_from_confusion(cms)
+        report[column] = {}
+        for g, name in enumerate(names.tolist()):
+            entry = {'n': int(cms[g].sum())}
+            entry.update({k: float(v[g]) for k, v in metrics.items()})
+            if n_resamples:
+                entry['ci'] = bootstrap_ci(cm=cms[g], n_resamples=n_resamples, alpha=alpha, seed=seed + g)
+            report[column][name] = entry
+    return report
@@ -7,50 +7,61 @@ Edges represent "reply-to" relationships.
 Node features are global text embeddings (XLM-R).
 """
 
+import time
+import numpy as np
 import torch
 import torch.nn.functional as F
 from torch_geometric.data import Data
-from typing import List, Dict, Optional
-import networkx as nx
+from typing import List, Dict, Optional, Tuple
 import logging
 from tqdm import tqdm
 
-from src.features.embedding_extractor import TextEmbeddingExtractor
+from src.features.embedding_extractor import create_extractors
 
 logger = logging.getLogger(__name__)
 
 class CascadeGraphBuilder:
-    def __init__(self, device: Optional[str] = None):
+    def __init__(self, device: Optional[str] = None, attach_orphans: bool = False, text_extractor=None):
+        """
+        Args:
+            device: 'cuda', 'cpu', or None (auto-detect)
+            attach_orphans: Link comments whose parent is missing (or appears later
+                in the cascade list) to that parent / ROOT instead of leaving them
+                isolated. Default False keeps the historical graphs.
+            text_extractor: Extractor with batch_extract(texts, batch_size); None = XLM-R
+        """
         self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        self.attach_orphans = attach_orphans
         
-        # Initialize embedding extractor
-        self.text_extractor = TextEmbeddingExtractor(
-            model_name='xlm-roberta-base',
-            device=self.device
-        )
+        # Initialize embedding extractor (shared snapshot / extractor server when available)
+        if text_extractor is None:
+            text_extractor = create_extractors(text_model='xlm-roberta-base', device=self.device)[0]
+        self.text_extractor = text_extractor
         
-    def build_graph(self, item: Dict) -> Optional[Data]:
+    def _build_structure(self, item: Dict) -> Tuple[List[str], torch.Tensor]:
         """
-        Build a PyG Data object from a single news item with cascade.
+        Build the cascade structure of a news item (no embeddings).
+        
+        Comment ids are mapped to integer indices with a single dict pass and the
+        parent -> child index arrays are built with numpy (no graph library).
+        Node order and edge order match the former networkx.DiGraph builder:
+        nodes in first-seen order (ROOT first), edges grouped by source node.
         
         Args:
-            item: Dictionary containing 'raw_text', 'cascade', 'label'
+            item: Dictionary containing 'raw_text', 'cascade'
             
         Returns:
-            Data object or None if invalid
+            (node texts in node order, edge_index [2, E])
         """
         post_id = item.get('id')
-        root_text = item.get('raw_text', '')
         cascade_nodes = item.get('cascade', [])
         
-        # 1. Create NetworkX graph to manage structure
-        G = nx.DiGraph()
-        
-        # Add root node (The Post itself)
-        G.add_node("ROOT", text=root_text, user_id=item.get('user_id', 'unknown'), timestamp=item.get('timestamp', 0))
-        
-        # Add cascade nodes (Comments)
-        valid_comments = 0
+        # Root node (The Post itself) is always index 0
+        node_index = {"ROOT": 0}
+        texts = [item.get('raw_text', '')]
+        src, dst = [], []
+        seen_edges = set()
+        orphans = []
         
         for comment in cascade_nodes:
             c_id = comment.get('id')
@@ -64,25 +75,71 @@ class CascadeGraphBuilder:
             if p_id == post_id:
                 p_id = "ROOT"
             
-            G.add_node(c_id, text=text, user_id=comment.get('user_id'), timestamp=comment.get('timestamp'))
-            # Edge direction: Comment -> Parent (Information Flow / Reply) or Parent -> Comment?
-            # Standard Cascade: Parent -> Comment (Diffusion).
-            # But GNN Message Passing often benefits from bi-directional or specific flow.
-            # Let's use Source -> Target (Parent -> Child) for diffusion modeling.
-            if p_id in G.nodes or p_id == "ROOT":
-                 G.add_edge(p_id, c_id)
-                 valid_comments += 1
-        
-        if valid_comments == 0 and len(cascade_nodes) > 0:
-            logger.debug(f"Post {post_id}: No valid connected comments found.")
+            # Comment id lặp lại: giữ vị trí cũ, text mới ghi đè
+            c_idx = node_index.get(c_id)
+            if c_idx is None:
+                c_idx = node_index[c_id] = len(texts)
+                texts.append(text)
+            else:
+                texts[c_idx] = text
             
-        # 2. Convert to PyG Data
-        # We need to map node IDs to integers 0..N
-        node_ids = list(G.nodes())
-        node_mapping = {n: i for i, n in enumerate(node_ids)}
+            # Edge direction: Parent -> Child (diffusion). A parent must already be
+            # known when its reply is read; otherwise the comment is an orphan.
+            p_idx = node_index.get(p_id)
+            if p_idx is None:
+                orphans.append((c_idx, p_id))
+                continue
+            if (p_idx, c_idx) not in seen_edges:
+                seen_edges.add((p_idx, c_idx))
+                src.append(p_idx)
+                dst.append(c_idx)
+        
+        if orphans and self.attach_orphans:
+            # Orphan: nối vào parent nếu parent xuất hiện sau trong list, nếu không thì nối vào ROOT
+            for c_idx, p_id in orphans:
+                p_idx = node_index.get(p_id, 0)
+                if (p_idx, c_idx) not in seen_edges:
+                    seen_edges.add((p_idx, c_idx))
+                    src.append(p_idx)
+                    dst.append(c_idx)
         
-        # Extract features for all nodes
-        texts = [G.nodes[n].get('text', '') for n in node_ids]
+        if not src and len(cascade_nodes) > 0:
+            logger.debug(f"Post {post_id}: No valid connected comments found.")
+        
+        if not src:
+            # Single node graph (just the root) or no connected comments
+            return texts, torch.empty((2, 0), dtype=torch.long)
+        
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        # Stable sort by source = adjacency order of the former DiGraph
+        order = np.argsort(src, kind='stable')
+        edge_index = torch.from_numpy(np.stack([src[order], dst[order]]))
+        return texts, edge_index
+    
+    @staticmethod
+    def _to_data(post_id, x: torch.Tensor, edge_index: torch.Tensor) -> Data:
+        """Wrap node features + structure into a PyG Data object."""
+        # Target Label (Graph-level label): labels are attached externally for now
+        data = Data(x=x, edge_index=edge_index)
+        data.post_id = post_id
+        data.num_nodes = x.size(0)
+        return data
+        
+    def build_graph(self, item: Dict) -> Optional[Data]:
+        """
+        Build a PyG Data object from a single news item with cascade.
+        
+        Embeds this item's nodes only; use process_dataset() for many items.
+        
+        Args:
+            item: Dictionary containing 'raw_text', 'cascade', 'label'
+            
+        Returns:
+            Data object or None if invalid
+        """
+        post_id = item.get('id')
+        texts, edge_index = self._build_structure(item)
         
         # Batch extract embeddings
         try:
@@ -91,53 +148,143 @@ class CascadeGraphBuilder:
             logger.error(f"Error extracting embeddings for {post_id}: {e}")
             return None
             
-        x = embeddings # [N, 768]
-        
-        # Create edge_index
-        edge_index = []
-        for src, dst in G.edges():
-            src_idx = node_mapping[src]
-            dst_idx = node_mapping[dst]
-            edge_index.append([src_idx, dst_idx])
-            
-            # Make undirected? Usually cascades are directed.
-            # But for GCN/GAT, undirected often works better if flow isn't strictly modeled.
-            # Let's keep it directed for now, can add reverse edges later or in transform.
-            
-        if not edge_index:
-             # Single node graph (just the root)
-             edge_index = torch.empty((2, 0), dtype=torch.long)
-        else:
-             edge_index = torch.tensor(edge_index, dtype=torch.long).t().contiguous()
-             
-        # Target Label (Graph-level label)
-        # Assuming binary or multiclass label is present
-        y = None
-        if 'label' in item:
-            # You might need a mapper here. For now assume it's handled externally or passing raw.
-            # Or if it's already an integer.
-            pass
+        return self._to_data(post_id, embeddings, edge_index)  # x: [N, 768]
 
-        data = Data(x=x, edge_index=edge_index)
-        data.post_id = post_id
-        data.num_nodes = len(node_ids)
+    def _embed_corpus(self, texts: List[str], batch_size: int) -> torch.Tensor:
+        """
+        Embed texts from many cascades in large, length-sorted batches.
         
-        return data
+        Sorting by length keeps padding (and wasted compute) per batch small;
+        rows are returned in the original order.
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]) if isinstance(texts[i], str) else 0,
+                       reverse=True)
+        sorted_embeddings = self.text_extractor.batch_extract([texts[i] for i in order], batch_size=batch_size)
+        embeddings = torch.empty_like(sorted_embeddings)
+        embeddings[torch.tensor(order, dtype=torch.long)] = sorted_embeddings
+        return embeddings
+
+    def _build_chunk(self, chunk: List[Tuple[Dict, List[str], torch.Tensor]], batch_size: int) -> List[Data]:
+        """Embed all nodes of a chunk of cascades at once and scatter rows back per cascade."""
+        texts = [t for _, node_texts, _ in chunk for t in node_texts]
+        embeddings = self._embed_corpus(texts, batch_size)
+        sizes = [len(node_texts) for _, node_texts, _ in chunk]
+        return [
+            self._to_data(item.get('id'), x, edge_index)
+            for (item, _, edge_index), x in zip(chunk, torch.split(embeddings, sizes))
+        ]
 
-    def process_dataset(self, items: List[Dict]) -> List[Data]:
+    def process_dataset(
+        self,
+        items: List[Dict],
+        batch_size: int = 64,
+        chunk_nodes: int = 16384
+    ) -> List[Data]:
         """
         Process a list of items into a list of Data objects.
+        
+        Node texts of many cascades are collected first (up to chunk_nodes nodes)
+        and embedded together in length-sorted batches, instead of one tiny
+        forward pass per post.
+        
+        Args:
+            items: News items with 'raw_text' and 'cascade'
+            batch_size: Texts per forward pass
+            chunk_nodes: Nodes collected before embedding (bounds memory)
+            
+        Returns:
+            List of Data objects (same order as items; failed items are skipped)
         """
         graph_list = []
         logger.info(f"Building cascade graphs for {len(items)} items...")
         
+        start_time = time.perf_counter()
+        total_nodes = 0
+        chunk, chunk_size = [], 0
+        
+        def flush():
+            nonlocal total_nodes
+            try:
+                graphs = self._build_chunk(chunk, batch_size)
+            except Exception as e:
+                # Một bài lỗi không được làm hỏng cả chunk: build lại từng bài
+                logger.error(f"Chunk embedding failed ({e}), falling back to per-item build")
+                graphs = [g for g in (self.build_graph(item) for item, _, _ in chunk) if g is not None]
+            graph_list.extend(graphs)
+            total_nodes += sum(g.num_nodes for g in graphs)
+        
         for item in tqdm(items, desc="Building Graphs"):
             try:
-                data = self.build_graph(item)
-                if data:
-                    graph_list.append(data)
+                texts, edge_index = self._build_structure(item)
             except Exception as e:
                 logger.error(f"Failed to build graph for item {item.get('id')}: {e}")
                 continue
+            chunk.append((item, texts, edge_index))
+            chunk_size += len(texts)
+            if chunk_size >= chunk_nodes:
+                flush()
+                chunk, chunk_size = [], 0
+        if chunk:
+            flush()
+        
+        elapsed = time.perf_counter() - start_time
+        if elapsed > 0:
+            logger.info(f"Embedded {total_nodes} nodes in {elapsed:.1f}s ({total_nodes / elapsed:.1f} nodes/sec)")
                 
-        return graph_list
\ No newline at end of file
+        return graph_list
+
+
+def benchmark_batching(builder: CascadeGraphBuilder, items: List[Dict], batch_size: int = 64) -> Dict:
+    """
+    Compare per-post embedding (build_graph) with corpus-wide batching (process_dataset)
+    on the same items, e.g. a sample of the real cascade-size distribution.
+    
+    Returns:
+        Dict with nodes, per-post/batched nodes/sec and speedup
+    """
+    num_nodes = 0
+    start = time.perf_counter()
+    for item in items:
+        data = builder.build_graph(item)
+        if data is not None:
+            num_nodes += data.num_nodes
+    per_post_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    builder.process_dataset(items, batch_size=batch_size)
+    batched_time = time.perf_counter() - start
+    
+    sizes = sorted(len(item.get('cascade', [])) + 1 for item in items)
+    result = {
+        'items': len(items),
+        'nodes': num_nodes,
+        'median_cascade_size': sizes[len(sizes) // 2] if sizes else 0,
+        'per_post_nodes_per_sec': num_nodes / per_post_time if per_post_time > 0 else 0.0,
+        'batched_nodes_per_sec': num_nodes / batched_time if batched_time > 0 else 0.0,
+        'speedup': per_post_time / batched_time if batched_time > 0 else 0.0,
+    }
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    
+    parser = argparse.ArgumentParser(description='Benchmark per-post vs corpus-batched cascade embedding')
+    parser.add_argument('--input', default='data/reddit_enriched_data.jsonl', help='JSONL with cascades')
+    parser.add_argument('--sample', type=int, default=500, help='Number of items to benchmark')
+    parser.add_argument('--batch_size', type=int, default=64, help='Texts per forward pass (batched mode)')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    with open(args.input, 'r', encoding='utf-8') as f:
+        sample = [json.loads(line) for line, _ in zip(f, range(args.sample)) if line.strip()]
+    
+    builder = CascadeGraphBuilder()
+    # Warm-up: load model so neither mode pays for it
+    builder.text_extractor.batch_extract(["warm up"])
+    r = benchmark_batching(builder, sample, batch_size=args.batch_size)
+    print(f"📊 {r['items']} posts, {r['nodes']} nodes (median cascade size {r['median_cascade_size']})")
+    print(f"   Per-post: {r['per_post_nodes_per_sec']:.1f} nodes/sec")
+    print(f"   Batched:  {r['batched_nodes_per_sec']:.1f} nodes/sec")
+    print(f"⚡ Speedup: {r['speedup']:.2f}x")
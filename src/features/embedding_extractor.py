@@ -2,6 +2,12 @@
 Embedding Extractor Module for Multimodal Fake News Detection.
 
 Extracts embeddings from text (XLM-R/BERT) and images (CLIP).
+
+Models load lazily on first use, from a memory-mapped snapshot when one exists
+(see src/features/model_snapshot.py), and are shared by every extractor of the
+same model/device in the process. When FAKENEWS_EXTRACTOR_SOCKET is set,
+create_extractors() hands out clients of that running extractor server instead
+(src/features/extractor_server.py).
 """
 
 import torch
@@ -12,6 +18,28 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# (kind, model_name, device) -> (model, tokenizer/processor), shared within the process
+_MODEL_POOL = {}
+
+
+def _pooled(kind: str, model_name: str, device: str, snapshot_root: Optional[str], load_pretrained):
+    key = (kind, model_name, device)
+    if key not in _MODEL_POOL:
+        from src.features import model_snapshot
+
+        if model_snapshot.has_snapshot(model_name, snapshot_root):
+            loader = model_snapshot.load_text_snapshot if kind == 'text' else model_snapshot.load_image_snapshot
+            print(f"📥 Loading {kind} model: {model_name} (snapshot)")
+            model, preprocessor = loader(model_name, snapshot_root)
+        else:
+            print(f"📥 Loading {kind} model: {model_name}")
+            model, preprocessor = load_pretrained()
+        model = model.to(device)
+        model.eval()
+        _MODEL_POOL[key] = (model, preprocessor)
+        print(f"✓ {kind.capitalize()} model loaded on {device}")
+    return _MODEL_POOL[key]
+
 
 class TextEmbeddingExtractor:
     """
@@ -24,16 +52,19 @@ class TextEmbeddingExtractor:
         self, 
         model_name: str = 'xlm-roberta-base',
         device: Optional[str] = None,
-        max_length: int = 512   
+        max_length: int = 512,
+        snapshot_root: Optional[str] = None
     ):
         """
         Args:
             model_name: HuggingFace model name
             device: 'cuda', 'cpu', or None (auto-detect)
             max_length: Maximum token length
+            snapshot_root: Snapshot directory (default: models/snapshots or $FAKENEWS_SNAPSHOT_DIR)
         """
         self.model_name = model_name
         self.max_length = max_length
+        self.snapshot_root = snapshot_root
         
         # Auto-detect device
         if device is None:
@@ -49,14 +80,11 @@ class TextEmbeddingExtractor:
         if self._model is not None:
             return
         
-        from transformers import AutoModel, AutoTokenizer
+        def load_pretrained():
+            from transformers import AutoModel, AutoTokenizer
+            return AutoModel.from_pretrained(self.model_name), AutoTokenizer.from_pretrained(self.model_name)
         
-        print(f"📥 Loading text model: {self.model_name}")
-        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self._model = AutoModel.from_pretrained(self.model_name)
-        self._model = self._model.to(self.device)
-        self._model.eval()
-        print(f"✓ Text model loaded on {self.device}")
+        self._model, self._tokenizer = _pooled('text', self.model_name, self.device, self.snapshot_root, load_pretrained)
     
     @property
     def embedding_dim(self) -> int:
@@ -157,14 +185,17 @@ class ImageEmbeddingExtractor:
     def __init__(
         self,
         model_name: str = 'openai/clip-vit-base-patch32',
-        device: Optional[str] = None
+        device: Optional[str] = None,
+        snapshot_root: Optional[str] = None
     ):
         """
         Args:
             model_name: HuggingFace CLIP model name
             device: 'cuda', 'cpu', or None (auto-detect)
+            snapshot_root: Snapshot directory (default: models/snapshots or $FAKENEWS_SNAPSHOT_DIR)
         """
         self.model_name = model_name
+        self.snapshot_root = snapshot_root
         
         if device is None:
             self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
@@ -179,14 +210,11 @@ class ImageEmbeddingExtractor:
         if self._model is not None:
             return
         
-        from transformers import CLIPModel, CLIPProcessor
+        def load_pretrained():
+            from transformers import CLIPModel, CLIPProcessor
+            return CLIPModel.from_pretrained(self.model_name), CLIPProcessor.from_pretrained(self.model_name)
         
-        print(f"📥 Loading image model: {self.model_name}")
-        self._processor = CLIPProcessor.from_pretrained(self.model_name)
-        self._model = CLIPModel.from_pretrained(self.model_name)
-        self._model = self._model.to(self.device)
-        self._model.eval()
-        print(f"✓ Image model loaded on {self.device}")
+        self._model, self._processor = _pooled('image', self.model_name, self.device, self.snapshot_root, load_pretrained)
     
     @property
     def embedding_dim(self) -> int:
@@ -279,14 +307,25 @@ class ImageEmbeddingExtractor:
 def create_extractors(
     text_model: str = 'xlm-roberta-base',
     image_model: str = 'openai/clip-vit-base-patch32',
-    device: Optional[str] = None
+    device: Optional[str] = None,
+    use_server: bool = True
 ) -> tuple:
     """
     Create text and image extractors.
     
+    Args:
+        use_server: Use the extractor server named by FAKENEWS_EXTRACTOR_SOCKET (same models)
+            when that variable is set and the server is reachable
+    
     Returns:
-        (TextEmbeddingExtractor, ImageEmbeddingExtractor)
+        (TextEmbeddingExtractor, ImageEmbeddingExtractor), or their remote clients
     """
+    if use_server:
+        from src.features.extractor_server import connect_extractors
+        remote = connect_extractors(text_model, image_model)
+        if remote is not None:
+            return remote
+    
     text_ext = TextEmbeddingExtractor(model_name=text_model, device=device)
     image_ext = ImageEmbeddingExtractor(model_name=image_model, device=device)
     return text_ext, image_ext
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Long-lived extractor worker: XLM-R + CLIP loaded once, served over a local socket.
+
+Commands that start fresh processes (batch_pipeline.py, preprocessor_graph.py,
+build_final_graphs.py workers, bulk_score.py) get remote extractors from
+create_extractors() when this server is running, so they skip model loading
+entirely. Requests from all clients share the one loaded copy of the models;
+every connection is served by its own thread, forwards are serialised per model.
+
+Transport: multiprocessing.connection over a Unix socket (pickled lists in,
+float32 numpy arrays out). Replies are unpickled, so the server is opt-in and
+only trusted when it belongs to the current user:
+- clients connect only when FAKENEWS_EXTRACTOR_SOCKET is set;
+- the socket lives in a 0700 per-user directory ($XDG_RUNTIME_DIR/fakenews or
+  /tmp/fakenews-<uid>), and clients refuse sockets owned by another user;
+- the authkey is random per server start, stored in a 0600 file next to the
+  socket (or given via FAKENEWS_EXTRACTOR_KEY).
+
+Usage:
+    python src/features/extractor_server.py                  # foreground, Ctrl+C to stop
+    python src/features/extractor_server.py --device cpu
+    FAKENEWS_EXTRACTOR_SOCKET=$XDG_RUNTIME_DIR/fakenews/extractors.sock python src/data/preprocessor_graph.py ...
+"""
+
+import os
+import sys
+import stat
+import argparse
+import logging
+import secrets
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import torch
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SOCKET_ENV = 'FAKENEWS_EXTRACTOR_SOCKET'
+KEY_ENV = 'FAKENEWS_EXTRACTOR_KEY'
+SOCKET_NAME = 'extractors.sock'
+
+
+def default_socket_path() -> str:
+    """Socket path in a per-user directory ($XDG_RUNTIME_DIR/fakenews or /tmp/fakenews-<uid>)."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    base = os.path.join(runtime_dir, 'fakenews') if runtime_dir else f'/tmp/fakenews-{os.getuid()}'
+    return os.path.join(base, SOCKET_NAME)
+
+
+def key_path(socket_path: str) -> str:
+    return socket_path + '.key'
+
+
+def _check_owned(path: str, max_mode: int):
+    """Raise PermissionError unless path is owned by us and grants nothing beyond max_mode."""
+    st = os.lstat(path)
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by uid {st.st_uid}, not {os.getuid()}")
+    if stat.S_IMODE(st.st_mode) & ~max_mode:
+        raise PermissionError(f"{path} has unsafe permissions {oct(stat.S_IMODE(st.st_mode))}")
+
+
+def load_authkey(socket_path: str) -> bytes:
+    """Authkey from FAKENEWS_EXTRACTOR_KEY, else from the server's 0600 key file."""
+    env_key = os.environ.get(KEY_ENV)
+    if env_key:
+        return env_key.encode('utf-8')
+    path = key_path(socket_path)
+    _check_owned(path, 0o600)
+    with open(path, 'rb') as f:
+        return f.read().strip()
+
+
+class RemoteExtractor:
+    """
+    Client with the TextEmbeddingExtractor / ImageEmbeddingExtractor interface.
+    """
+
+    def __init__(self, kind: str, model_name: str, embedding_dim: int, socket_path: str, authkey: bytes):
+        self.kind = kind
+        self.model_name = model_name
+        self._dim = embedding_dim
+        self.socket_path = socket_path
+        self._authkey = authkey
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def embedding_dim(self) -> int:
+        return self._dim
+
+    def _request(self, items: List[str], batch_size: Optional[int]) -> torch.Tensor:
+        with self._lock:
+            if self._conn is None:
+                _check_owned(self.socket_path, 0o777)
+                self._conn = Client(self.socket_path, family='AF_UNIX', authkey=self._authkey)
+            self._conn.send((self.kind, list(items), batch_size))
+            status, payload = self._conn.recv()
+        if status != 'ok':
+            raise RuntimeError(f"Extractor server error: {payload}")
+        return torch.from_numpy(payload)
+
+    def extract(self, item: str) -> torch.Tensor:
+        return self._request([item], None)[0]
+
+    def batch_extract(self, items: List[str], batch_size: Optional[int] = None) -> torch.Tensor:
+        if not items:
+            return torch.zeros(0, self._dim)
+        return self._request(items, batch_size)
+
+    def __getstate__(self):
+        # Connections are per process; a pickled client reconnects lazily
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def connect_extractors(
+    text_model: str,
+    image_model: str,
+    socket_path: Optional[str] = None
+) -> Optional[Tuple[RemoteExtractor, RemoteExtractor]]:
+    """
+    Remote (text, image) extractors if a server with these models is listening, else None.
+
+    Opt-in: without socket_path, only FAKENEWS_EXTRACTOR_SOCKET is consulted (unset -> None).
+    """
+    socket_path = socket_path or os.environ.get(SOCKET_ENV)
+    if not socket_path or not os.path.exists(socket_path):
+        return None
+    try:
+        _check_owned(socket_path, 0o777)
+        authkey = load_authkey(socket_path)
+    except (OSError, PermissionError) as e:
+        logger.warning(f"Not using extractor server at {socket_path}: {e}")
+        return None
+    try:
+        conn = Client(socket_path, family='AF_UNIX', authkey=authkey)
+        conn.send(('hello', None, None))
+        status, info = conn.recv()
+        conn.close()
+    except (OSError, EOFError, AuthenticationError) as e:
+        logger.warning(f"Extractor server at {socket_path} not reachable: {e}")
+        return None
+    if status != 'ok' or info['text'][0] != text_model or info['image'][0] != image_model:
+        logger.warning(f"Extractor server at {socket_path} serves other models: {info}")
+        return None
+    logger.info(f"Using extractor server at {socket_path}")
+    return (RemoteExtractor('text', text_model, info['text'][1], socket_path, authkey),
+            RemoteExtractor('image', image_model, info['image'][1], socket_path, authkey))
+
+
+class ExtractorServer:
+    """
+    Serves one text and one image extractor to any number of local clients.
+    """
+
+    def __init__(self, text_extractor, image_extractor, socket_path: Optional[str] = None):
+        self.extractors = {'text': text_extractor, 'image': image_extractor}
+        self.locks = {'text': threading.Lock(), 'image': threading.Lock()}
+        self.socket_path = socket_path or default_socket_path()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    kind, items, batch_size = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if kind == 'hello':
+                        reply = {k: (e.model_name, e.embedding_dim) for k, e in self.extractors.items()}
+                    else:
+                        kwargs = {'batch_size': batch_size} if batch_size else {}
+                        with self.locks[kind]:
+                            reply = self.extractors[kind].batch_extract(items, **kwargs).float().numpy()
+                    conn.send(('ok', reply))
+                except Exception as e:
+                    logger.exception("Request failed")
+                    conn.send(('error', repr(e)))
+
+    def _prepare(self) -> bytes:
+        """Create the 0700 socket directory and a fresh 0600 key file; return the authkey."""
+        socket_dir = os.path.dirname(os.path.abspath(self.socket_path))
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        _check_owned(socket_dir, 0o700)
+        for path in (self.socket_path, key_path(self.socket_path)):
+            if os.path.lexists(path):
+                os.unlink(path)
+        env_key = os.environ.get(KEY_ENV)
+        authkey = env_key.encode('utf-8') if env_key else secrets.token_hex(32).encode('ascii')
+        fd = os.open(key_path(self.socket_path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(authkey)
+        return authkey
+
+    def cleanup(self):
+        for path in (self.socket_path, key_path(self.socket_path)):
+            if os.path.lexists(path):
+                os.unlink(path)
+
+    def serve_forever(self):
+        authkey = self._prepare()
+        # The socket is created 0600 (no window where other users can connect)
+        old_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.socket_path, family='AF_UNIX', authkey=authkey)
+        finally:
+            os.umask(old_umask)
+        with listener:
+            logger.info(f"🟢 Extractor server listening on {self.socket_path}")
+            logger.info(f"   Clients: export {SOCKET_ENV}={self.socket_path}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError, AuthenticationError) as e:
+                    # e.g. a client that failed authentication
+                    logger.warning(f"Rejected connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Long-lived XLM-R/CLIP extractor server')
+    parser.add_argument('--socket', default=None,
+                        help='Unix socket path (default: $XDG_RUNTIME_DIR/fakenews/extractors.sock)')
+    parser.add_argument('--text_model', default='xlm-roberta-base')
+    parser.add_argument('--image_model', default='openai/clip-vit-base-patch32')
+    parser.add_argument('--device', default=None, help="'cuda', 'cpu' or auto")
+    parser.add_argument('--threads', type=int, default=0, help='torch CPU threads (0 = default)')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    from src.features.embedding_extractor import create_extractors
+    text_ext, image_ext = create_extractors(args.text_model, args.image_model, device=args.device, use_server=False)
+    # Load now (snapshot when available) so the first client does not pay for it
+    text_ext._load_model()
+    image_ext._load_model()
+
+    server = ExtractorServer(text_ext, image_ext, args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Extractor server stopped")
+    finally:
+        server.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,17 @@
 Interaction Graph Builder for Multimodal Fake News Detection.
 
 Builds a unified graph with inter-post edges based on Top-K similarity.
+
+Besides the raw (directed, unsorted) Top-K edge_index the graph carries the
+symmetrised adjacency, computed once here and saved with the graph:
+    adj_rowptr [N+1], adj_col [E']       A: deduplicated, no self loops, rows sorted
+    adj_deg    [N]                       degree of A
+    gcn_rowptr [N+1], gcn_col, gcn_weight  D^-1/2 (A + I) D^-1/2 (GCNConv normalisation)
+A is symmetric, so the CSR arrays are also its CSC arrays (colptr = rowptr,
+row = col); see adjacency_tensor().
 """
 
-import json
+import warnings
 import torch
 import torch.nn.functional as F
 from torch_geometric.data import Data
@@ -13,8 +21,14 @@ from typing import Dict, List, Optional, Tuple
 from tqdm import tqdm
 import logging
 
+from src.utils.dataset_io import read_records
+
 logger = logging.getLogger(__name__)
 
+# Only these columns are read from the input (Parquet decodes nothing else).
+# raw_text is kept as the fallback used when clean_text is empty.
+GRAPH_COLUMNS = ['clean_text', 'raw_text', 'image_info.processed_path', 'label', 'split']
+
 # Label mappings
 LABEL_TO_IDX = {
     'TRUE': 0,
@@ -36,6 +50,84 @@ LABEL_TO_BINARY = {
 }
 
 
+ADJACENCY_KEYS = ('adj_rowptr', 'adj_col', 'adj_deg', 'gcn_rowptr', 'gcn_col', 'gcn_weight')
+
+
+def _rowptr(row: torch.Tensor, num_nodes: int) -> torch.Tensor:
+    rowptr = torch.zeros(num_nodes + 1, dtype=torch.long, device=row.device)
+    torch.cumsum(torch.bincount(row, minlength=num_nodes), 0, out=rowptr[1:])
+    return rowptr
+
+
+def build_adjacency(edge_index: torch.Tensor, num_nodes: int) -> Dict[str, torch.Tensor]:
+    """
+    Symmetrised, deduplicated, sorted CSR adjacency + GCN normalisation.
+    
+    Args:
+        edge_index: [2, E] edges (any order, duplicates / both directions allowed)
+        num_nodes: N
+        
+    Returns:
+        Dict with the ADJACENCY_KEYS tensors
+    """
+    src, dst = edge_index
+    row, col = torch.cat([src, dst]), torch.cat([dst, src])
+    keep = row != col
+    # unique() sorts: by row, then by column inside the row
+    key = torch.unique(row[keep] * num_nodes + col[keep])
+    row, col = key // num_nodes, key % num_nodes
+    deg = torch.bincount(row, minlength=num_nodes).float()
+    
+    # A + I: self loops merged into the sorted rows
+    loops = torch.arange(num_nodes, device=key.device)
+    gcn_key = torch.sort(torch.cat([key, loops * num_nodes + loops])).values
+    gcn_row, gcn_col = gcn_key // num_nodes, gcn_key % num_nodes
+    deg_inv_sqrt = (deg + 1).pow(-0.5)
+    
+    return {
+        'adj_rowptr': _rowptr(row, num_nodes),
+        'adj_col': col,
+        'adj_deg': deg,
+        'gcn_rowptr': _rowptr(gcn_row, num_nodes),
+        'gcn_col': gcn_col,
+        'gcn_weight': deg_inv_sqrt[gcn_row] * deg_inv_sqrt[gcn_col],
+    }
+
+
+def has_adjacency(graph: Data) -> bool:
+    return all(getattr(graph, key, None) is not None for key in ADJACENCY_KEYS)
+
+
+def adjacency_tensor(graph, normalized: bool = False, layout: str = 'csr') -> torch.Tensor:
+    """
+    Sparse [N, N] tensor from the cached arrays (no sorting, no copies).
+    
+    Args:
+        graph: Data (or dict) with the ADJACENCY_KEYS tensors
+        normalized: False -> A with values 1 (sum / mean aggregation), True -> GCN-normalised A + I
+        layout: 'csr' or 'csc' (same arrays, A is symmetric)
+    """
+    get = graph.get if isinstance(graph, dict) else lambda key: getattr(graph, key)
+    if normalized:
+        ptr, idx, values = get('gcn_rowptr'), get('gcn_col'), get('gcn_weight')
+    else:
+        ptr, idx = get('adj_rowptr'), get('adj_col')
+        values = torch.ones(idx.numel(), device=idx.device)
+    num_nodes = ptr.numel() - 1
+    build = torch.sparse_csc_tensor if layout == 'csc' else torch.sparse_csr_tensor
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # "sparse CSR is in beta" notice
+        return build(ptr, idx, values, size=(num_nodes, num_nodes), check_invariants=False)
+
+
+def symmetric_edge_index(graph) -> torch.Tensor:
+    """A as a [2, E'] edge_index (sorted by target, then source)."""
+    get = graph.get if isinstance(graph, dict) else lambda key: getattr(graph, key)
+    rowptr, col = get('adj_rowptr'), get('adj_col')
+    row = torch.repeat_interleave(torch.arange(rowptr.numel() - 1, device=col.device), rowptr.diff())
+    return torch.stack([col, row], dim=0)
+
+
 class InteractionGraphBuilder:
     """
     Build interaction graph with Top-K similarity edges.
@@ -133,8 +225,10 @@ class InteractionGraphBuilder:
                 edge_index = torch.stack([src, dst], dim=0)
                 
             except ImportError:
-                logger.warning("FAISS not installed, falling back to pytorch topk")
-                return self._compute_topk_edges(embeddings, k, edge_type)
+                logger.warning("FAISS not installed, falling back to chunked pytorch topk")
+                topk_indices = self._chunked_topk(embeddings, k)
+                src = torch.arange(N).unsqueeze(1).expand(-1, k).flatten()
+                edge_index = torch.stack([src, topk_indices.flatten()], dim=0)
         
         # Create edge attributes
         num_edges = edge_index.size(1)
@@ -142,23 +236,45 @@ class InteractionGraphBuilder:
         
         return edge_index, edge_attr
     
+    @staticmethod
+    def _chunked_topk(embeddings: torch.Tensor, k: int, chunk_size: int = 4096) -> torch.Tensor:
+        """
+        Exact cosine Top-K without the N x N matrix: [chunk, N] similarities at a time.
+        
+        Returns:
+            [N, k] neighbour indices (self excluded)
+        """
+        embeddings = F.normalize(embeddings.float(), p=2, dim=1)
+        N = embeddings.size(0)
+        out = torch.empty((N, k), dtype=torch.long)
+        for start in range(0, N, chunk_size):
+            end = min(start + chunk_size, N)
+            sim = embeddings[start:end] @ embeddings.t()
+            rows = torch.arange(end - start)
+            sim[rows, rows + start] = -float('inf')
+            out[start:end] = sim.topk(k, dim=1).indices
+        return out
+    
     def build_graph(
         self,
         data_path: str,
-        project_root: Optional[str] = None
+        project_root: Optional[str] = None,
+        splits: Optional[List[str]] = None
     ) -> Data:
         """
-        Build PyG Data object from merged JSONL.
+        Build PyG Data object from merged JSONL or Parquet.
         
         Args:
-            data_path: Path to merged JSONL file
+            data_path: Path to merged JSONL file or (split-partitioned) Parquet dataset
             project_root: Project root for resolving image paths
+            splits: Only keep these splits (pushed down to Parquet partitions); None = all
             
         Returns:
             PyG Data object with:
             - x: [N, text_dim + image_dim] node features
             - edge_index: [2, E] edges
             - edge_attr: [E, 1] edge types
+            - adj_* / gcn_*: symmetrised CSR adjacency (see add_adjacency)
             - y: [N] 6-class labels
             - y_binary: [N] binary labels
             - train_mask, val_mask, test_mask
@@ -173,16 +289,9 @@ class InteractionGraphBuilder:
         
         print(f"📖 Loading data from: {data_path}")
         
-        # Load records
-        records = []
-        with open(data_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        records.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
+        # Load records (projected to GRAPH_COLUMNS)
+        filters = {'split': splits} if splits else None
+        records = list(read_records(str(data_path), columns=GRAPH_COLUMNS, filters=filters))
         
         N = len(records)
         print(f"✓ Loaded {N} records")
@@ -271,9 +380,19 @@ class InteractionGraphBuilder:
             test_mask=test_mask,
             num_nodes=N
         )
+        self.add_adjacency(data)
         
         return data
     
+    @staticmethod
+    def add_adjacency(graph: Data) -> Data:
+        """Attach the symmetrised CSR adjacency (ADJACENCY_KEYS) to the graph, in place."""
+        for key, value in build_adjacency(graph.edge_index, graph.num_nodes).items():
+            setattr(graph, key, value)
+        print(f"✓ Symmetric adjacency: {graph.adj_col.numel()} entries "
+              f"(from {graph.edge_index.size(1)} directed edges), mean degree {graph.adj_deg.mean():.1f}")
+        return graph
+    
     def save_graph(self, graph: Data, output_path: str):
         """Save graph to .pt file."""
         output_path = Path(output_path)
@@ -0,0 +1,152 @@
+"""
+Memory-mappable weight snapshots for the embedding extractors.
+
+`from_pretrained` resolves the model on the Hub/cache, builds the model with
+randomly initialised weights and then copies the checkpoint into it - tens of
+seconds for XLM-R + CLIP on CPU, paid again by every fresh process
+(batch_pipeline.py, preprocessor_graph.py, build_final_graphs.py workers).
+
+A snapshot is a plain directory:
+    <root>/<model name, '/' -> '__'>/
+        config.json, tokenizer / processor files   (save_pretrained)
+        weights.pt   {'state': state_dict, 'buffers': non-persistent buffers}
+
+Loading builds the module on the meta device (no allocation, no random init)
+and assigns the tensors of weights.pt opened with torch.load(mmap=True), so
+start-up only maps the file; pages are read lazily by the first forward and
+shared through the page cache between processes.
+
+Usage:
+    python src/features/model_snapshot.py                      # XLM-R + CLIP into models/snapshots
+    python src/features/model_snapshot.py --text_model bert-base-multilingual-cased --image_model ''
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+
+import torch
+import torch.nn as nn
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_ROOT = os.environ.get('FAKENEWS_SNAPSHOT_DIR', 'models/snapshots')
+WEIGHTS_FILE = 'weights.pt'
+
+
+def snapshot_dir(model_name: str, root: Optional[str] = None) -> Path:
+    return Path(root or DEFAULT_SNAPSHOT_ROOT) / model_name.replace('/', '__')
+
+
+def has_snapshot(model_name: str, root: Optional[str] = None) -> bool:
+    return (snapshot_dir(model_name, root) / WEIGHTS_FILE).exists()
+
+
+def save_module(module: nn.Module, path: Path):
+    """Write state_dict + non-persistent buffers to one torch file (written to .tmp, then renamed)."""
+    state = module.state_dict()
+    buffers = {name: buf for name, buf in module.named_buffers() if name not in state}
+    tmp = path.with_suffix('.tmp')
+    torch.save({'state': state, 'buffers': buffers}, tmp)
+    os.replace(tmp, path)
+
+
+def load_module(build: Callable[[], nn.Module], path: Path) -> nn.Module:
+    """
+    Build a module without allocating weights and attach the memory-mapped ones.
+
+    Args:
+        build: Zero-argument constructor (e.g. lambda: AutoModel.from_config(config))
+        path: weights.pt written by save_module
+    """
+    snapshot = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    with torch.device('meta'):
+        module = build()
+    module.load_state_dict(snapshot['state'], assign=True, strict=True)
+    for name, buf in snapshot['buffers'].items():
+        owner, _, leaf = name.rpartition('.')
+        module.get_submodule(owner)._buffers[leaf] = buf
+    # Shared weights (e.g. tied embeddings) point at one mapped tensor again
+    if hasattr(module, 'tie_weights'):
+        module.tie_weights()
+    return module.eval()
+
+
+def save_text_snapshot(model_name: str, root: Optional[str] = None) -> Path:
+    from transformers import AutoModel, AutoTokenizer
+
+    out = snapshot_dir(model_name, root)
+    out.mkdir(parents=True, exist_ok=True)
+    model = AutoModel.from_pretrained(model_name)
+    model.config.save_pretrained(out)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out)
+    save_module(model, out / WEIGHTS_FILE)
+    return out
+
+
+def save_image_snapshot(model_name: str, root: Optional[str] = None) -> Path:
+    from transformers import CLIPModel, CLIPProcessor
+
+    out = snapshot_dir(model_name, root)
+    out.mkdir(parents=True, exist_ok=True)
+    model = CLIPModel.from_pretrained(model_name)
+    model.config.save_pretrained(out)
+    CLIPProcessor.from_pretrained(model_name).save_pretrained(out)
+    save_module(model, out / WEIGHTS_FILE)
+    return out
+
+
+def load_text_snapshot(model_name: str, root: Optional[str] = None):
+    """(model, tokenizer) from a snapshot, without touching the Hub."""
+    from transformers import AutoConfig, AutoModel, AutoTokenizer
+
+    path = snapshot_dir(model_name, root)
+    config = AutoConfig.from_pretrained(path)
+    model = load_module(lambda: AutoModel.from_config(config), path / WEIGHTS_FILE)
+    return model, AutoTokenizer.from_pretrained(path)
+
+
+def load_image_snapshot(model_name: str, root: Optional[str] = None):
+    """(model, processor) from a snapshot, without touching the Hub."""
+    from transformers import CLIPConfig, CLIPModel, CLIPProcessor
+
+    path = snapshot_dir(model_name, root)
+    config = CLIPConfig.from_pretrained(path)
+    model = load_module(lambda: CLIPModel(config), path / WEIGHTS_FILE)
+    return model, CLIPProcessor.from_pretrained(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build memory-mappable snapshots of the extractor models')
+    parser.add_argument('--text_model', default='xlm-roberta-base', help="Text model ('' = skip)")
+    parser.add_argument('--image_model', default='openai/clip-vit-base-patch32', help="CLIP model ('' = skip)")
+    parser.add_argument('--root', default=DEFAULT_SNAPSHOT_ROOT, help='Snapshot root directory')
+    args = parser.parse_args()
+
+    jobs = []
+    if args.text_model:
+        jobs.append((args.text_model, save_text_snapshot, load_text_snapshot))
+    if args.image_model:
+        jobs.append((args.image_model, save_image_snapshot, load_image_snapshot))
+
+    for name, save, load in jobs:
+        print(f"📦 Snapshot {name}")
+        start = time.perf_counter()
+        out = save(name, args.root)
+        print(f"   written to {out} in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        load(name, args.root)
+        print(f"   ✓ snapshot load: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,296 @@
-class PropagationExtractor: pass
\ No newline at end of file
+"""
+Propagation Feature Extractor.
+
+Computes cascade (comment tree) statistics for the `graph_features` field of
+EXTENDED_SCHEMA from the crawler's `cascade` lists (id, parent_id, user_id,
+timestamp, level).
+
+All cascades of a chunk are flattened into flat numpy arrays (one Python pass
+to map comment ids to indices), then every statistic is computed with array
+operations over all cascades at once:
+
+- cascade_size           number of comments
+- depth                  max reply depth (root post = 0)
+- max_breadth            max number of nodes on one depth level (root level counts)
+- structural_virality    Wiener index: mean shortest-path distance over all node
+                         pairs of the tree (Goel et al.), via sum_e s_e * (n - s_e)
+- reply_time_*           comment delay after the post (seconds): mean/median/p90/first
+- parent_reply_time_median  delay between a comment and the node it replies to
+- unique_user_ratio      distinct commenters / comments with a user
+- early_ratio_<w>, early_rate_<w>  share of comments / comments per hour within window w
+
+A comment whose parent is not an earlier comment of the same cascade (missing
+parent, or listed after its reply) is attached to the root post. The crawler
+emits comments in DFS order, so parents always come first there.
+
+Usage:
+    extractor = PropagationExtractor()
+    features = extractor.extract(item)              # dict for item['graph_features']
+    for item in extractor.enrich(items):            # items with graph_features filled
+        ...
+"""
+
+import sys
+import time
+import argparse
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Early-burst windows (label -> seconds after the post)
+DEFAULT_EARLY_WINDOWS = {'10m': 600, '1h': 3600, '6h': 6 * 3600}
+
+
+def _segment_sum(values: np.ndarray, segments: np.ndarray, num_segments: int) -> np.ndarray:
+    return np.bincount(segments, weights=values, minlength=num_segments)
+
+
+def _segment_quantiles(values: np.ndarray, segments: np.ndarray, num_segments: int,
+                       quantiles: List[float]) -> Dict[float, np.ndarray]:
+    """Per-segment quantiles (linear interpolation, like np.quantile); NaN for empty segments."""
+    out = {q: np.full(num_segments, np.nan) for q in quantiles}
+    if values.size == 0:
+        return out
+    order = np.lexsort((values, segments))
+    sorted_values = values[order]
+    counts = np.bincount(segments, minlength=num_segments)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    has = counts > 0
+    for q in quantiles:
+        pos = q * (counts[has] - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        v_lo = sorted_values[starts[has] + lo]
+        v_hi = sorted_values[starts[has] + hi]
+        out[q][has] = v_lo + (v_hi - v_lo) * (pos - lo)
+    return out
+
+
+class PropagationExtractor:
+    """
+    Vectorised propagation statistics over many cascades.
+    """
+
+    def __init__(self, early_windows: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            early_windows: {label: seconds} windows for early-burst features
+        """
+        self.early_windows = early_windows or DEFAULT_EARLY_WINDOWS
+
+    def _flatten(self, items: List[Dict]) -> Dict[str, np.ndarray]:
+        """
+        One pass over all comments: node arrays for every cascade in items.
+
+        Node 0 of each cascade is the post itself (its own parent).
+        """
+        sizes, parent, timestamp, user = [], [], [], []
+        user_codes: Dict = {}
+        # Bind hot methods once: this loop touches every comment
+        add_parent, add_ts, add_user = parent.append, timestamp.append, user.append
+        next_code = user_codes.setdefault
+
+        idx = 0
+        for item in items:
+            root = idx
+            add_parent(root)
+            add_ts(item.get('timestamp') or 0)
+            add_user(-1)  # the poster is not counted as a commenter
+            idx += 1
+
+            local = {}
+            comments = item.get('cascade') or []
+            for comment in comments:
+                add_parent(local.get(comment.get('parent_id'), root))
+                local[comment.get('id')] = idx
+                add_ts(comment.get('timestamp') or 0)
+                u = comment.get('user_id')
+                add_user(-1 if u is None else next_code(u, len(user_codes)))
+                idx += 1
+            sizes.append(len(comments) + 1)
+
+        return {
+            'cascade': np.repeat(np.arange(len(items), dtype=np.int64), sizes),
+            'parent': np.asarray(parent, dtype=np.int64),
+            'timestamp': np.asarray(timestamp, dtype=np.float64),
+            'user': np.asarray(user, dtype=np.int64),
+        }
+
+    @staticmethod
+    def _depths(parent: np.ndarray) -> np.ndarray:
+        """Depth of every node by pointer jumping (O(log depth) vector steps)."""
+        nodes = np.arange(parent.size)
+        dist = (parent != nodes).astype(np.int64)
+        anc = parent.copy()
+        while True:
+            anc_of_anc = anc[anc]
+            if np.array_equal(anc_of_anc, anc):
+                return dist
+            dist = dist + dist[anc]
+            anc = anc_of_anc
+
+    @staticmethod
+    def _subtree_sizes(parent: np.ndarray, depth: np.ndarray) -> np.ndarray:
+        """Subtree size of every node, accumulated level by level from the deepest level up."""
+        size = np.ones(parent.size, dtype=np.int64)
+        order = np.argsort(depth, kind='stable')
+        level_starts = np.searchsorted(depth[order], np.arange(depth.max(initial=0) + 2))
+        for d in range(depth.max(initial=0), 0, -1):
+            nodes = order[level_starts[d]:level_starts[d + 1]]
+            size += np.bincount(parent[nodes], weights=size[nodes], minlength=parent.size).astype(np.int64)
+        return size
+
+    def extract_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        Compute propagation features for many items at once.
+
+        Args:
+            items: News items with 'timestamp' and 'cascade'
+
+        Returns:
+            One feature dict per item (same order)
+        """
+        num = len(items)
+        if num == 0:
+            return []
+        arrays = self._flatten(items)
+        cascade, parent, ts, user = arrays['cascade'], arrays['parent'], arrays['timestamp'], arrays['user']
+        is_comment = parent != np.arange(parent.size)
+
+        # --- Structure ---
+        depth = self._depths(parent)
+        n_nodes = np.bincount(cascade, minlength=num)
+        cascade_size = n_nodes - 1
+        max_depth = np.zeros(num, dtype=np.int64)
+        np.maximum.at(max_depth, cascade, depth)
+
+        level_key = cascade * (depth.max(initial=0) + 1) + depth
+        keys, level_counts = np.unique(level_key, return_counts=True)
+        max_breadth = np.zeros(num, dtype=np.int64)
+        np.maximum.at(max_breadth, keys // (depth.max(initial=0) + 1), level_counts)
+
+        # Wiener index of a tree: every edge (child c) lies on s_c * (n - s_c) paths
+        size = self._subtree_sizes(parent, depth)
+        edge_paths = (size * (n_nodes[cascade] - size)).astype(np.float64) * is_comment
+        wiener = _segment_sum(edge_paths, cascade, num)
+        pairs = n_nodes * (n_nodes - 1) / 2.0
+        virality = np.divide(wiener, pairs, out=np.zeros(num), where=pairs > 0)
+
+        # --- Timing (timestamps <= 0 are missing) ---
+        roots = np.flatnonzero(~is_comment)  # one per cascade, in cascade order
+        root_ts = ts[roots][cascade]
+        valid = is_comment & (ts > 0) & (root_ts > 0)
+        delays = np.maximum(ts[valid] - root_ts[valid], 0.0)
+        delay_seg = cascade[valid]
+        n_timed = np.bincount(delay_seg, minlength=num)
+        mean_delay = np.divide(_segment_sum(delays, delay_seg, num), n_timed,
+                               out=np.full(num, np.nan), where=n_timed > 0)
+        delay_q = _segment_quantiles(delays, delay_seg, num, [0.0, 0.5, 0.9])
+
+        parent_valid = is_comment & (ts > 0) & (ts[parent] > 0)
+        parent_delays = np.maximum(ts[parent_valid] - ts[parent][parent_valid], 0.0)
+        parent_q = _segment_quantiles(parent_delays, cascade[parent_valid], num, [0.5])
+
+        early = {}
+        for label, window in self.early_windows.items():
+            count = np.bincount(delay_seg[delays <= window], minlength=num)
+            early[f'early_ratio_{label}'] = np.divide(count, n_timed, out=np.full(num, np.nan), where=n_timed > 0)
+            early[f'early_rate_{label}'] = np.where(n_timed > 0, count / (window / 3600.0), np.nan)
+
+        # --- Users ---
+        has_user = is_comment & (user >= 0)
+        n_with_user = np.bincount(cascade[has_user], minlength=num)
+        pair_keys = np.unique(cascade[has_user] * (user.max(initial=0) + 1) + user[has_user])
+        n_unique = np.bincount(pair_keys // (user.max(initial=0) + 1), minlength=num)
+        unique_ratio = np.divide(n_unique, n_with_user, out=np.full(num, np.nan), where=n_with_user > 0)
+
+        columns = {
+            'cascade_size': cascade_size,
+            'depth': max_depth,
+            'max_breadth': max_breadth,
+            'structural_virality': virality,
+            'reply_time_mean': mean_delay,
+            'reply_time_median': delay_q[0.5],
+            'reply_time_p90': delay_q[0.9],
+            'first_reply_time': delay_q[0.0],
+            'parent_reply_time_median': parent_q[0.5],
+            'unique_user_ratio': unique_ratio,
+            **early,
+        }
+        int_columns = {'cascade_size', 'depth', 'max_breadth'}
+
+        # Convert column-wise (tolist) instead of indexing numpy scalars per item
+        lists = {}
+        for name, values in columns.items():
+            if name in int_columns:
+                lists[name] = values.astype(np.int64).tolist()
+            else:
+                # NaN (không có dữ liệu thời gian / user) -> None để JSON hợp lệ
+                lists[name] = [None if v != v else v for v in np.round(values.astype(np.float64), 4).tolist()]
+
+        names = list(lists)
+        return [dict(zip(names, row)) for row in zip(*lists.values())]
+
+    def extract(self, item: Dict) -> Dict:
+        """Propagation features of a single item."""
+        return self.extract_batch([item])[0]
+
+    def enrich(self, items: Iterable[Dict], chunk_size: int = 10000) -> Iterator[Dict]:
+        """
+        Stream items with item['graph_features'] updated (existing keys are kept).
+        """
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield from self._enrich_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._enrich_chunk(chunk)
+
+    def _enrich_chunk(self, chunk: List[Dict]) -> List[Dict]:
+        for item, features in zip(chunk, self.extract_batch(chunk)):
+            graph_features = item.get('graph_features') or {}
+            graph_features.update(features)
+            item['graph_features'] = graph_features
+        return chunk
+
+
+def main():
+    # Add project root to path
+    project_root = str(Path(__file__).resolve().parent.parent.parent)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from src.utils.dataset_io import read_records, write_records
+
+    parser = argparse.ArgumentParser(description='Fill graph_features with cascade propagation statistics')
+    parser.add_argument('--input', default='data/reddit_enriched_data.jsonl', help='JSONL/Parquet with cascades')
+    parser.add_argument('--output', default='data/reddit_propagation_data.jsonl', help='Output JSONL/Parquet')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Items per vectorised chunk')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    extractor = PropagationExtractor()
+
+    start = time.perf_counter()
+    stats = {'items': 0, 'comments': 0}
+
+    def counted(records):
+        for record in records:
+            stats['items'] += 1
+            stats['comments'] += len(record.get('cascade') or [])
+            yield record
+
+    write_records(extractor.enrich(counted(read_records(args.input)), chunk_size=args.chunk_size), args.output)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {stats['items']} posts / {stats['comments']} comments in {elapsed:.2f}s "
+          f"({stats['comments'] / max(elapsed, 1e-9):,.0f} comments/sec)")
+    print(f"💾 Output: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
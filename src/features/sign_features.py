@@ -0,0 +1,186 @@
+"""
+SIGN-style precomputed propagated features.
+
+For a fixed graph the hops A^k·X (k = 0..K) do not depend on model weights,
+so they are computed once and stored memory-mapped; a plain MLP then trains
+on mini-batches of rows without touching the graph (Frasca et al., SIGN).
+
+A is the GCN-normalised adjacency with self loops, D^-1/2 (A + I) D^-1/2,
+aggregating along edge direction (source -> target) like GCNConv.
+
+Layout (cached next to the graph file, e.g. data/04_graph/fakeddit_graph.sign3/):
+    features.npy   float32 [N, (K + 1) * D], row i = [x_i | (A x)_i | ... | (A^K x)_i]
+    meta.json      num_nodes, dim, num_hops, graph stamp (size + mtime); written last
+
+One row holds every hop of a node, so a mini-batch is one sorted row gather.
+
+Usage:
+    features = SignFeatures.load_or_compute('data/04_graph/fakeddit_graph.pt', data, num_hops=3)
+    batch = features.rows(node_ids)   # torch.FloatTensor [B, (K + 1) * D]
+"""
+
+import os
+import json
+import time
+import logging
+import warnings
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import torch
+from torch_geometric.nn.conv.gcn_conv import gcn_norm
+
+logger = logging.getLogger(__name__)
+
+
+def sign_cache_dir(graph_path: Union[str, Path], num_hops: int) -> Path:
+    """<graph>.sign<K>/ next to the graph file."""
+    graph_path = Path(graph_path)
+    return graph_path.with_name(f"{graph_path.stem}.sign{num_hops}")
+
+
+def graph_stamp(graph_path: Union[str, Path]) -> str:
+    st = os.stat(graph_path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def normalized_adjacency(edge_index: torch.Tensor, num_nodes: int) -> torch.Tensor:
+    """
+    D^-1/2 (A + I) D^-1/2 as a CSR tensor [N, N] (row = target, col = source).
+    """
+    # Same normalisation as GCNConv (remaining self loops, in-degree of the target)
+    edge_index, values = gcn_norm(edge_index, None, num_nodes, add_self_loops=True)
+    row, col = edge_index[1], edge_index[0]
+
+    order = torch.argsort(row * num_nodes + col)
+    row, col, values = row[order], col[order], values[order]
+    crow = torch.zeros(num_nodes + 1, dtype=torch.long, device=row.device)
+    torch.cumsum(torch.bincount(row, minlength=num_nodes), 0, out=crow[1:])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # "sparse CSR is in beta" notice
+        return torch.sparse_csr_tensor(crow, col, values, size=(num_nodes, num_nodes), check_invariants=False)
+
+
+class SignFeatures:
+    """
+    Memory-mapped [N, (K + 1) * D] matrix of propagated features.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        Args:
+            root: Cache directory written by SignFeatures.compute
+        """
+        self.root = Path(root)
+        with open(self.root / 'meta.json', 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.num_nodes = self.meta['num_nodes']
+        self.dim = self.meta['dim']
+        self.num_hops = self.meta['num_hops']
+        self._features = None
+
+    @property
+    def features(self) -> np.ndarray:
+        # Mở lazy: mỗi worker process tự mmap file
+        if self._features is None:
+            self._features = np.load(self.root / 'features.npy', mmap_mode='r')
+        return self._features
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_features'] = None
+        return state
+
+    @property
+    def feature_dim(self) -> int:
+        return (self.num_hops + 1) * self.dim
+
+    def rows(self, idx) -> torch.Tensor:
+        """Rows of the given nodes (gathered in sorted order, returned in the requested order)."""
+        idx = np.asarray(idx, dtype=np.int64)
+        order = np.argsort(idx, kind='stable')
+        out = np.empty((idx.size, self.feature_dim), dtype=np.float32)
+        out[order] = self.features[idx[order]]
+        return torch.from_numpy(out)
+
+    @classmethod
+    def compute(
+        cls,
+        x: torch.Tensor,
+        edge_index: torch.Tensor,
+        root: Union[str, Path],
+        num_hops: int = 3,
+        stamp: Optional[str] = None,
+        chunk_size: int = 65536
+    ) -> 'SignFeatures':
+        """
+        Compute A^k·X for k = 0..num_hops and write them to root/.
+
+        Args:
+            x: Node features [N, D]
+            edge_index: Edge indices [2, E]
+            root: Output directory
+            num_hops: K
+            stamp: Graph stamp stored in meta.json (cache validation)
+            chunk_size: Rows per write
+        """
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        meta_path = root / 'meta.json'
+        if meta_path.exists():
+            meta_path.unlink()  # meta.json is the commit point
+
+        start = time.perf_counter()
+        x = x.detach().to('cpu', torch.float)
+        num_nodes, dim = x.shape
+        adj = normalized_adjacency(edge_index.cpu(), num_nodes)
+
+        tmp_path = root / 'features.tmp.npy'
+        out = np.lib.format.open_memmap(str(tmp_path), mode='w+', dtype=np.float32,
+                                        shape=(num_nodes, (num_hops + 1) * dim))
+        h = x
+        for k in range(num_hops + 1):
+            if k > 0:
+                h = adj @ h
+            block = slice(k * dim, (k + 1) * dim)
+            for s in range(0, num_nodes, chunk_size):
+                out[s:s + chunk_size, block] = h[s:s + chunk_size].numpy()
+            logger.info(f"SIGN hop {k}/{num_hops} done ({time.perf_counter() - start:.1f}s)")
+        out.flush()
+        del out
+        os.replace(tmp_path, root / 'features.npy')
+
+        meta = {
+            'num_nodes': int(num_nodes),
+            'dim': int(dim),
+            'num_hops': int(num_hops),
+            'normalization': 'gcn_sym_self_loops',
+            'graph_stamp': stamp,
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        return cls(root)
+
+    @classmethod
+    def load_or_compute(
+        cls,
+        graph_path: Union[str, Path],
+        data,
+        num_hops: int = 3,
+        force: bool = False
+    ) -> 'SignFeatures':
+        """
+        Reuse <graph>.sign<K>/ if it was built from the same graph file, otherwise (re)compute.
+        """
+        root = sign_cache_dir(graph_path, num_hops)
+        stamp = graph_stamp(graph_path)
+        if not force and (root / 'meta.json').exists():
+            cached = cls(root)
+            if cached.meta.get('graph_stamp') == stamp and cached.num_nodes == data.num_nodes:
+                logger.info(f"Using cached SIGN features: {root}")
+                return cached
+        logger.info(f"Precomputing SIGN features (K={num_hops}) -> {root}")
+        return cls.compute(data.x, data.edge_index, root, num_hops=num_hops, stamp=stamp)
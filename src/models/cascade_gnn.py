@@ -7,9 +7,11 @@ Heterogeneous GNN for 6-class classification with binary evaluation support.
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from torch_geometric.nn import GATConv, SAGEConv, GCNConv
+from torch_geometric.nn import GATConv, SAGEConv, GCNConv, global_mean_pool, global_max_pool
 from typing import Optional, Tuple
 
+from src.models.relational_conv import RelationalConv
+
 
 class MultiModalFakeNewsGNN(nn.Module):
     """
@@ -17,7 +19,8 @@ class MultiModalFakeNewsGNN(nn.Module):
     
     Architecture:
     1. Input projection layers for text/image features
-    2. GNN message passing layers (GAT/SAGE/GCN)
+    2. GNN message passing layers (GAT/SAGE/GCN, or relation-aware 'rgcn'
+       that aggregates text and image edges separately via edge_attr)
     3. MLP classifier for 6-class output
     
     Supports:
@@ -32,8 +35,9 @@ class MultiModalFakeNewsGNN(nn.Module):
         num_classes: int = 6,
         num_layers: int = 2,
         dropout: float = 0.3,
-        gnn_type: str = 'gat',  # 'gat', 'sage', or 'gcn'
-        heads: int = 4  # For GAT
+        gnn_type: str = 'gat',  # 'gat', 'sage', 'gcn', or 'rgcn'
+        heads: int = 4,  # For GAT
+        num_relations: int = 2  # For RGCN: edge types (0 = text, 1 = image)
     ):
         """
         Args:
@@ -42,8 +46,9 @@ class MultiModalFakeNewsGNN(nn.Module):
             num_classes: Number of output classes (6)
             num_layers: Number of GNN layers
             dropout: Dropout rate
-            gnn_type: Type of GNN layer ('gat', 'sage', 'gcn')
+            gnn_type: Type of GNN layer ('gat', 'sage', 'gcn', 'rgcn')
             heads: Number of attention heads (for GAT)
+            num_relations: Number of edge types in edge_attr (for RGCN)
         """
         super().__init__()
         
@@ -73,6 +78,10 @@ class MultiModalFakeNewsGNN(nn.Module):
                 self.gnn_layers.append(
                     SAGEConv(in_dim, out_dim)
                 )
+            elif gnn_type == 'rgcn':
+                self.gnn_layers.append(
+                    RelationalConv(in_dim, out_dim, num_relations=num_relations)
+                )
             else:  # gcn
                 self.gnn_layers.append(
                     GCNConv(in_dim, out_dim)
@@ -103,31 +112,61 @@ class MultiModalFakeNewsGNN(nn.Module):
         Args:
             x: Node features [N, input_dim]
             edge_index: Edge indices [2, E]
-            edge_attr: Edge attributes [E, 1] (optional, for future use)
+            edge_attr: Edge types [E, 1] (optional, used by 'rgcn')
             
         Returns:
             Logits [N, num_classes]
         """
-        # Input projection
-        h = self.input_proj(x)
-        h = F.relu(h)
-        h = F.dropout(h, p=self.dropout, training=self.training)
-        
-        # GNN layers with residual connections
-        for i, gnn in enumerate(self.gnn_layers):
-            h_new = gnn(h, edge_index)
-            h_new = self.layer_norms[i](h_new)
-            h_new = F.relu(h_new)
-            h_new = F.dropout(h_new, p=self.dropout, training=self.training)
-            
-            # Residual connection
-            h = h + h_new
+        h = self.encode(x, edge_index, apply_dropout=self.training, edge_attr=edge_attr)
         
         # Classifier
         logits = self.classifier(h)
         
         return logits
     
+    def input_layer(self, x: torch.Tensor, apply_dropout: bool = False) -> torch.Tensor:
+        """Input projection (node-wise)."""
+        h = F.relu(self.input_proj(x))
+        return F.dropout(h, p=self.dropout, training=apply_dropout)
+    
+    def layer_update(self, i: int, h: torch.Tensor, h_new: torch.Tensor, apply_dropout: bool = False) -> torch.Tensor:
+        """Node-wise part of GNN layer i: LayerNorm -> ReLU -> dropout -> residual."""
+        h_new = self.layer_norms[i](h_new)
+        h_new = F.relu(h_new)
+        h_new = F.dropout(h_new, p=self.dropout, training=apply_dropout)
+        return h + h_new
+    
+    def conv(
+        self,
+        i: int,
+        h: torch.Tensor,
+        edge_index: torch.Tensor,
+        edge_attr: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        """Message passing of GNN layer i (edge types only reach the relational layer)."""
+        if self.gnn_type == 'rgcn':
+            return self.gnn_layers[i](h, edge_index, edge_attr)
+        return self.gnn_layers[i](h, edge_index)
+    
+    def encode(
+        self,
+        x: torch.Tensor,
+        edge_index: torch.Tensor,
+        apply_dropout: bool = False,
+        edge_attr: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        """
+        Node representations before the classifier [N, hidden_dim].
+        """
+        # Input projection
+        h = self.input_layer(x, apply_dropout)
+        
+        # GNN layers with residual connections
+        for i in range(self.num_layers):
+            h = self.layer_update(i, h, self.conv(i, h, edge_index, edge_attr), apply_dropout)
+        
+        return h
+    
     def predict(
         self,
         x: torch.Tensor,
@@ -151,7 +190,8 @@ class MultiModalFakeNewsGNN(nn.Module):
     def get_embeddings(
         self,
         x: torch.Tensor,
-        edge_index: torch.Tensor
+        edge_index: torch.Tensor,
+        edge_attr: Optional[torch.Tensor] = None
     ) -> torch.Tensor:
         """
         Get node embeddings before classifier.
@@ -159,16 +199,111 @@ class MultiModalFakeNewsGNN(nn.Module):
         Returns:
             Node embeddings [N, hidden_dim]
         """
-        h = self.input_proj(x)
-        h = F.relu(h)
+        return self.encode(x, edge_index, apply_dropout=False, edge_attr=edge_attr)
+
+
+class CascadeGraphClassifier(nn.Module):
+    """
+    Graph-level classifier for propagation cascades (one graph per post).
+    
+    Architecture:
+    1. Input projection of node text embeddings
+    2. GNN message passing layers (GAT/SAGE/GCN) with residuals, over the cascade
+       edges in both directions (parent -> child and child -> parent)
+    3. Readout: [root node || mean pool || max pool] (+ optional graph-level features);
+       the root state aggregates its replies through the child -> parent edges
+    4. MLP classifier (default: binary True/Fake)
+    
+    Works on disjoint-union batches (x, edge_index, batch, ptr).
+    """
+    
+    def __init__(
+        self,
+        input_dim: int = 768,
+        hidden_dim: int = 128,
+        num_classes: int = 2,
+        num_layers: int = 2,
+        dropout: float = 0.3,
+        gnn_type: str = 'sage',
+        heads: int = 4,
+        graph_attr_dim: int = 0
+    ):
+        """
+        Args:
+            input_dim: Node feature dimension (XLM-R: 768)
+            hidden_dim: Hidden layer dimension
+            num_classes: Number of output classes
+            num_layers: Number of GNN layers
+            dropout: Dropout rate
+            gnn_type: Type of GNN layer ('gat', 'sage', 'gcn')
+            heads: Number of attention heads (for GAT)
+            graph_attr_dim: Size of graph-level feature vector (e.g. propagation features), 0 = none
+        """
+        super().__init__()
+        self.dropout = dropout
+        self.graph_attr_dim = graph_attr_dim
+        
+        self.input_proj = nn.Linear(input_dim, hidden_dim)
+        self.gnn_layers = nn.ModuleList()
+        for _ in range(num_layers):
+            if gnn_type == 'gat':
+                self.gnn_layers.append(GATConv(hidden_dim, hidden_dim // heads, heads=heads, dropout=dropout))
+            elif gnn_type == 'sage':
+                self.gnn_layers.append(SAGEConv(hidden_dim, hidden_dim))
+            else:  # gcn
+                self.gnn_layers.append(GCNConv(hidden_dim, hidden_dim))
+        self.layer_norms = nn.ModuleList([nn.LayerNorm(hidden_dim) for _ in range(num_layers)])
+        
+        readout_dim = 3 * hidden_dim
+        if graph_attr_dim:
+            self.graph_attr_proj = nn.Sequential(nn.Linear(graph_attr_dim, hidden_dim), nn.ReLU())
+            readout_dim += hidden_dim
+        
+        self.classifier = nn.Sequential(
+            nn.Linear(readout_dim, hidden_dim),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(hidden_dim, num_classes)
+        )
+    
+    def forward(
+        self,
+        x: torch.Tensor,
+        edge_index: torch.Tensor,
+        batch: torch.Tensor,
+        ptr: torch.Tensor,
+        graph_attr: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        """
+        Args:
+            x: Node features [N, input_dim]
+            edge_index: Edge indices [2, E] (disjoint union, parent -> child)
+            batch: Graph index of every node [N]
+            ptr: Graph node offsets [B + 1] (node ptr[i] is the root post of graph i)
+            graph_attr: Graph-level features [B, graph_attr_dim] (optional)
+            
+        Returns:
+            Logits [B, num_classes]
+        """
+        h = F.relu(self.input_proj(x))
+        h = F.dropout(h, p=self.dropout, training=self.training)
         
+        # Cascade edges point away from the root: add the reverse direction so replies reach it
+        edge_index = torch.cat([edge_index, edge_index.flip(0)], dim=1)
         for i, gnn in enumerate(self.gnn_layers):
-            h_new = gnn(h, edge_index)
-            h_new = self.layer_norms[i](h_new)
-            h_new = F.relu(h_new)
+            h_new = F.relu(self.layer_norms[i](gnn(h, edge_index)))
+            h_new = F.dropout(h_new, p=self.dropout, training=self.training)
             h = h + h_new
         
-        return h
+        num_graphs = ptr.numel() - 1
+        readout = [
+            h[ptr[:-1]],
+            global_mean_pool(h, batch, size=num_graphs),
+            global_max_pool(h, batch, size=num_graphs),
+        ]
+        if self.graph_attr_dim:
+            readout.append(self.graph_attr_proj(graph_attr))
+        return self.classifier(torch.cat(readout, dim=-1))
 
 
 def create_model(
@@ -0,0 +1,172 @@
+"""
+Cached layer-wise inference for MultiModalFakeNewsGNN.
+
+One pass computes the node representations layer by layer (no autograd graph,
+node-wise parts in chunks of `chunk_size` nodes) and caches them together with
+the logits. Predictions, binary predictions and embeddings for any mask are
+then served from that single pass until the weights or the inputs change.
+
+The cache key uses each parameter's storage pointer and in-place version
+counter, so optimizer.step() / load_state_dict() invalidate it automatically.
+Inputs are matched by identity (weak references, not addresses that a new
+tensor may reuse) at the same version.
+
+Usage:
+    engine = GNNInferenceEngine(model)
+    pred_6, pred_bin = engine.predict(data.x, data.edge_index)
+    val_logits = engine.logits(data.x, data.edge_index)[data.val_mask]
+    engine.export_embeddings(data.x, data.edge_index, 'data/04_graph/embeddings.npy')
+"""
+
+import weakref
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+
+from src.models.cascade_gnn import MultiModalFakeNewsGNN
+
+# classes 0,1,2 -> 0 (True), classes 3,4,5 -> 1 (Fake)
+BINARY_FAKE_FROM = 3
+
+
+class GNNInferenceEngine:
+    """
+    Single-pass, cached inference over the whole graph.
+    """
+
+    def __init__(self, model: MultiModalFakeNewsGNN, chunk_size: int = 65536):
+        """
+        Args:
+            model: Trained (or training) MultiModalFakeNewsGNN
+            chunk_size: Nodes per chunk for the node-wise ops (projection, LayerNorm, classifier)
+        """
+        self.model = model
+        self.chunk_size = chunk_size
+        self._key = None
+        # Weak references to (x, edge_index, edge_attr) of the cached pass
+        self._input_refs = None
+        self._embeddings: Optional[torch.Tensor] = None
+        self._logits: Optional[torch.Tensor] = None
+        self.passes = 0
+
+    def _cache_key(self, x: torch.Tensor, edge_index: torch.Tensor, edge_attr: Optional[torch.Tensor]) -> Tuple:
+        state = tuple(
+            (t.data_ptr(), t._version)
+            for t in list(self.model.parameters()) + list(self.model.buffers())
+        )
+        inputs = tuple(self._tensor_version(t) for t in (x, edge_index, edge_attr))
+        return state, inputs
+
+    @staticmethod
+    def _tensor_version(t: Optional[torch.Tensor]):
+        if t is None:
+            return None
+        if t.layout == torch.sparse_csr:
+            # e.g. the CSR adjacency of the fast training path (no single storage)
+            return (t.values()._version, tuple(t.shape))
+        return (t._version, tuple(t.shape))
+
+    @staticmethod
+    def _refs(*tensors: Optional[torch.Tensor]) -> Tuple:
+        return tuple(None if t is None else weakref.ref(t) for t in tensors)
+
+    def _same_inputs(self, *tensors: Optional[torch.Tensor]) -> bool:
+        if self._input_refs is None:
+            return False
+        return all(
+            (ref is None) if t is None else (ref is not None and ref() is t)
+            for ref, t in zip(self._input_refs, tensors)
+        )
+
+    def invalidate(self):
+        self._key = None
+        self._input_refs = None
+        self._embeddings = None
+        self._logits = None
+
+    def _chunked(self, fn, h: torch.Tensor, out_dim: int) -> torch.Tensor:
+        out = h.new_empty((h.size(0), out_dim))
+        for start in range(0, h.size(0), self.chunk_size):
+            end = start + self.chunk_size
+            out[start:end] = fn(h[start:end], start, end)
+        return out
+
+    @torch.no_grad()
+    def run(
+        self,
+        x: torch.Tensor,
+        edge_index: torch.Tensor,
+        edge_attr: Optional[torch.Tensor] = None
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Compute (or return cached) embeddings [N, hidden_dim] and logits [N, num_classes].
+        """
+        key = self._cache_key(x, edge_index, edge_attr)
+        if key == self._key and self._same_inputs(x, edge_index, edge_attr):
+            return self._embeddings, self._logits
+
+        model = self.model
+        was_training = model.training
+        model.eval()
+        try:
+            hidden = model.hidden_dim
+            h = self._chunked(lambda xc, s, e: model.input_layer(xc), x, hidden)
+            # One layer at a time over all nodes; only the current h is kept
+            for i in range(model.num_layers):
+                h_new = model.conv(i, h, edge_index, edge_attr)
+                h = self._chunked(lambda hc, s, e, i=i, hn=h_new: model.layer_update(i, hc, hn[s:e]), h, hidden)
+                del h_new
+            logits = self._chunked(lambda hc, s, e: model.classifier(hc), h, model.num_classes)
+        finally:
+            model.train(was_training)
+
+        self._key = self._cache_key(x, edge_index, edge_attr)
+        self._input_refs = self._refs(x, edge_index, edge_attr)
+        self._embeddings, self._logits = h, logits
+        self.passes += 1
+        return h, logits
+
+    def logits(self, x: torch.Tensor, edge_index: torch.Tensor, edge_attr: Optional[torch.Tensor] = None) -> torch.Tensor:
+        return self.run(x, edge_index, edge_attr)[1]
+
+    def embeddings(self, x: torch.Tensor, edge_index: torch.Tensor, edge_attr: Optional[torch.Tensor] = None) -> torch.Tensor:
+        return self.run(x, edge_index, edge_attr)[0]
+
+    def predict(
+        self,
+        x: torch.Tensor,
+        edge_index: torch.Tensor,
+        edge_attr: Optional[torch.Tensor] = None
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Returns:
+            (pred_6class, pred_binary)
+        """
+        pred_6class = self.logits(x, edge_index, edge_attr).argmax(dim=-1)
+        pred_binary = (pred_6class >= BINARY_FAKE_FROM).long()
+        return pred_6class, pred_binary
+
+    def export_embeddings(
+        self,
+        x: torch.Tensor,
+        edge_index: torch.Tensor,
+        path: str,
+        dtype: str = 'float32',
+        edge_attr: Optional[torch.Tensor] = None
+    ) -> np.memmap:
+        """
+        Write embeddings to a .npy file (written through a memory map, chunk by chunk).
+
+        Load with np.load(path, mmap_mode='r').
+        """
+        embeddings = self.embeddings(x, edge_index, edge_attr)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        out = np.lib.format.open_memmap(str(path), mode='w+', dtype=dtype, shape=tuple(embeddings.shape))
+        for start in range(0, embeddings.size(0), self.chunk_size):
+            end = start + self.chunk_size
+            out[start:end] = embeddings[start:end].float().cpu().numpy()
+        out.flush()
+        return out
@@ -0,0 +1,245 @@
+"""
+Relation-aware message passing for the interaction graph.
+
+InteractionGraphBuilder labels every edge with its relation in `edge_attr`
+(0 = text similarity, 1 = image similarity). RelationalConv keeps the two
+relations apart (R-GCN style, mean aggregation per relation):
+
+    h_i' = W_root x_i + sum_r mean_{j in N_r(i)} W_r x_j
+
+Efficient layout:
+- Edges are sorted once (cached per edge_index) by (destination, relation),
+  giving one CSR adjacency of shape [N * R, N] whose row (i, r) holds the
+  relation-r in-neighbours of node i with weight 1 / deg_r(i).
+- One sparse-dense matmul aggregates every relation at once (mean of the
+  neighbours' features per (node, relation) row); no Python loop over types.
+- The [N, R * in_dim] result goes through one Linear holding [W_0 | W_1 | ...].
+
+Usage:
+    conv = RelationalConv(256, 256, num_relations=2)
+    out = conv(h, data.edge_index, data.edge_attr)
+
+CPU benchmark against the GAT/SAGE/GCN paths of MultiModalFakeNewsGNN:
+    python src/models/relational_conv.py --nodes 20000 --edges 400000
+    python src/models/relational_conv.py --graph data/04_graph/fakeddit_graph.pt
+"""
+
+import sys
+import time
+import weakref
+import warnings
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import torch
+import torch.nn as nn
+
+
+class RelationalConv(nn.Module):
+    """
+    Typed (per-relation) mean aggregation with a root weight.
+    """
+
+    def __init__(self, in_dim: int, out_dim: int, num_relations: int = 2, bias: bool = True):
+        """
+        Args:
+            in_dim: Input feature dimension
+            out_dim: Output feature dimension
+            num_relations: Number of edge types (text / image = 2)
+            bias: Add bias to the root transform
+        """
+        super().__init__()
+        self.in_dim = in_dim
+        self.out_dim = out_dim
+        self.num_relations = num_relations
+
+        # [W_0 | W_1 | ...] in one Linear over the stacked per-relation means
+        self.rel_lin = nn.Linear(num_relations * in_dim, out_dim, bias=False)
+        self.root = nn.Linear(in_dim, out_dim, bias=bias)
+        # (edge_index ref, edge_type ref, versions, num_nodes, adjacency), replaced as a whole
+        self._adj_cache = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_adj_cache'] = None  # weakrefs do not pickle
+        return state
+
+    def reset_parameters(self):
+        self.rel_lin.reset_parameters()
+        self.root.reset_parameters()
+
+    def _relation_adjacency(
+        self,
+        edge_index: torch.Tensor,
+        edge_type: Optional[torch.Tensor],
+        num_nodes: int
+    ) -> torch.Tensor:
+        """
+        Row-normalised CSR adjacency [N * R, N], rows sorted by (destination, relation).
+
+        Cached for the same edge_index / edge_type objects (identity through weak
+        references, not addresses that a new graph may reuse) at the same version.
+        """
+        versions = (edge_index._version, None if edge_type is None else edge_type._version)
+        # One read of the cache tuple: concurrent callers see an old or a new entry, never a mix
+        cache = self._adj_cache
+        if cache is not None:
+            index_ref, type_ref, cached_versions, cached_nodes, adj = cache
+            same_type = type_ref is None if edge_type is None else (type_ref is not None and type_ref() is edge_type)
+            if index_ref() is edge_index and same_type and cached_versions == versions and cached_nodes == num_nodes:
+                return adj
+
+        src, dst = edge_index[0], edge_index[1]
+        if edge_type is None:
+            rel = torch.zeros_like(dst)
+        else:
+            rel = edge_type.view(-1).to(dst.dtype).clamp(0, self.num_relations - 1)
+
+        row = dst * self.num_relations + rel
+        order = torch.argsort(row, stable=True)
+        row, col = row[order], src[order]
+
+        num_rows = num_nodes * self.num_relations
+        deg = torch.bincount(row, minlength=num_rows)
+        crow = torch.zeros(num_rows + 1, dtype=torch.long, device=row.device)
+        torch.cumsum(deg, 0, out=crow[1:])
+        values = 1.0 / deg[row].to(torch.float)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # "sparse CSR is in beta" notice
+            adj = torch.sparse_csr_tensor(
+                crow, col, values, size=(num_rows, num_nodes), check_invariants=False
+            )
+        self._adj_cache = (
+            weakref.ref(edge_index), None if edge_type is None else weakref.ref(edge_type),
+            versions, num_nodes, adj,
+        )
+        return adj
+
+    def forward(
+        self,
+        x: torch.Tensor,
+        edge_index: torch.Tensor,
+        edge_type: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        """
+        Args:
+            x: Node features [N, in_dim]
+            edge_index: Edge indices [2, E] (source -> target)
+            edge_type: Relation of every edge [E] or [E, 1] (None = all relation 0)
+
+        Returns:
+            Node features [N, out_dim]
+        """
+        num_nodes = x.size(0)
+        adj = self._relation_adjacency(edge_index, edge_type, num_nodes)
+        if adj.dtype != x.dtype:
+            adj = adj.to(x.dtype)
+
+        # [N * R, in] per-relation means -> [N, R * in] -> one Linear for all relations
+        agg = (adj @ x).view(num_nodes, self.num_relations * self.in_dim)
+        return self.rel_lin(agg) + self.root(x)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.in_dim}, {self.out_dim}, num_relations={self.num_relations})"
+
+
+def _timeit(fn, repeats: int) -> float:
+    fn()  # warm-up (adjacency cache, allocator)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark_gnn_types(
+    x: torch.Tensor,
+    edge_index: torch.Tensor,
+    edge_attr: Optional[torch.Tensor],
+    gnn_types: List[str] = ('gat', 'sage', 'gcn', 'rgcn'),
+    hidden_dim: int = 256,
+    num_layers: int = 2,
+    repeats: int = 5,
+    threads: Optional[int] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Time inference and one training step of MultiModalFakeNewsGNN per gnn_type on CPU.
+
+    Returns:
+        {gnn_type: {'infer_ms', 'train_step_ms', 'nodes_per_sec'}}
+    """
+    from src.models.cascade_gnn import MultiModalFakeNewsGNN
+
+    if threads:
+        torch.set_num_threads(threads)
+    results = {}
+    for gnn_type in gnn_types:
+        torch.manual_seed(0)
+        model = MultiModalFakeNewsGNN(
+            input_dim=x.size(1), hidden_dim=hidden_dim, num_layers=num_layers, gnn_type=gnn_type
+        )
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+
+        def infer():
+            model.eval()
+            with torch.no_grad():
+                model(x, edge_index, edge_attr)
+
+        def train_step():
+            model.train()
+            optimizer.zero_grad()
+            model(x, edge_index, edge_attr).sum().backward()
+            optimizer.step()
+
+        infer_s = _timeit(infer, repeats)
+        train_s = _timeit(train_step, repeats)
+        results[gnn_type] = {
+            'infer_ms': infer_s * 1000,
+            'train_step_ms': train_s * 1000,
+            'nodes_per_sec': x.size(0) / infer_s,
+        }
+    return results
+
+
+def main():
+    # Add project root to path
+    project_root = str(Path(__file__).resolve().parent.parent.parent)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+    parser = argparse.ArgumentParser(description='CPU benchmark: relational layer vs GAT/SAGE/GCN')
+    parser.add_argument('--graph', default=None, help='PyG graph .pt (default: random graph)')
+    parser.add_argument('--nodes', type=int, default=20000, help='Random graph: number of nodes')
+    parser.add_argument('--edges', type=int, default=400000, help='Random graph: number of edges')
+    parser.add_argument('--input_dim', type=int, default=1280, help='Random graph: feature dimension')
+    parser.add_argument('--hidden_dim', type=int, default=256, help='Hidden dimension')
+    parser.add_argument('--num_layers', type=int, default=2, help='Number of GNN layers')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed repeats per measurement')
+    parser.add_argument('--threads', type=int, default=None, help='torch.set_num_threads')
+    args = parser.parse_args()
+
+    if args.graph:
+        from torch_geometric.data import Data
+        torch.serialization.add_safe_globals([Data])
+        data = torch.load(args.graph, map_location='cpu', weights_only=False)
+        x, edge_index, edge_attr = data.x, data.edge_index, getattr(data, 'edge_attr', None)
+    else:
+        torch.manual_seed(0)
+        x = torch.randn(args.nodes, args.input_dim)
+        edge_index = torch.randint(0, args.nodes, (2, args.edges))
+        edge_attr = torch.randint(0, 2, (args.edges, 1))
+
+    print(f"📊 Graph: {x.size(0)} nodes, {edge_index.size(1)} edges, dim {x.size(1)}, "
+          f"{torch.get_num_threads() if not args.threads else args.threads} threads")
+    results = benchmark_gnn_types(
+        x, edge_index, edge_attr, hidden_dim=args.hidden_dim, num_layers=args.num_layers,
+        repeats=args.repeats, threads=args.threads
+    )
+    print(f"{'gnn_type':<10}{'infer (ms)':>12}{'train step (ms)':>18}{'nodes/sec':>14}")
+    for gnn_type, r in results.items():
+        print(f"{gnn_type:<10}{r['infer_ms']:>12.1f}{r['train_step_ms']:>18.1f}{r['nodes_per_sec']:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
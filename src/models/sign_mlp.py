@@ -0,0 +1,65 @@
+"""
+SIGN MLP for precomputed propagated features.
+
+Input rows are [x | A x | ... | A^K x] (see src/features/sign_features.py);
+no graph access in forward, so any mini-batch of nodes can be scored alone.
+"""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+class SIGNClassifier(nn.Module):
+    """
+    Per-hop projections -> concatenation -> MLP classifier (6-class output).
+    """
+
+    def __init__(
+        self,
+        input_dim: int = 1280,
+        num_hops: int = 3,
+        hidden_dim: int = 256,
+        num_classes: int = 6,
+        dropout: float = 0.3
+    ):
+        """
+        Args:
+            input_dim: Node feature dimension D (per hop)
+            num_hops: K (input rows have (K + 1) * D features)
+            hidden_dim: Hidden dimension (per hop projection and MLP)
+            num_classes: Number of output classes (6)
+            dropout: Dropout rate
+        """
+        super().__init__()
+        self.input_dim = input_dim
+        self.num_hops = num_hops
+        self.dropout = dropout
+
+        # Grouped per-hop projection: one batched matmul over [K + 1, B, D]
+        self.hop_weight = nn.Parameter(torch.empty(num_hops + 1, input_dim, hidden_dim))
+        self.hop_bias = nn.Parameter(torch.zeros(num_hops + 1, 1, hidden_dim))
+        nn.init.xavier_uniform_(self.hop_weight.view(-1, hidden_dim))
+        self.hop_norm = nn.LayerNorm((num_hops + 1) * hidden_dim)
+
+        self.classifier = nn.Sequential(
+            nn.Linear((num_hops + 1) * hidden_dim, hidden_dim),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(hidden_dim, num_classes)
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Args:
+            x: Propagated features [B, (K + 1) * input_dim]
+
+        Returns:
+            Logits [B, num_classes]
+        """
+        batch = x.size(0)
+        hops = x.view(batch, self.num_hops + 1, self.input_dim).transpose(0, 1)
+        h = torch.baddbmm(self.hop_bias, hops, self.hop_weight)  # [K + 1, B, hidden]
+        h = h.transpose(0, 1).reshape(batch, -1)
+        h = F.dropout(F.relu(self.hop_norm(h)), p=self.dropout, training=self.training)
+        return self.classifier(h)
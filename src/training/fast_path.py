@@ -0,0 +1,248 @@
+"""
+Opt-in fast training path for MultiModalFakeNewsGNN (CPU first).
+
+- Node-wise parts (input projection, LayerNorm/ReLU/dropout/residual update,
+  classifier MLP) run under bf16 autocast when the CPU has native bf16
+  (AVX512-BF16 / AMX; bf16-capable GPUs on CUDA) and are compiled with
+  torch.compile; their outputs are cast back to fp32.
+- Message passing stays fp32 on a pre-sorted layout built once per graph:
+  edges sorted by (destination, source) and, for 'sage' / 'gcn', a CSR
+  adjacency (row = target) so aggregation is one sparse-dense matmul walking
+  the neighbour lists in memory order. 'gat' uses the sorted edge_index
+  (attention needs per-edge scores; CSR gives it no gain), 'rgcn' builds its
+  own relation CSR from the sorted edges.
+- symmetric=True trains on the symmetrised adjacency cached with the graph
+  (InteractionGraphBuilder): no sorting at all, 'gcn' gets the precomputed
+  D^-1/2 (A + I) D^-1/2 and skips its per-forward normalisation. Edge types
+  are merged there, so 'rgcn' needs the directed graph.
+
+Weights and state_dict keys are untouched: the fast path only overrides
+instance methods and is removed again with restore().
+
+Usage:
+    fast = FastPath(model, data)             # bf16='auto', compile=True
+    logits = model(fast.x, fast.edge_index, fast.edge_attr)
+    report = fast.parity_check(data)         # val F1 fast vs fp32 eager
+    fast.restore()
+"""
+
+import time
+import logging
+import warnings
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+import torch
+import torch.nn as nn
+from torch_geometric.data import Data
+
+from src.features.graph_builder import (
+    adjacency_tensor, build_adjacency, has_adjacency, symmetric_edge_index
+)
+
+logger = logging.getLogger(__name__)
+
+CSR_GNN_TYPES = ('sage', 'gcn')
+FAST_METHODS = ('input_layer', 'layer_update')
+
+
+def bf16_supported(device: torch.device) -> bool:
+    """Native bf16 matmuls on this device (emulated bf16 on CPU is slower than fp32)."""
+    if device.type == 'cuda':
+        return torch.cuda.is_bf16_supported()
+    cpu = getattr(torch, 'cpu', None)
+    checks = [getattr(cpu, name, None) for name in ('_is_avx512_bf16_supported', '_is_amx_tile_supported')]
+    return any(check() for check in checks if check is not None)
+
+
+def sorted_edges(edge_index: torch.Tensor, num_nodes: int, edge_attr: Optional[torch.Tensor] = None):
+    """Edges sorted by (destination, source); duplicates kept (same messages as the COO input)."""
+    key = edge_index[1] * num_nodes + edge_index[0]
+    order = torch.argsort(key, stable=True)
+    return edge_index[:, order], None if edge_attr is None else edge_attr[order]
+
+
+def csr_adjacency(sorted_edge_index: torch.Tensor, num_nodes: int) -> torch.Tensor:
+    """adj_t in CSR (row = target, column = source, value 1) from destination-sorted edges."""
+    dst = sorted_edge_index[1]
+    crow = torch.zeros(num_nodes + 1, dtype=torch.long, device=dst.device)
+    torch.cumsum(torch.bincount(dst, minlength=num_nodes), 0, out=crow[1:])
+    values = torch.ones(dst.numel(), device=dst.device)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # "sparse CSR is in beta" notice
+        return torch.sparse_csr_tensor(crow, sorted_edge_index[0], values, size=(num_nodes, num_nodes),
+                                       check_invariants=False)
+
+
+class FastPath:
+    """
+    bf16 + compiled node-wise ops and a sorted adjacency for one model / graph.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        data: Data,
+        bf16: str = 'auto',
+        compile: bool = True,
+        symmetric: bool = False
+    ):
+        """
+        Args:
+            model: MultiModalFakeNewsGNN (patched in place, see restore())
+            data: Graph with x, edge_index, edge_attr
+            bf16: 'auto' (if the hardware has native bf16), 'on' or 'off'
+            compile: torch.compile the node-wise ops (falls back to eager if compilation fails)
+            symmetric: Use the cached symmetrised adjacency of the graph instead of edge_index
+        """
+        if symmetric and model.gnn_type == 'rgcn':
+            raise ValueError("rgcn needs the typed directed edges, the symmetric adjacency merges them")
+        self.model = model
+        self.device = data.x.device
+        self.bf16 = bf16 == 'on' or (bf16 == 'auto' and bf16_supported(self.device))
+        self.compiled = False
+        self.symmetric = symmetric
+        # GCN layers get a pre-normalised adjacency in symmetric mode
+        self._gcn_layers = [layer for layer in model.gnn_layers if hasattr(layer, 'normalize')] \
+            if symmetric and model.gnn_type == 'gcn' else []
+
+        start = time.perf_counter()
+        num_nodes = data.num_nodes
+        if symmetric:
+            if not has_adjacency(data):
+                logger.warning("Graph has no cached adjacency, building it (save it with the graph to skip this)")
+            adjacency = data if has_adjacency(data) else build_adjacency(data.edge_index, num_nodes)
+            # Eager reference = same symmetric graph as COO
+            self.eager_edge_index, self.eager_edge_attr = symmetric_edge_index(adjacency), None
+            self.edge_attr = None
+            if model.gnn_type in CSR_GNN_TYPES:
+                self.edge_index = adjacency_tensor(adjacency, normalized=model.gnn_type == 'gcn')
+                self.layout = 'cached_csr'
+            else:
+                self.edge_index = self.eager_edge_index
+                self.layout = 'cached_coo'
+        else:
+            self.eager_edge_index, self.eager_edge_attr = data.edge_index, getattr(data, 'edge_attr', None)
+            edge_index, self.edge_attr = sorted_edges(data.edge_index, num_nodes, self.eager_edge_attr)
+            if model.gnn_type in CSR_GNN_TYPES:
+                self.edge_index = csr_adjacency(edge_index, num_nodes)
+                self.layout = 'csr'
+            else:
+                self.edge_index = edge_index
+                self.layout = 'sorted_coo'
+        self.x = data.x
+        # Same graph (shared tensors) with the fast adjacency, for code that takes a Data object
+        self.graph = Data(**{key: value for key, value in data})
+        self.graph.edge_index = self.edge_index
+        self.graph.edge_attr = self.edge_attr
+        self.graph.num_nodes = num_nodes
+        self.prepare_seconds = time.perf_counter() - start
+
+        self._patch(compile)
+        logger.info(f"⚡ Fast path: bf16={'on' if self.bf16 else 'off'}, compiled={self.compiled}, "
+                    f"adjacency={self.layout} ({self.prepare_seconds * 1000:.0f} ms)")
+
+    def _autocast(self):
+        if not self.bf16:
+            return nullcontext()
+        return torch.autocast(device_type=self.device.type, dtype=torch.bfloat16)
+
+    def _wrap(self, fn):
+        autocast = self._autocast
+
+        def node_wise(*args, **kwargs):
+            with autocast():
+                return fn(*args, **kwargs).float()
+        return node_wise
+
+    def _patch(self, compile: bool):
+        model = self.model
+        originals = {name: getattr(model, name) for name in FAST_METHODS}
+        originals['classifier'] = model.classifier.forward
+
+        if compile and hasattr(torch, 'compile'):
+            try:
+                # Compile the model's own methods (one code object each, so one cache each);
+                # autocast is entered outside and becomes part of the compiled graph's guards.
+                # layer_update specialises on the layer index: 2 graphs per layer at most
+                compiled = {name: self._wrap(torch.compile(fn, dynamic=True)) for name, fn in originals.items()}
+                # Compilation is lazy: run once on a few nodes so a missing compiler fails here
+                with torch.no_grad():
+                    h = compiled['input_layer'](self.x[:8])
+                    h = compiled['layer_update'](0, h, h)
+                    compiled['classifier'](h)
+                self._fast = compiled
+                self.compiled = True
+            except Exception as e:
+                logger.warning(f"torch.compile unavailable ({type(e).__name__}: {e}), node-wise ops stay eager")
+
+        if not self.compiled:
+            self._fast = {name: self._wrap(fn) for name, fn in originals.items()}
+        self.apply()
+
+    def apply(self):
+        """Route the model's node-wise ops through the fast versions."""
+        for name in FAST_METHODS:
+            setattr(self.model, name, self._fast[name])
+        self.model.classifier.forward = self._fast['classifier']
+        for layer in self._gcn_layers:
+            layer.normalize = False
+
+    def restore(self):
+        """Back to the plain fp32 eager model."""
+        for name in FAST_METHODS:
+            self.model.__dict__.pop(name, None)
+        self.model.classifier.__dict__.pop('forward', None)
+        for layer in self._gcn_layers:
+            layer.normalize = True
+
+    def parity_check(self, data: Data, mask: Optional[torch.Tensor] = None, tolerance: float = 0.01) -> Dict:
+        """
+        Validation metrics of the current weights through the fast path and through
+        the fp32 eager path on the original edge_index (the symmetric one as COO
+        in symmetric mode).
+
+        Returns:
+            {'fast': metrics, 'eager': metrics, 'f1_diff', 'max_logit_diff', 'ok'}
+        """
+        from src.evaluation.metrics import classification_metrics
+
+        mask = data.val_mask if mask is None else mask
+        model = self.model
+        was_training = model.training
+        model.eval()
+        with torch.no_grad():
+            fast_logits = model(self.x, self.edge_index, self.edge_attr)
+            self.restore()
+            try:
+                eager_logits = model(data.x, self.eager_edge_index, self.eager_edge_attr)
+            finally:
+                self.apply()
+        model.train(was_training)
+
+        fast = classification_metrics(fast_logits[mask].argmax(-1), data.y[mask], prefix='val_')
+        eager = classification_metrics(eager_logits[mask].argmax(-1), data.y[mask], prefix='val_')
+        diff = abs(fast['val_f1_macro_6'] - eager['val_f1_macro_6'])
+        return {
+            'fast': fast,
+            'eager': eager,
+            'f1_diff': diff,
+            'max_logit_diff': float((fast_logits - eager_logits).abs().max()),
+            'ok': diff <= tolerance,
+        }
+
+
+def speed_report(epoch_seconds, num_nodes: int, label: str = 'train') -> Dict:
+    """Per-epoch timing summary (first epoch reported separately: compilation / warm-up)."""
+    if not epoch_seconds:
+        return {}
+    steady = sorted(epoch_seconds[1:] or epoch_seconds)
+    median = steady[len(steady) // 2]
+    return {
+        'label': label,
+        'epochs': len(epoch_seconds),
+        'first_epoch_s': epoch_seconds[0],
+        'median_epoch_s': median,
+        'min_epoch_s': steady[0],
+        'nodes_per_s': num_nodes / median if median > 0 else 0.0,
+    }
@@ -0,0 +1,274 @@
+"""
+Opt-in training profiler for the full-batch GNN trainers.
+
+Per epoch it records:
+- wall time split into forward / backward / optimizer / eval,
+- message-passing time of every GNN layer (forward in training and eval mode,
+  backward measured between the gradient of the layer output and of its input),
+- peak RSS of the process (and peak CUDA memory on GPU).
+
+Optionally a window of epochs is recorded with torch.profiler and exported as a
+Chrome trace (chrome://tracing, Perfetto) with the phases and layers as named
+ranges. The JSON summary (per-epoch rows + means and shares, git commit) is
+meant to be diffed between commits.
+
+Disabled profilers are no-ops, so trainers can call them unconditionally.
+
+Usage:
+    profiler = TrainingProfiler(model, out_dir='reports/profile', trace_epochs=3)
+    for epoch in ...:
+        with profiler.epoch(epoch):
+            with profiler.phase('forward'):  ...
+            with profiler.phase('backward'): ...
+    profiler.save()
+"""
+
+import os
+import json
+import time
+import platform
+import subprocess
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import torch
+import torch.nn as nn
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PHASES = ('forward', 'backward', 'optimizer', 'eval')
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of the process RSS (current RSS where the OS has no counter)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / (1024 * 1024) if platform.system() == 'Darwin' else peak / 1024
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    return 0.0
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             timeout=5, cwd=Path(__file__).resolve().parent)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class TrainingProfiler:
+    """
+    Phase / per-layer timings, peak memory and an optional Chrome trace.
+    """
+
+    def __init__(
+        self,
+        model: Optional[nn.Module] = None,
+        out_dir: Optional[str] = None,
+        enabled: bool = True,
+        trace_epochs: int = 0,
+        trace_skip: int = 1,
+        layers_attr: str = 'gnn_layers',
+        config: Optional[Dict] = None
+    ):
+        """
+        Args:
+            model: Model whose `layers_attr` ModuleList gets per-layer timing hooks
+            out_dir: Where profile.json / trace.json are written
+            enabled: False -> every method is a no-op
+            trace_epochs: Epochs recorded with torch.profiler (0 = no trace)
+            trace_skip: Epochs skipped before the trace window (warm-up)
+            config: Run settings stored in the summary (gnn_type, hidden_dim, ...)
+        """
+        self.enabled = enabled
+        self.out_dir = Path(out_dir) if out_dir else None
+        self.trace_epochs = trace_epochs
+        self.trace_skip = trace_skip
+        self.config = config or {}
+        self.epochs: List[Dict] = []
+        self._current: Optional[Dict] = None
+        self._handles = []
+        self._torch_profiler = None
+        self._traced = 0
+        self.cuda = False
+
+        if enabled and model is not None:
+            self.cuda = next(model.parameters()).is_cuda
+            layers = getattr(model, layers_attr, None)
+            if layers is not None:
+                for i, layer in enumerate(layers):
+                    self._hook_layer(i, layer)
+
+    # ------------------------------------------------------------------ timing
+
+    def _now(self) -> float:
+        if self.cuda:
+            torch.cuda.synchronize()
+        return time.perf_counter()
+
+    def _add(self, bucket: str, key: str, seconds: float):
+        if self._current is not None:
+            self._current[bucket][key] = self._current[bucket].get(key, 0.0) + seconds
+
+    def _hook_layer(self, i: int, layer: nn.Module):
+        starts = {}
+
+        def pre_hook(module, inputs):
+            starts['range'] = torch.profiler.record_function(f'gnn_layer_{i}')
+            starts['range'].__enter__()
+            starts['fwd'] = self._now()
+            h = inputs[0]
+            if module.training and torch.is_grad_enabled() and h.requires_grad:
+                # Gradient w.r.t. the layer input arrives when its backward is done
+                h.register_hook(lambda grad: self._end_backward(i, starts))
+
+        def post_hook(module, inputs, output):
+            mode = 'train' if module.training else 'eval'
+            self._add('layers', f'layer{i}_{mode}_fwd', self._now() - starts['fwd'])
+            starts.pop('range').__exit__(None, None, None)
+            if module.training and torch.is_grad_enabled() and output.requires_grad:
+                output.register_hook(lambda grad: starts.__setitem__('bwd', self._now()))
+
+        self._handles.append(layer.register_forward_pre_hook(pre_hook))
+        self._handles.append(layer.register_forward_hook(post_hook))
+
+    def _end_backward(self, i: int, starts: Dict):
+        if 'bwd' in starts:
+            self._add('layers', f'layer{i}_bwd', self._now() - starts.pop('bwd'))
+
+    @contextmanager
+    def _phase(self, name: str):
+        start = self._now()
+        with torch.profiler.record_function(name):
+            yield
+        self._add('phases', name, self._now() - start)
+
+    def phase(self, name: str):
+        """Time one phase of the current epoch ('forward', 'backward', 'optimizer', 'eval')."""
+        return self._phase(name) if self.enabled else nullcontext()
+
+    @contextmanager
+    def _epoch(self, epoch: int):
+        self._start_trace(epoch)
+        self._current = {'epoch': epoch, 'phases': {}, 'layers': {}}
+        start = self._now()
+        with torch.profiler.record_function(f'epoch_{epoch}'):
+            yield self._current
+        row = self._current
+        row['total'] = self._now() - start
+        row['peak_rss_mb'] = round(peak_rss_mb(), 1)
+        if self.cuda:
+            row['peak_cuda_mb'] = round(torch.cuda.max_memory_allocated() / (1024 * 1024), 1)
+        self.epochs.append(row)
+        self._current = None
+        self._step_trace()
+
+    def epoch(self, epoch: int):
+        """Context for one training epoch."""
+        return self._epoch(epoch) if self.enabled else nullcontext()
+
+    # ------------------------------------------------------------------- trace
+
+    def _start_trace(self, epoch: int):
+        if not self.trace_epochs or self.out_dir is None or self._torch_profiler is not None:
+            return
+        if self._traced or len(self.epochs) < self.trace_skip:
+            return
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if self.cuda:
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self._torch_profiler = torch.profiler.profile(activities=activities, record_shapes=True, profile_memory=True)
+        self._torch_profiler.__enter__()
+
+    def _step_trace(self):
+        if self._torch_profiler is None:
+            return
+        self._traced += 1
+        if self._traced >= self.trace_epochs:
+            self._stop_trace()
+
+    def _stop_trace(self):
+        if self._torch_profiler is None:
+            return
+        self._torch_profiler.__exit__(None, None, None)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._torch_profiler.export_chrome_trace(str(self.out_dir / 'trace.json'))
+        self._torch_profiler = None
+
+    # ----------------------------------------------------------------- summary
+
+    def summary(self) -> Dict:
+        """Means over the recorded epochs (first epoch excluded as warm-up when there are more)."""
+        rows = self.epochs[1:] if len(self.epochs) > 1 else self.epochs
+        n = max(len(rows), 1)
+        total = sum(r['total'] for r in rows) / n
+        phases = {p: sum(r['phases'].get(p, 0.0) for r in rows) / n for p in PHASES}
+        layer_keys = sorted({k for r in rows for k in r['layers']})
+        layers = {k: sum(r['layers'].get(k, 0.0) for r in rows) / n for k in layer_keys}
+        return {
+            'epochs': len(self.epochs),
+            'epoch_s': total,
+            'phases_s': phases,
+            'phases_share': {p: (v / total if total else 0.0) for p, v in phases.items()},
+            'other_s': max(total - sum(phases.values()), 0.0),
+            'layers_s': layers,
+            'peak_rss_mb': max((r['peak_rss_mb'] for r in self.epochs), default=0.0),
+            'peak_cuda_mb': max((r.get('peak_cuda_mb', 0.0) for r in self.epochs), default=0.0),
+        }
+
+    def save(self, path: Optional[str] = None) -> Optional[Dict]:
+        """Write profile.json (and close a trace window that is still open)."""
+        if not self.enabled:
+            return None
+        self._stop_trace()
+        for handle in self._handles:
+            handle.remove()
+        self._handles = []
+
+        report = {
+            'commit': git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'torch': torch.__version__,
+            'threads': torch.get_num_threads(),
+            'device': 'cuda' if self.cuda else 'cpu',
+            'config': self.config,
+            'summary': self.summary(),
+            'per_epoch': self.epochs,
+        }
+        if path is None and self.out_dir is not None:
+            path = str(self.out_dir / 'profile.json')
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        return report
+
+    def print_summary(self):
+        if not self.enabled or not self.epochs:
+            return
+        s = self.summary()
+        print("\n" + "=" * 40)
+        print(f"PROFILE ({s['epochs']} epochs, mean of epochs 2+)")
+        print("=" * 40)
+        print(f"{'epoch':<22}{s['epoch_s'] * 1000:>10.1f} ms")
+        for p in PHASES:
+            print(f"  {p:<20}{s['phases_s'][p] * 1000:>10.1f} ms {100 * s['phases_share'][p]:>6.1f}%")
+        print(f"  {'other':<20}{s['other_s'] * 1000:>10.1f} ms")
+        for k, v in s['layers_s'].items():
+            print(f"  {k:<20}{v * 1000:>10.1f} ms")
+        print(f"{'peak RSS':<22}{s['peak_rss_mb']:>10.1f} MB")
+        if s['peak_cuda_mb']:
+            print(f"{'peak CUDA':<22}{s['peak_cuda_mb']:>10.1f} MB")
+        print("=" * 40)
@@ -0,0 +1,282 @@
+"""
+Parallel hyperparameter sweep for MultiModalFakeNewsGNN (train_gnn.py settings).
+
+- The graph is loaded once and moved to shared memory; every trial process
+  maps the same tensors instead of reloading the .pt file.
+- Trials run in a process pool; each worker is pinned to its own disjoint set
+  of CPU cores (sched_setaffinity + torch.set_num_threads), so trials do not
+  fight over cores and all cores are in use.
+- Successive halving: all configurations get `min_epochs`, the best 1/eta by
+  validation Macro-F1 continue with eta x more epochs, and so on up to
+  `max_epochs`. Surviving trials resume from their saved model/optimizer
+  state. Later rungs have fewer trials, so each gets more cores.
+- Results table (CSV + console) with every trial's config, epochs, best val
+  metrics and the rung it reached; the winner is evaluated on the test split.
+
+Usage:
+    python src/training/sweep_gnn.py --graph data/04_graph/fakeddit_graph.pt \\
+        --gnn_types gat sage gcn rgcn --hidden_dims 128 256 --dropouts 0.2 0.3 0.5 --lrs 1e-3 3e-3 \\
+        --min_epochs 10 --max_epochs 90 --eta 3
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+import itertools
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+import torch.optim as optim
+
+# Internal imports
+from src.data.dataloader import FakeNewsGraphDataset
+from src.models.cascade_gnn import MultiModalFakeNewsGNN
+from src.models.inference_engine import GNNInferenceEngine
+from src.training.train_gnn import class_weights, evaluate
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RESULT_COLUMNS = ['trial', 'gnn_type', 'hidden_dim', 'dropout', 'lr', 'weight_decay', 'rung', 'epochs',
+                  'best_epoch', 'val_f1_macro_6', 'val_acc_6', 'val_acc_bin', 'val_f1_bin', 'stopped', 'seconds']
+
+# Per-worker state (set by init_worker)
+_data = None
+_weights = None
+
+
+def cpu_slots(num_slots: int) -> List[List[int]]:
+    """Split the CPUs this process may use into `num_slots` disjoint, contiguous sets."""
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    num_slots = max(1, min(num_slots, len(cpus)))
+    size = len(cpus) // num_slots
+    return [cpus[i * size:(i + 1) * size] for i in range(num_slots)]
+
+
+def init_worker(data, weights, slots):
+    """Receive the shared graph once and pin this worker to one CPU slot."""
+    global _data, _weights
+    _data, _weights = data, weights
+    cpus = slots.get()
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(len(cpus))
+
+
+def run_trial(trial: Dict, epochs: int, patience: int, state_dir: str) -> Dict:
+    """
+    Train a trial up to `epochs` total epochs, resuming from its saved state.
+
+    Returns:
+        Trial result row (best val metrics so far)
+    """
+    start = time.perf_counter()
+    data = _data
+    state_path = os.path.join(state_dir, f"trial_{trial['trial']:03d}.pt")
+
+    # Spawned workers start unseeded: per-trial seed -> same init / dropout on every run
+    torch.manual_seed(trial['seed'])
+    model = MultiModalFakeNewsGNN(
+        input_dim=data.x.size(1),
+        hidden_dim=trial['hidden_dim'],
+        num_classes=6,
+        dropout=trial['dropout'],
+        gnn_type=trial['gnn_type']
+    )
+    optimizer = optim.Adam(model.parameters(), lr=trial['lr'], weight_decay=trial['weight_decay'])
+    criterion = nn.CrossEntropyLoss(weight=_weights)
+    engine = GNNInferenceEngine(model)
+
+    state = {'epoch': 0, 'best_epoch': 0, 'best_val': None, 'patience_counter': 0, 'stopped': False, 'seconds': 0.0}
+    if os.path.exists(state_path):
+        saved = torch.load(state_path, weights_only=False)
+        model.load_state_dict(saved['model'])
+        optimizer.load_state_dict(saved['optimizer'])
+        state = saved['state']
+        best_model = saved['best_model']
+        # Dropout of the next rung independent of which worker / rung order resumed it
+        torch.manual_seed(trial['seed'] + state['epoch'])
+    else:
+        best_model = None
+
+    epoch = state['epoch']
+    while epoch < epochs and not state['stopped']:
+        epoch += 1
+        model.train()
+        optimizer.zero_grad()
+        logits = model(data.x, data.edge_index, data.edge_attr)
+        loss = criterion(logits[data.train_mask], data.y[data.train_mask])
+        loss.backward()
+        optimizer.step()
+
+        val_metrics = evaluate(model, data, data.val_mask, "val", engine)
+        best = state['best_val']
+        if best is None or val_metrics['val_f1_macro_6'] > best['val_f1_macro_6']:
+            state['best_val'] = val_metrics
+            state['best_epoch'] = epoch
+            state['patience_counter'] = 0
+            best_model = {k: v.detach().clone() for k, v in model.state_dict().items()}
+        else:
+            state['patience_counter'] += 1
+            if state['patience_counter'] >= patience:
+                state['stopped'] = True
+    state['epoch'] = epoch
+    state['seconds'] += time.perf_counter() - start
+
+    torch.save({'model': model.state_dict(), 'optimizer': optimizer.state_dict(),
+                'state': state, 'best_model': best_model}, state_path)
+
+    row = dict(trial)
+    row.update({'epochs': epoch, 'best_epoch': state['best_epoch'], 'stopped': state['stopped'],
+                'seconds': round(state['seconds'], 2)})
+    row.update({k: round(float(v), 4) for k, v in (state['best_val'] or {}).items()})
+    return row
+
+
+def rung_budgets(min_epochs: int, max_epochs: int, eta: int) -> List[int]:
+    budgets = []
+    budget = min_epochs
+    while budget < max_epochs:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(max_epochs)
+    return budgets
+
+
+def build_trials(args) -> List[Dict]:
+    grid = list(itertools.product(args.gnn_types, args.hidden_dims, args.dropouts, args.lrs))
+    if args.num_samples and args.num_samples < len(grid):
+        grid = random.Random(args.seed).sample(grid, args.num_samples)
+    return [
+        {'trial': i, 'gnn_type': g, 'hidden_dim': h, 'dropout': d, 'lr': lr, 'weight_decay': args.weight_decay,
+         'seed': args.seed + i}
+        for i, (g, h, d, lr) in enumerate(grid)
+    ]
+
+
+def print_table(rows: List[Dict]):
+    header = f"{'trial':>5} {'gnn':>5} {'hidden':>6} {'drop':>5} {'lr':>8} {'rung':>4} {'epochs':>6} {'val_f1':>8} {'val_acc_bin':>11} {'sec':>7}"
+    print(header)
+    print('-' * len(header))
+    for r in rows:
+        print(f"{r['trial']:>5} {r['gnn_type']:>5} {r['hidden_dim']:>6} {r['dropout']:>5} {r['lr']:>8.0e} {r['rung']:>4} "
+              f"{r['epochs']:>6} {r.get('val_f1_macro_6', 0):>8.4f} {r.get('val_acc_bin', 0):>11.4f} {r['seconds']:>7.1f}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Parallel successive-halving sweep for train_gnn.py')
+    parser.add_argument('--graph', default='data/04_graph/fakeddit_graph.pt', help='Path to graph .pt file')
+    parser.add_argument('--gnn_types', nargs='+', default=['gat', 'sage', 'gcn'], choices=['gat', 'sage', 'gcn', 'rgcn'])
+    parser.add_argument('--hidden_dims', nargs='+', type=int, default=[128, 256])
+    parser.add_argument('--dropouts', nargs='+', type=float, default=[0.2, 0.3, 0.5])
+    parser.add_argument('--lrs', nargs='+', type=float, default=[1e-3, 3e-3])
+    parser.add_argument('--weight_decay', type=float, default=5e-4, help='Weight decay (all trials)')
+    parser.add_argument('--num_samples', type=int, default=0, help='Random subset of the grid (0 = full grid)')
+    parser.add_argument('--min_epochs', type=int, default=10, help='Epochs of the first rung')
+    parser.add_argument('--max_epochs', type=int, default=90, help='Epochs of the last rung')
+    parser.add_argument('--eta', type=int, default=3, help='Keep the best 1/eta trials per rung')
+    parser.add_argument('--patience', type=int, default=15, help='Per-trial early stopping patience')
+    parser.add_argument('--threads_per_trial', type=int, default=0, help='Cores per trial in the first rung (0 = auto)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save_dir', default='models/sweeps', help='Trial states, results CSV and the best model')
+    return parser
+
+
+def sweep(argv: Optional[List[str]] = None) -> List[Dict]:
+    args = build_parser().parse_args(argv)
+    torch.manual_seed(args.seed)
+    run_dir = os.path.join(args.save_dir, time.strftime('%Y%m%d_%H%M%S'))
+    os.makedirs(run_dir, exist_ok=True)
+
+    # Load once, share with every worker (tensors are passed as shared-memory handles)
+    data = FakeNewsGraphDataset(graph_path=args.graph).graph
+    for _, value in data:
+        if isinstance(value, torch.Tensor):
+            value.share_memory_()
+    weights = class_weights(data.y[data.train_mask].numpy(), 'cpu').share_memory_()
+
+    trials = build_trials(args)
+    budgets = rung_budgets(args.min_epochs, args.max_epochs, args.eta)
+    total_cpus = len(cpu_slots(os.cpu_count() or 1))
+    logger.info(f"{len(trials)} trials, rungs {budgets} epochs, {total_cpus} CPUs, results in {run_dir}")
+
+    ctx = mp.get_context('spawn')
+    results: Dict[int, Dict] = {}
+    alive = trials
+    for rung, budget in enumerate(budgets):
+        # Fewer trials in later rungs -> more cores each
+        if args.threads_per_trial and rung == 0:
+            workers = max(1, total_cpus // args.threads_per_trial)
+        else:
+            workers = min(len(alive), total_cpus)
+        slot_list = cpu_slots(workers)
+        workers = len(slot_list)
+        slots = ctx.Queue()
+        for cpus in slot_list:
+            slots.put(cpus)
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_worker,
+                                 initargs=(data, weights, slots)) as pool:
+            futures = [pool.submit(run_trial, t, budget, args.patience, run_dir) for t in alive]
+            rows = [f.result() for f in futures]
+        for row in rows:
+            row['rung'] = rung
+            results[row['trial']] = row
+
+        ranked = sorted(rows, key=lambda r: r.get('val_f1_macro_6', 0.0), reverse=True)
+        logger.info(f"Rung {rung}: {len(alive)} trials x {budget} epochs on {workers} workers in "
+                    f"{time.perf_counter() - start:.1f}s | best val F1 {ranked[0].get('val_f1_macro_6', 0):.4f} "
+                    f"(trial {ranked[0]['trial']})")
+        if rung == len(budgets) - 1 or len(alive) == 1:
+            break
+        keep = {r['trial'] for r in ranked[:max(1, len(ranked) // args.eta)]}
+        alive = [t for t in alive if t['trial'] in keep]
+
+    table = sorted(results.values(), key=lambda r: (-r['rung'], -r.get('val_f1_macro_6', 0.0)))
+    csv_path = os.path.join(run_dir, 'sweep_results.csv')
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(table)
+
+    # Winner: best weights on the test split
+    best = table[0]
+    saved = torch.load(os.path.join(run_dir, f"trial_{best['trial']:03d}.pt"), weights_only=False)
+    model = MultiModalFakeNewsGNN(input_dim=data.x.size(1), hidden_dim=best['hidden_dim'], num_classes=6,
+                                  dropout=best['dropout'], gnn_type=best['gnn_type'])
+    model.load_state_dict(saved['best_model'])
+    best_path = os.path.join(run_dir, 'best_gnn_model.pt')
+    torch.save(model.state_dict(), best_path)
+    test_metrics = evaluate(model, data, data.test_mask, "test")
+
+    print("\n" + "=" * 30)
+    print("SWEEP RESULTS")
+    print("=" * 30)
+    print_table(table)
+    print("=" * 30)
+    print(f"Best: trial {best['trial']} ({best['gnn_type']}, hidden {best['hidden_dim']}, "
+          f"dropout {best['dropout']}, lr {best['lr']})")
+    print(f"Test 6-Class Macro-F1: {test_metrics['test_f1_macro_6']:.4f} | Test Binary F1: {test_metrics['test_f1_bin']:.4f}")
+    print(f"Results: {csv_path}")
+    print(f"Model:   {best_path}")
+    print("=" * 30)
+    return table
+
+
+if __name__ == "__main__":
+    sweep()
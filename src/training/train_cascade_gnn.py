@@ -1 +1,263 @@
-def train(): pass
\ No newline at end of file
+"""
+Training script for cascade-level (graph classification) GNN.
+
+Each post is one propagation cascade graph (from build_final_graphs.py); the
+label comes from the enriched JSONL (True/Fake).
+
+Features:
+- Disjoint-union mini-batches of many cascades per step.
+- Size-bucketed batch sampler (node budget per batch, balanced batch sizes).
+- Multi-worker loading from the packed store or a folder of .pt files.
+- graphs/sec reported per epoch.
+- Early Stopping based on Validation Macro-F1.
+
+Usage:
+    python src/training/train_cascade_gnn.py --graphs data/processed_graphs.pack --workers 4
+"""
+
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from sklearn.metrics import f1_score, accuracy_score
+
+# Internal imports
+from src.data.cascade_dataset import CascadeGraphDataset, SizeBucketSampler, make_cascade_loader
+from src.models.cascade_gnn import CascadeGraphClassifier
+from src.utils.dataset_io import read_records
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Nhãn chuẩn hoá từ fakeddit_process_text: True / Fake
+CASCADE_LABELS = {'True': 0, 'Fake': 1}
+SPLITS = ('train', 'val', 'test')
+
+
+def hash_split(post_id: str, val_ratio: float = 0.15, test_ratio: float = 0.15) -> str:
+    """Deterministic split for records without a 'split' field."""
+    r = (zlib.crc32(str(post_id).encode('utf-8')) % 10000) / 10000
+    if r < test_ratio:
+        return 'test'
+    if r < test_ratio + val_ratio:
+        return 'val'
+    return 'train'
+
+
+def load_labels(
+    labels_path: str,
+    with_cascade: bool = False
+) -> Tuple[Dict[str, int], Dict[str, List[str]], List[Dict]]:
+    """
+    Read labels and splits of every post.
+
+    Returns:
+        ({post_id: label_idx}, {split: [post_id]}, records (only if with_cascade))
+    """
+    columns = ['id', 'label', 'split'] + (['timestamp', 'cascade'] if with_cascade else [])
+    labels, splits, records = {}, {s: [] for s in SPLITS}, []
+    for record in read_records(labels_path, columns=columns):
+        label = CASCADE_LABELS.get(record.get('label'))
+        if label is None:
+            continue
+        post_id = str(record.get('id'))
+        labels[post_id] = label
+        split = record.get('split')
+        splits[split if split in SPLITS else hash_split(post_id)].append(post_id)
+        if with_cascade:
+            records.append(record)
+    return labels, splits, records
+
+
+def evaluate(model, loader, device, split_name="val") -> Dict[str, float]:
+    model.eval()
+    preds, targets = [], []
+    with torch.no_grad():
+        for batch in loader:
+            batch = batch.to(device)
+            logits = model(batch.x, batch.edge_index, batch.batch, batch.ptr, getattr(batch, 'graph_attr', None))
+            preds.append(logits.argmax(dim=-1).cpu())
+            targets.append(batch.y.cpu())
+    preds = torch.cat(preds).numpy()
+    targets = torch.cat(targets).numpy()
+    return {
+        f'{split_name}_acc': accuracy_score(targets, preds),
+        f'{split_name}_f1_macro': f1_score(targets, preds, average='macro'),
+        f'{split_name}_f1_fake': f1_score(targets, preds, average='binary', zero_division=0),
+    }
+
+
+def build_parser(description: str = 'Train cascade-level GNN') -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--graphs', default='data/processed_graphs.pack', help='Packed store or folder of .pt files')
+    parser.add_argument('--labels', default='data/reddit_enriched_data.jsonl', help='JSONL/Parquet with id, label, split')
+    parser.add_argument('--epochs', type=int, default=50, help='Max number of epochs')
+    parser.add_argument('--lr', type=float, default=0.001, help='Learning rate')
+    parser.add_argument('--weight_decay', type=float, default=5e-4, help='Weight decay')
+    parser.add_argument('--hidden_dim', type=int, default=128, help='Hidden dimension')
+    parser.add_argument('--num_layers', type=int, default=2, help='Number of GNN layers')
+    parser.add_argument('--dropout', type=float, default=0.3, help='Dropout rate')
+    parser.add_argument('--gnn_type', choices=['gat', 'sage', 'gcn'], default='sage', help='GNN layer type')
+    parser.add_argument('--max_nodes', type=int, default=4096, help='Node budget per batch')
+    parser.add_argument('--max_graphs', type=int, default=512, help='Max graphs per batch')
+    parser.add_argument('--workers', type=int, default=2, help='DataLoader worker processes')
+    parser.add_argument('--patience', type=int, default=10, help='Patience for early stopping')
+    parser.add_argument('--save_dir', default='models/checkpoints', help='Directory to save models')
+    parser.add_argument('--propagation', action='store_true', help='Add propagation features (graph_features) to the readout')
+    return parser
+
+
+def propagation_attr(records: List[Dict], train_ids: List[str]) -> Tuple[Dict[str, np.ndarray], List[str]]:
+    """
+    Graph-level propagation feature vectors (see src/features/propagation_extractor.py),
+    log1p-scaled and standardised with train statistics; missing values -> 0.
+    """
+    from src.features.propagation_extractor import PropagationExtractor
+
+    features = PropagationExtractor().extract_batch(records)
+    names = list(features[0].keys()) if features else []
+    matrix = np.array([[np.nan if f[n] is None else f[n] for n in names] for f in features], dtype=np.float64)
+    matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+    ids = [str(r.get('id')) for r in records]
+
+    train_set = set(train_ids)
+    train_rows = matrix[[i for i, pid in enumerate(ids) if pid in train_set]]
+    mean = np.nanmean(train_rows, axis=0) if len(train_rows) else np.zeros(len(names))
+    std = np.nanstd(train_rows, axis=0) if len(train_rows) else np.ones(len(names))
+    matrix = np.nan_to_num((matrix - np.nan_to_num(mean)) / np.where(np.nan_to_num(std) > 0, std, 1.0))
+    return {pid: row.astype(np.float32) for pid, row in zip(ids, matrix)}, names
+
+
+def train(argv: Optional[List[str]] = None, use_propagation: bool = False,
+          checkpoint_name: str = 'best_cascade_gnn.pt'):
+    args = build_parser().parse_args(argv)
+    use_propagation = use_propagation or args.propagation
+    os.makedirs(args.save_dir, exist_ok=True)
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    logger.info(f"Using device: {device}")
+
+    labels, splits, records = load_labels(args.labels, with_cascade=use_propagation)
+    graph_attr, attr_names = (propagation_attr(records, splits['train']) if use_propagation else (None, []))
+    if use_propagation:
+        logger.info(f"Propagation features: {attr_names}")
+
+    datasets = {
+        split: CascadeGraphDataset(args.graphs, labels=labels, post_ids=ids, graph_attr=graph_attr)
+        for split, ids in splits.items()
+    }
+    for split, ds in datasets.items():
+        logger.info(f"{split}: {len(ds)} cascades, {int(ds.sizes.sum())} nodes")
+    if len(datasets['train']) == 0:
+        raise ValueError(f"No labelled cascades found in {args.graphs}")
+
+    train_sampler = SizeBucketSampler(datasets['train'].sizes, max_nodes=args.max_nodes,
+                                      max_graphs=args.max_graphs, shuffle=True)
+    logger.info(f"Train batches/epoch: {len(train_sampler)}, padding ratio if padded: {train_sampler.padding_ratio():.3f}")
+    loaders = {'train': make_cascade_loader(datasets['train'], train_sampler, num_workers=args.workers)}
+    for split in ('val', 'test'):
+        sampler = SizeBucketSampler(datasets[split].sizes, max_nodes=args.max_nodes,
+                                    max_graphs=args.max_graphs, shuffle=False)
+        loaders[split] = make_cascade_loader(datasets[split], sampler, num_workers=args.workers)
+
+    input_dim = datasets['train'][0].x.size(1)
+    model = CascadeGraphClassifier(
+        input_dim=input_dim,
+        hidden_dim=args.hidden_dim,
+        num_classes=len(CASCADE_LABELS),
+        num_layers=args.num_layers,
+        dropout=args.dropout,
+        gnn_type=args.gnn_type,
+        graph_attr_dim=len(attr_names)
+    ).to(device)
+
+    # Calculate class weights for imbalance
+    y_train = np.array([labels[pid] for pid in datasets['train'].post_ids])
+    counts = np.bincount(y_train, minlength=len(CASCADE_LABELS))
+    weights = torch.tensor(len(y_train) / (len(counts) * np.maximum(counts, 1)), dtype=torch.float, device=device)
+    logger.info(f"Class weights: {weights.tolist()}")
+
+    optimizer = optim.Adam(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
+    criterion = nn.CrossEntropyLoss(weight=weights)
+    save_path = os.path.join(args.save_dir, checkpoint_name)
+
+    best_val_f1 = -1.0
+    patience_counter = 0
+    logger.info("Starting Training...")
+
+    for epoch in range(1, args.epochs + 1):
+        model.train()
+        train_sampler.set_epoch(epoch)
+        total_loss, num_graphs, num_nodes = 0.0, 0, 0
+        start = time.perf_counter()
+
+        for batch in loaders['train']:
+            batch = batch.to(device)
+            optimizer.zero_grad()
+            logits = model(batch.x, batch.edge_index, batch.batch, batch.ptr, getattr(batch, 'graph_attr', None))
+            loss = criterion(logits, batch.y)
+            loss.backward()
+            optimizer.step()
+
+            total_loss += loss.item() * batch.num_graphs
+            num_graphs += batch.num_graphs
+            num_nodes += batch.x.size(0)
+
+        elapsed = time.perf_counter() - start
+        val_metrics = evaluate(model, loaders['val'], device, "val") if len(datasets['val']) else {'val_f1_macro': 0.0, 'val_acc': 0.0}
+        current_val_f1 = val_metrics['val_f1_macro']
+
+        logger.info(
+            f"Epoch {epoch:03d} | Loss: {total_loss / max(num_graphs, 1):.4f} | "
+            f"Val F1 (Macro): {current_val_f1:.4f} | Val Acc: {val_metrics['val_acc']:.4f} | "
+            f"{num_graphs / elapsed:.0f} graphs/s, {num_nodes / elapsed:.0f} nodes/s"
+        )
+
+        # Early Stopping based on Val Macro-F1
+        if current_val_f1 > best_val_f1:
+            best_val_f1 = current_val_f1
+            patience_counter = 0
+            torch.save(model.state_dict(), save_path)
+        else:
+            patience_counter += 1
+
+        if patience_counter >= args.patience:
+            logger.info(f"Early stopping at epoch {epoch}")
+            break
+
+    # Final Test Evaluation
+    logger.info("Training complete. Loading best model for testing...")
+    model.load_state_dict(torch.load(save_path, weights_only=False))
+
+    if len(datasets['test']) == 0:
+        logger.warning("No test cascades, skipping final evaluation")
+        return model
+
+    test_metrics = evaluate(model, loaders['test'], device, "test")
+    print("\n" + "=" * 30)
+    print("FINAL TEST RESULTS (cascade-level)")
+    print("=" * 30)
+    print(f"Accuracy:     {test_metrics['test_acc']:.4f}")
+    print(f"Macro-F1:     {test_metrics['test_f1_macro']:.4f}")
+    print(f"F1 (Fake):    {test_metrics['test_f1_fake']:.4f}")
+    print("=" * 30)
+    return model
+
+
+if __name__ == "__main__":
+    train()
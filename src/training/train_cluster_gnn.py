@@ -0,0 +1,231 @@
+"""
+Cluster-partitioned training of MultiModalFakeNewsGNN (Cluster-GCN style).
+
+For interaction graphs too large for full-batch train_gnn.py: the graph is
+partitioned once into balanced clusters (cached next to the graph file, see
+src/data/graph_partition.py) and every step trains on a random union of
+`clusters_per_batch` clusters. Memory per step is bounded by the clusters'
+size; evaluation also walks the clusters group by group.
+
+Features:
+- 6-class training, binary evaluation (same metrics as train_gnn.py).
+- Multi-worker subgraph loading from the memory-mapped partition.
+- Early Stopping based on Validation Macro-F1.
+- Max nodes/edges per step and peak RSS logged per epoch.
+
+Usage:
+    python src/training/train_cluster_gnn.py --graph data/04_graph/fakeddit_graph.pt --num_parts 128 --clusters_per_batch 8
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import logging
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+# Internal imports
+from src.data.graph_partition import GraphPartition
+from src.models.cascade_gnn import MultiModalFakeNewsGNN
+from src.training.profiler import peak_rss_mb
+from src.training.train_gnn import class_weights, split_metrics
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class ClusterUnionDataset(Dataset):
+    """Indexing with a list of cluster ids returns their union as one subgraph."""
+
+    def __init__(self, partition: GraphPartition):
+        self.partition = partition
+
+    def __len__(self) -> int:
+        return self.partition.num_parts
+
+    def __getitem__(self, clusters):
+        return self.partition.subgraph(clusters)
+
+
+class ClusterBatchSampler(Sampler):
+    """Random groups of `clusters_per_batch` clusters (reshuffled every epoch)."""
+
+    def __init__(self, clusters: np.ndarray, clusters_per_batch: int, shuffle: bool = True, seed: int = 42):
+        self.clusters = np.asarray(clusters, dtype=np.int64)
+        self.clusters_per_batch = clusters_per_batch
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[List[int]]:
+        order = self.clusters
+        if self.shuffle:
+            order = np.random.default_rng(self.seed + self.epoch).permutation(order)
+        for s in range(0, len(order), self.clusters_per_batch):
+            yield order[s:s + self.clusters_per_batch].tolist()
+
+    def __len__(self) -> int:
+        return -(-len(self.clusters) // self.clusters_per_batch)
+
+
+def make_loader(partition: GraphPartition, sampler: ClusterBatchSampler, num_workers: int = 0) -> DataLoader:
+    kwargs = {'persistent_workers': True, 'prefetch_factor': 2} if num_workers > 0 else {}
+    return DataLoader(ClusterUnionDataset(partition), sampler=sampler, batch_size=None,
+                      num_workers=num_workers, **kwargs)
+
+
+def evaluate(model, loader, device, split_name="val") -> Dict[str, float]:
+    model.eval()
+    preds, targets = [], []
+    mask_name = f'{split_name}_mask'
+    with torch.no_grad():
+        for sub in loader:
+            mask = sub[mask_name]
+            if not mask.any():
+                continue
+            sub = sub.to(device)
+            logits = model(sub.x, sub.edge_index, sub.edge_attr)
+            preds.append(logits[mask.to(device)].argmax(dim=-1).cpu())
+            targets.append(sub.y[mask.to(device)].cpu())
+    if not preds:
+        return split_metrics(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), split_name)
+    return split_metrics(torch.cat(preds).numpy(), torch.cat(targets).numpy(), split_name)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Cluster-partitioned GNN training on the interaction graph')
+    parser.add_argument('--graph', default='data/04_graph/fakeddit_graph.pt', help='Path to graph .pt file')
+    parser.add_argument('--num_parts', type=int, default=64, help='Number of clusters')
+    parser.add_argument('--method', choices=['auto', 'metis', 'lpa'], default='auto', help='Partitioning method')
+    parser.add_argument('--repartition', action='store_true', help='Ignore the cached partition')
+    parser.add_argument('--clusters_per_batch', type=int, default=4, help='Clusters merged per training step')
+    parser.add_argument('--epochs', type=int, default=100, help='Max number of epochs')
+    parser.add_argument('--lr', type=float, default=0.001, help='Learning rate')
+    parser.add_argument('--weight_decay', type=float, default=5e-4, help='Weight decay')
+    parser.add_argument('--hidden_dim', type=int, default=256, help='Hidden dimension')
+    parser.add_argument('--dropout', type=float, default=0.3, help='Dropout rate')
+    parser.add_argument('--gnn_type', choices=['gat', 'sage', 'gcn', 'rgcn'], default='sage', help='GNN layer type')
+    parser.add_argument('--patience', type=int, default=15, help='Patience for early stopping')
+    parser.add_argument('--workers', type=int, default=2, help='DataLoader worker processes')
+    parser.add_argument('--save_dir', default='models/checkpoints', help='Directory to save models')
+    return parser
+
+
+def train(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    os.makedirs(args.save_dir, exist_ok=True)
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    logger.info(f"Using device: {device}")
+
+    partition = GraphPartition.load_or_build(args.graph, num_parts=args.num_parts,
+                                             method=args.method, force=args.repartition)
+    meta = partition.meta
+    logger.info(f"Partition: {meta['num_parts']} clusters ({meta['method']}), edge cut {meta['edge_cut']:.3f}, "
+                f"cluster size {meta['min_part_nodes']}-{meta['max_part_nodes']} nodes")
+
+    train_sampler = ClusterBatchSampler(partition.split_parts('train'), args.clusters_per_batch, shuffle=True)
+    loaders = {'train': make_loader(partition, train_sampler, args.workers)}
+    for split in ('val', 'test'):
+        sampler = ClusterBatchSampler(partition.split_parts(split), args.clusters_per_batch, shuffle=False)
+        loaders[split] = make_loader(partition, sampler, args.workers)
+
+    y = np.load(partition.root / 'y.npy', mmap_mode='r')
+    split_codes = np.load(partition.root / 'split.npy', mmap_mode='r')
+    weights = class_weights(np.asarray(y[split_codes == 0]), device)
+    logger.info(f"Class weights: {weights.tolist()}")
+
+    model = MultiModalFakeNewsGNN(
+        input_dim=meta['dim'],
+        hidden_dim=args.hidden_dim,
+        num_classes=6,
+        dropout=args.dropout,
+        gnn_type=args.gnn_type
+    ).to(device)
+    optimizer = optim.Adam(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
+    criterion = nn.CrossEntropyLoss(weight=weights)
+    save_path = os.path.join(args.save_dir, 'best_cluster_gnn_model.pt')
+
+    best_val_f1 = 0
+    patience_counter = 0
+    logger.info("Starting Training...")
+
+    for epoch in range(1, args.epochs + 1):
+        model.train()
+        train_sampler.set_epoch(epoch)
+        start = time.perf_counter()
+        total_loss, seen, max_nodes, max_edges = 0.0, 0, 0, 0
+
+        for sub in loaders['train']:
+            max_nodes = max(max_nodes, sub.num_nodes)
+            max_edges = max(max_edges, sub.num_edges)
+            if not sub.train_mask.any():
+                continue
+            sub = sub.to(device)
+            optimizer.zero_grad()
+            logits = model(sub.x, sub.edge_index, sub.edge_attr)
+            loss = criterion(logits[sub.train_mask], sub.y[sub.train_mask])
+            loss.backward()
+            optimizer.step()
+            n = int(sub.train_mask.sum())
+            total_loss += loss.item() * n
+            seen += n
+
+        elapsed = time.perf_counter() - start
+        val_metrics = evaluate(model, loaders['val'], device, "val")
+        current_val_f1 = val_metrics['val_f1_macro_6']
+
+        if epoch % 5 == 0 or epoch == 1:
+            logger.info(
+                f"Epoch {epoch:03d} | Loss: {total_loss / max(seen, 1):.4f} | Val F1 (Macro): {current_val_f1:.4f} | "
+                f"Val Acc (Bin): {val_metrics['val_acc_bin']:.4f} | {seen / elapsed:,.0f} train nodes/s | "
+                f"max/step {max_nodes} nodes {max_edges} edges | peak RSS {peak_rss_mb():.0f} MB"
+            )
+
+        # Early Stopping based on Val Macro-F1
+        if current_val_f1 > best_val_f1 or epoch == 1:
+            best_val_f1 = current_val_f1
+            patience_counter = 0
+            torch.save(model.state_dict(), save_path)
+        else:
+            patience_counter += 1
+
+        if patience_counter >= args.patience:
+            logger.info(f"Early stopping at epoch {epoch}")
+            break
+
+    # Final Test Evaluation
+    logger.info("Training complete. Loading best model for testing...")
+    model.load_state_dict(torch.load(save_path, weights_only=False))
+    test_metrics = evaluate(model, loaders['test'], device, "test")
+
+    print("\n" + "=" * 30)
+    print(f"FINAL TEST RESULTS (cluster-partitioned, {meta['num_parts']} clusters)")
+    print("=" * 30)
+    print(f"6-Class Accuracy:  {test_metrics['test_acc_6']:.4f}")
+    print(f"6-Class Macro-F1:  {test_metrics['test_f1_macro_6']:.4f}")
+    print(f"Binary Accuracy:   {test_metrics['test_acc_bin']:.4f}")
+    print(f"Binary F1:         {test_metrics['test_f1_bin']:.4f}")
+    print(f"Peak RSS:          {peak_rss_mb():.0f} MB")
+    print("=" * 30)
+    return model
+
+
+if __name__ == "__main__":
+    train()
@@ -5,6 +5,8 @@ Features:
 - 6-class classification.
 - Binary evaluation monitoring.
 - Early Stopping based on Validation Macro-F1.
+- Optional fast path (--fast): bf16 autocast + torch.compile for node-wise ops, pre-sorted CSR adjacency.
+- --adjacency symmetric: train on the symmetrised adjacency cached with the graph (CSR reused as is by --fast).
 """
 
 import os
@@ -19,45 +21,131 @@ if project_root not in sys.path:
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from sklearn.metrics import f1_score, accuracy_score, classification_report
+import time
 import argparse
 from pathlib import Path
 import logging
-from typing import Dict
+from typing import Dict, Optional
 
 # Internal imports
 from src.data.dataloader import FakeNewsGraphDataset
+from src.evaluation.evaluator import Evaluator
+from src.features.graph_builder import symmetric_edge_index
+from src.evaluation.metrics import classification_metrics
 from src.models.cascade_gnn import MultiModalFakeNewsGNN
+from src.models.inference_engine import GNNInferenceEngine
+from src.training.profiler import TrainingProfiler
+from src.training.fast_path import FastPath, speed_report
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def evaluate(model, data, mask, split_name="val") -> Dict[str, float]:
-    model.eval()
+def split_metrics(preds_6, targets_6, split_name="val") -> Dict[str, float]:
+    """6-class + binary accuracy / F1 from 6-class predictions (tensors on any device or numpy arrays)."""
+    # One on-device confusion matrix; binary: 0,1,2 -> 0 (True), 3,4,5 -> 1 (Fake)
+    return classification_metrics(preds_6, targets_6, prefix=f'{split_name}_')
+
+def evaluate(model, data, mask, split_name="val", engine: Optional[GNNInferenceEngine] = None) -> Dict[str, float]:
+    # Engine caches the full-graph pass: val/test/report with the same weights share one forward
+    engine = engine or GNNInferenceEngine(model)
     with torch.no_grad():
-        logits = model(data.x, data.edge_index)
-        
-        # 6-class metrics
-        preds_6 = logits[mask].argmax(dim=-1).cpu().numpy()
-        targets_6 = data.y[mask].cpu().numpy()
-        
-        acc_6 = accuracy_score(targets_6, preds_6)
-        f1_macro_6 = f1_score(targets_6, preds_6, average='macro')
+        logits = engine.logits(data.x, data.edge_index, data.edge_attr)
         
-        # Binary metrics
-        # Map 6-class to binary: 0,1,2 -> 0 (True), 3,4,5 -> 1 (Fake)
-        preds_bin = (preds_6 >= 3).astype(int)
-        targets_bin = (targets_6 >= 3).astype(int)
+        # 6-class metrics (stay on device)
+        preds_6 = logits[mask].argmax(dim=-1)
+        targets_6 = data.y[mask]
         
-        acc_bin = accuracy_score(targets_bin, preds_bin)
-        f1_bin = f1_score(targets_bin, preds_bin, average='binary')
+    return split_metrics(preds_6, targets_6, split_name)
+
+def class_weights(y_train, device, num_classes: int = 6) -> torch.Tensor:
+    """Balanced class weights; classes missing from the train split get weight 1."""
+    from sklearn.utils.class_weight import compute_class_weight
+    import numpy as np
+    
+    classes = np.unique(y_train)
+    weights = compute_class_weight(class_weight='balanced', classes=classes, y=y_train)
+    # Ensure weight vector covers all 6 classes even if some are missing in train_mask
+    full_weights = torch.ones(num_classes).to(device)
+    for i, c in enumerate(classes):
+        full_weights[c] = weights[i]
+    return full_weights
+
+def fit(
+    model,
+    data,
+    args,
+    save_path: str,
+    engine: GNNInferenceEngine,
+    weights: torch.Tensor,
+    profiler: Optional[TrainingProfiler] = None,
+    fast: Optional[FastPath] = None
+) -> float:
+    """
+    Full-batch training with early stopping on Val Macro-F1 (best weights saved to save_path).
+    
+    Args:
+        profiler: Optional TrainingProfiler (phase / per-layer timings per epoch)
+        fast: Optional FastPath already applied to the model (train / eval on its sorted adjacency)
+    
+    Returns:
+        Best validation Macro-F1
+    """
+    optimizer = optim.Adam(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
+    criterion = nn.CrossEntropyLoss(weight=weights)
+    profiler = profiler or TrainingProfiler(enabled=False)
+    
+    # Same tensors as data, edge_index swapped for the fast path's CSR / sorted COO
+    graph = fast.graph if fast is not None else data
+    
+    best_val_f1 = 0
+    patience_counter = 0
+    epoch_seconds = []
+    
+    logger.info("Starting Training...")
+    
+    for epoch in range(1, args.epochs + 1):
+        epoch_start = time.perf_counter()
+        with profiler.epoch(epoch):
+            model.train()
+            with profiler.phase('forward'):
+                optimizer.zero_grad()
+                logits = model(graph.x, graph.edge_index, graph.edge_attr)
+                loss = criterion(logits[graph.train_mask], graph.y[graph.train_mask])
+            
+            with profiler.phase('backward'):
+                loss.backward()
+            with profiler.phase('optimizer'):
+                optimizer.step()
+            
+            # Evaluate
+            with profiler.phase('eval'):
+                val_metrics = evaluate(model, graph, graph.val_mask, "val", engine)
+        epoch_seconds.append(time.perf_counter() - epoch_start)
+        current_val_f1 = val_metrics['val_f1_macro_6']
         
-    return {
-        f'{split_name}_acc_6': acc_6,
-        f'{split_name}_f1_macro_6': f1_macro_6,
-        f'{split_name}_acc_bin': acc_bin,
-        f'{split_name}_f1_bin': f1_bin
-    }
+        if epoch % 5 == 0:
+            logger.info(f"Epoch {epoch:03d} | Loss: {loss.item():.4f} | Val F1 (Macro): {current_val_f1:.4f} | Val Acc (Bin): {val_metrics['val_acc_bin']:.4f} | {epoch_seconds[-1] * 1000:.0f} ms")
+            
+        # Early Stopping based on Val Macro-F1
+        if current_val_f1 > best_val_f1 or epoch == 1:
+            best_val_f1 = current_val_f1
+            patience_counter = 0
+            # Save best model
+            torch.save(model.state_dict(), save_path)
+        else:
+            patience_counter += 1
+            
+        if patience_counter >= args.patience:
+            logger.info(f"Early stopping at epoch {epoch}")
+            break
+    
+    speed = speed_report(epoch_seconds, data.num_nodes, 'fast' if fast is not None else 'fp32')
+    if speed:
+        logger.info(f"⏱️ Speed ({speed['label']}): first epoch {speed['first_epoch_s'] * 1000:.0f} ms, "
+                    f"median {speed['median_epoch_s'] * 1000:.0f} ms, min {speed['min_epoch_s'] * 1000:.0f} ms "
+                    f"({speed['nodes_per_s']:,.0f} nodes/s)")
+    
+    return best_val_f1
 
 def train():
     parser = argparse.ArgumentParser(description='Train GNN on Interaction Graph')
@@ -67,11 +155,21 @@ def train():
     parser.add_argument('--weight_decay', type=float, default=5e-4, help='Weight decay')
     parser.add_argument('--hidden_dim', type=int, default=256, help='Hidden dimension')
     parser.add_argument('--dropout', type=float, default=0.3, help='Dropout rate')
-    parser.add_argument('--gnn_type', choices=['gat', 'sage', 'gcn'], default='gat', help='GNN layer type')
+    parser.add_argument('--gnn_type', choices=['gat', 'sage', 'gcn', 'rgcn'], default='gat', help='GNN layer type (rgcn: text/image edge types via edge_attr)')
     parser.add_argument('--patience', type=int, default=15, help='Patience for early stopping')
     parser.add_argument('--save_dir', default='models/checkpoints', help='Directory to save models')
+    parser.add_argument('--export_embeddings', default=None, help='Optional .npy path for final node embeddings (memory-mapped)')
+    parser.add_argument('--profile', default=None, help='Optional directory for profile.json (per-epoch phase / layer timings, peak RSS)')
+    parser.add_argument('--trace_epochs', type=int, default=0, help='With --profile: epochs recorded as Chrome trace (trace.json)')
+    parser.add_argument('--fast', action='store_true', help='Fast path: bf16 autocast + torch.compile for node-wise ops, pre-sorted CSR adjacency')
+    parser.add_argument('--bf16', choices=['auto', 'on', 'off'], default='auto', help='With --fast: bf16 autocast (auto = only with native bf16 support)')
+    parser.add_argument('--no_compile', action='store_true', help='With --fast: skip torch.compile')
+    parser.add_argument('--adjacency', choices=['directed', 'symmetric'], default='directed', help='directed: Top-K edge_index as built; symmetric: cached deduplicated undirected adjacency (not for rgcn)')
+    parser.add_argument('--parity_tol', type=float, default=0.01, help='With --fast: max allowed Val Macro-F1 gap vs the fp32 eager path')
     
     args = parser.parse_args()
+    if args.adjacency == 'symmetric' and args.gnn_type == 'rgcn':
+        parser.error("--adjacency symmetric merges text/image edges, rgcn needs --adjacency directed")
     os.makedirs(args.save_dir, exist_ok=True)
     
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
@@ -84,6 +182,10 @@ def train():
     
     dataset = FakeNewsGraphDataset(graph_path=args.graph)
     data = dataset.graph.to(device)
+    if args.adjacency == 'symmetric':
+        # Every pass (train / eval / export) sees the same undirected graph
+        data.edge_index, data.edge_attr = symmetric_edge_index(data), None
+        logger.info(f"Symmetric adjacency: {data.edge_index.size(1)} edges")
     
     # Initialize model
     model = MultiModalFakeNewsGNN(
@@ -93,65 +195,39 @@ def train():
         dropout=args.dropout,
         gnn_type=args.gnn_type
     ).to(device)
+    engine = GNNInferenceEngine(model)
     
     # Calculate class weights for imbalance
-    y_train = data.y[data.train_mask].cpu().numpy()
-    from sklearn.utils.class_weight import compute_class_weight
-    import numpy as np
-    
-    classes = np.unique(y_train)
-    weights = compute_class_weight(class_weight='balanced', classes=classes, y=y_train)
-    # Ensure weight vector covers all 6 classes even if some are missing in train_mask
-    full_weights = torch.ones(6).to(device)
-    for i, c in enumerate(classes):
-        full_weights[c] = weights[i]
-    
+    full_weights = class_weights(data.y[data.train_mask].cpu().numpy(), device)
     logger.info(f"Class weights: {full_weights.tolist()}")
     
-    optimizer = optim.Adam(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
-    criterion = nn.CrossEntropyLoss(weight=full_weights)
-    
-    best_val_f1 = 0
-    patience_counter = 0
-    
-    logger.info("Starting Training...")
-    
-    for epoch in range(1, args.epochs + 1):
-        model.train()
-        optimizer.zero_grad()
-        
-        logits = model(data.x, data.edge_index)
-        loss = criterion(logits[data.train_mask], data.y[data.train_mask])
-        
-        loss.backward()
-        optimizer.step()
-        
-        # Evaluate
-        val_metrics = evaluate(model, data, data.val_mask, "val")
-        current_val_f1 = val_metrics['val_f1_macro_6']
-        
-        if epoch % 5 == 0:
-            logger.info(f"Epoch {epoch:03d} | Loss: {loss.item():.4f} | Val F1 (Macro): {current_val_f1:.4f} | Val Acc (Bin): {val_metrics['val_acc_bin']:.4f}")
-            
-        # Early Stopping based on Val Macro-F1
-        if current_val_f1 > best_val_f1:
-            best_val_f1 = current_val_f1
-            patience_counter = 0
-            # Save best model
-            save_path = os.path.join(args.save_dir, 'best_gnn_model.pt')
-            torch.save(model.state_dict(), save_path)
-        else:
-            patience_counter += 1
-            
-        if patience_counter >= args.patience:
-            logger.info(f"Early stopping at epoch {epoch}")
-            break
+    save_path = os.path.join(args.save_dir, 'best_gnn_model.pt')
+    profiler = TrainingProfiler(
+        model, out_dir=args.profile, enabled=bool(args.profile), trace_epochs=args.trace_epochs,
+        config={k: getattr(args, k) for k in ('graph', 'gnn_type', 'hidden_dim', 'dropout', 'lr', 'adjacency')}
+    )
+    fast = FastPath(model, data, bf16=args.bf16, compile=not args.no_compile,
+                    symmetric=args.adjacency == 'symmetric') if args.fast else None
+    fit(model, data, args, save_path, engine, full_weights, profiler, fast)
+    if args.profile:
+        profiler.save()
+        profiler.print_summary()
+        logger.info(f"Profile saved to {args.profile}")
             
     # Final Test Evaluation
     logger.info("Training complete. Loading best model for testing...")
-    model.load_state_dict(torch.load(os.path.join(args.save_dir, 'best_gnn_model.pt'), weights_only=False))
+    model.load_state_dict(torch.load(save_path, weights_only=False))
+    
+    if fast is not None:
+        # Best weights: fast path vs fp32 eager on the original edge_index, then report in fp32
+        parity = fast.parity_check(data, tolerance=args.parity_tol)
+        logger.info(f"Parity: Val F1 fast {parity['fast']['val_f1_macro_6']:.4f} vs fp32 {parity['eager']['val_f1_macro_6']:.4f} "
+                    f"(diff {parity['f1_diff']:.4f}, max logit diff {parity['max_logit_diff']:.4f})")
+        if not parity['ok']:
+            logger.warning(f"⚠️ Fast path Val F1 differs by more than {args.parity_tol} from fp32, consider --bf16 off")
+        fast.restore()
     
-    test_metrics = evaluate(model, data, data.test_mask, "test")
+    test_metrics = evaluate(model, data, data.test_mask, "test", engine)
     
     print("\n" + "="*30)
     print("FINAL TEST RESULTS")
@@ -162,19 +238,14 @@ def train():
     print(f"Binary F1:         {test_metrics['test_f1_bin']:.4f}")
     print("="*30)
     
-    # Detailed report
-    model.eval()
+    # Detailed report with 95% bootstrap CIs (served from the cached test pass, no extra forward)
     with torch.no_grad():
-        logits = model(data.x, data.edge_index)
-        preds = logits[data.test_mask].argmax(dim=-1).cpu().numpy()
-        targets = data.y[data.test_mask].cpu().numpy()
-        
-        print("\nClassification Report (6-Class):")
-        target_names = ['TRUE', 'MOSTLY_TRUE', 'HALF_TRUE', 'BARELY_TRUE', 'FALSE', 'PANTS_ON_FIRE']
-        # Map target names present in this test split
-        present_classes = sorted(list(set(targets) | set(preds)))
-        present_names = [target_names[i] for i in present_classes]
-        print(classification_report(targets, preds, target_names=present_names, labels=present_classes))
+        preds_6, _ = engine.predict(data.x, data.edge_index, data.edge_attr)
+        Evaluator(preds_6[data.test_mask], data.y[data.test_mask]).print_report()
+    
+    if args.export_embeddings:
+        engine.export_embeddings(data.x, data.edge_index, args.export_embeddings, edge_attr=data.edge_attr)
+        logger.info(f"Embeddings saved to {args.export_embeddings} ({engine.passes} full-graph passes in total)")
 
 if __name__ == "__main__":
     train()
\ No newline at end of file
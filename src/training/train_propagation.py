@@ -1 +1,28 @@
-def train(): pass
\ No newline at end of file
+"""
+Training script for cascade GNN + propagation features.
+
+Same trainer as train_cascade_gnn.py, with the graph-level propagation
+statistics (depth, breadth, structural virality, reply times, early bursts;
+see src/features/propagation_extractor.py) concatenated to the graph readout.
+
+Usage:
+    python src/training/train_propagation.py --graphs data/processed_graphs.pack --workers 4
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.training.train_cascade_gnn import train as train_cascade
+
+
+def train():
+    return train_cascade(use_propagation=True, checkpoint_name='best_propagation_gnn.pt')
+
+
+if __name__ == "__main__":
+    train()
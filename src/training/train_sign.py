@@ -0,0 +1,241 @@
+"""
+Fast training mode: SIGN MLP over precomputed propagated features.
+
+A^k·X (k = 0..K) is computed once for the Top-K interaction graph and cached
+memory-mapped next to the graph file (<graph>.sign<K>/), then an MLP trains
+on shuffled mini-batches of node rows; no sparse propagation per step.
+
+Features:
+- 6-class training, binary evaluation (same metrics as train_gnn.py).
+- Multi-worker mini-batch loading straight from the memory map.
+- Early Stopping based on Validation Macro-F1.
+- --compare: also trains the message-passing model (train_gnn.fit) and prints
+  accuracy/F1 parity and the end-to-end speedup.
+
+Usage:
+    python src/training/train_sign.py --graph data/04_graph/fakeddit_graph.pt --num_hops 3
+    python src/training/train_sign.py --compare --gnn_type gcn
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import BatchSampler, DataLoader, Dataset, RandomSampler, SequentialSampler
+
+# Internal imports
+from src.data.dataloader import FakeNewsGraphDataset
+from src.features.sign_features import SignFeatures
+from src.models.sign_mlp import SIGNClassifier
+from src.training.train_gnn import class_weights, split_metrics
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class SignNodeDataset(Dataset):
+    """
+    Nodes of one split; indexing with a list of positions returns a whole batch (x, y).
+    """
+
+    def __init__(self, features: SignFeatures, node_ids: np.ndarray, labels: np.ndarray):
+        self.features = features
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.labels = torch.as_tensor(labels, dtype=torch.long)
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def __getitem__(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        return self.features.rows(self.node_ids[positions]), self.labels[positions]
+
+
+def make_loader(dataset: SignNodeDataset, batch_size: int, shuffle: bool, num_workers: int = 0) -> DataLoader:
+    base = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+    sampler = BatchSampler(base, batch_size=batch_size, drop_last=False)
+    kwargs = {'persistent_workers': True, 'prefetch_factor': 4} if num_workers > 0 else {}
+    return DataLoader(dataset, sampler=sampler, batch_size=None, num_workers=num_workers, **kwargs)
+
+
+def predict(model, loader, device) -> np.ndarray:
+    model.eval()
+    preds = []
+    with torch.no_grad():
+        for x, _ in loader:
+            preds.append(model(x.to(device)).argmax(dim=-1).cpu())
+    return torch.cat(preds).numpy() if preds else np.zeros(0, dtype=np.int64)
+
+
+def evaluate(model, loader, targets: np.ndarray, device, split_name="val") -> Dict[str, float]:
+    return split_metrics(predict(model, loader, device), targets, split_name)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Train SIGN MLP on precomputed graph propagation')
+    parser.add_argument('--graph', default='data/04_graph/fakeddit_graph.pt', help='Path to graph .pt file')
+    parser.add_argument('--num_hops', type=int, default=3, help='K: precompute A^k X for k=0..K')
+    parser.add_argument('--recompute', action='store_true', help='Ignore the cached propagated features')
+    parser.add_argument('--epochs', type=int, default=100, help='Max number of epochs')
+    parser.add_argument('--batch_size', type=int, default=2048, help='Nodes per mini-batch')
+    parser.add_argument('--lr', type=float, default=0.001, help='Learning rate')
+    parser.add_argument('--weight_decay', type=float, default=5e-4, help='Weight decay')
+    parser.add_argument('--hidden_dim', type=int, default=256, help='Hidden dimension')
+    parser.add_argument('--dropout', type=float, default=0.3, help='Dropout rate')
+    parser.add_argument('--patience', type=int, default=15, help='Patience for early stopping')
+    parser.add_argument('--workers', type=int, default=0, help='DataLoader worker processes')
+    parser.add_argument('--save_dir', default='models/checkpoints', help='Directory to save models')
+    parser.add_argument('--compare', action='store_true', help='Also train the message-passing GNN and report parity/speedup')
+    parser.add_argument('--gnn_type', choices=['gat', 'sage', 'gcn', 'rgcn'], default='gcn', help='GNN layer type for --compare')
+    return parser
+
+
+def train_message_passing(data, args, device) -> Dict[str, float]:
+    """Baseline for --compare: full-batch MultiModalFakeNewsGNN via train_gnn.fit."""
+    from src.models.cascade_gnn import MultiModalFakeNewsGNN
+    from src.models.inference_engine import GNNInferenceEngine
+    from src.training.train_gnn import evaluate as evaluate_gnn, fit
+
+    start = time.perf_counter()
+    data = data.to(device)
+    model = MultiModalFakeNewsGNN(
+        input_dim=data.x.size(1),
+        hidden_dim=args.hidden_dim,
+        num_classes=6,
+        dropout=args.dropout,
+        gnn_type=args.gnn_type
+    ).to(device)
+    engine = GNNInferenceEngine(model)
+    save_path = os.path.join(args.save_dir, 'best_gnn_model_compare.pt')
+    fit(model, data, args, save_path, engine, class_weights(data.y[data.train_mask].cpu().numpy(), device))
+    model.load_state_dict(torch.load(save_path, weights_only=False))
+    metrics = evaluate_gnn(model, data, data.test_mask, "test", engine)
+    metrics['seconds'] = time.perf_counter() - start
+    return metrics
+
+
+def train(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    os.makedirs(args.save_dir, exist_ok=True)
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    logger.info(f"Using device: {device}")
+
+    from torch_geometric.data import Data
+    torch.serialization.add_safe_globals([Data])
+    data = FakeNewsGraphDataset(graph_path=args.graph, device='cpu').graph
+
+    total_start = time.perf_counter()
+    features = SignFeatures.load_or_compute(args.graph, data, num_hops=args.num_hops, force=args.recompute)
+    precompute_s = time.perf_counter() - total_start
+
+    y = data.y.cpu().numpy()
+    splits = {name: np.flatnonzero(getattr(data, f'{name}_mask').cpu().numpy()) for name in ('train', 'val', 'test')}
+    loaders = {
+        name: make_loader(SignNodeDataset(features, ids, y[ids]), args.batch_size,
+                          shuffle=(name == 'train'), num_workers=args.workers)
+        for name, ids in splits.items()
+    }
+
+    model = SIGNClassifier(
+        input_dim=features.dim,
+        num_hops=features.num_hops,
+        hidden_dim=args.hidden_dim,
+        num_classes=6,
+        dropout=args.dropout
+    ).to(device)
+
+    weights = class_weights(y[splits['train']], device)
+    logger.info(f"Class weights: {weights.tolist()}")
+    optimizer = optim.Adam(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
+    criterion = nn.CrossEntropyLoss(weight=weights)
+    save_path = os.path.join(args.save_dir, 'best_sign_model.pt')
+
+    best_val_f1 = 0
+    patience_counter = 0
+    train_start = time.perf_counter()
+    logger.info("Starting Training...")
+
+    for epoch in range(1, args.epochs + 1):
+        model.train()
+        epoch_start = time.perf_counter()
+        total_loss, seen = 0.0, 0
+        for xb, yb in loaders['train']:
+            xb, yb = xb.to(device), yb.to(device)
+            optimizer.zero_grad()
+            loss = criterion(model(xb), yb)
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * yb.size(0)
+            seen += yb.size(0)
+
+        val_metrics = evaluate(model, loaders['val'], y[splits['val']], device, "val")
+        current_val_f1 = val_metrics['val_f1_macro_6']
+
+        if epoch % 5 == 0:
+            logger.info(
+                f"Epoch {epoch:03d} | Loss: {total_loss / max(seen, 1):.4f} | Val F1 (Macro): {current_val_f1:.4f} | "
+                f"Val Acc (Bin): {val_metrics['val_acc_bin']:.4f} | {seen / (time.perf_counter() - epoch_start):,.0f} nodes/s"
+            )
+
+        # Early Stopping based on Val Macro-F1
+        if current_val_f1 > best_val_f1 or epoch == 1:
+            best_val_f1 = current_val_f1
+            patience_counter = 0
+            torch.save(model.state_dict(), save_path)
+        else:
+            patience_counter += 1
+
+        if patience_counter >= args.patience:
+            logger.info(f"Early stopping at epoch {epoch}")
+            break
+
+    # Final Test Evaluation
+    logger.info("Training complete. Loading best model for testing...")
+    model.load_state_dict(torch.load(save_path, weights_only=False))
+    test_metrics = evaluate(model, loaders['test'], y[splits['test']], device, "test")
+    train_s = time.perf_counter() - train_start
+    sign_total_s = time.perf_counter() - total_start
+
+    print("\n" + "=" * 30)
+    print(f"FINAL TEST RESULTS (SIGN, K={features.num_hops})")
+    print("=" * 30)
+    print(f"6-Class Accuracy:  {test_metrics['test_acc_6']:.4f}")
+    print(f"6-Class Macro-F1:  {test_metrics['test_f1_macro_6']:.4f}")
+    print(f"Binary Accuracy:   {test_metrics['test_acc_bin']:.4f}")
+    print(f"Binary F1:         {test_metrics['test_f1_bin']:.4f}")
+    print(f"Precompute: {precompute_s:.2f}s | Train+eval: {train_s:.2f}s | Total: {sign_total_s:.2f}s")
+    print("=" * 30)
+
+    if args.compare:
+        logger.info(f"Training message-passing baseline ({args.gnn_type}) for comparison...")
+        gnn_metrics = train_message_passing(data, args, device)
+        print("\n" + "=" * 56)
+        print(f"PARITY: SIGN (K={features.num_hops}) vs message passing ({args.gnn_type})")
+        print("=" * 56)
+        print(f"{'metric':<18}{'SIGN':>10}{'GNN':>10}{'delta':>10}")
+        for key in ('test_acc_6', 'test_f1_macro_6', 'test_acc_bin', 'test_f1_bin'):
+            print(f"{key[5:]:<18}{test_metrics[key]:>10.4f}{gnn_metrics[key]:>10.4f}{test_metrics[key] - gnn_metrics[key]:>+10.4f}")
+        print(f"{'seconds':<18}{sign_total_s:>10.2f}{gnn_metrics['seconds']:>10.2f}")
+        print(f"End-to-end speedup (incl. precompute): {gnn_metrics['seconds'] / max(sign_total_s, 1e-9):.2f}x")
+        print("=" * 56)
+
+    return model
+
+
+if __name__ == "__main__":
+    train()
@@ -6,10 +6,17 @@ Usage:
     python src/utils/batch_extractor.py --start 200 --count 200 --output batch2
 """
 
-import json
+import sys
 import argparse
 from pathlib import Path
 
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.utils.jsonl_index import JsonlOffsetIndex
+
 
 def extract_batch(
     input_file: str,
@@ -33,12 +40,11 @@ def extract_batch(
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # Read all lines
+    # Sidecar offset index (<input>.idx): built once, only the appended tail is rescanned later
     print(f"📖 Reading from: {input_file}")
-    with open(input_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    index = JsonlOffsetIndex(input_path)
     
-    total = len(lines)
+    total = len(index)
     print(f"   Total records: {total}")
     
     # Validate range
@@ -49,17 +55,15 @@ def extract_batch(
     end_idx = min(start_idx + count, total)
     actual_count = end_idx - start_idx
     
-    # Extract batch
-    batch_lines = lines[start_idx:end_idx]
-    
     # Create output filename: Fakeddit_{start}_{end}.jsonl
     output_filename = f"Fakeddit_{start_idx}_{end_idx}.jsonl"
     output_file = output_path / output_filename
     
     print(f"📤 Extracting records [{start_idx} - {end_idx}) ({actual_count} records)")
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for line in batch_lines:
+    # Seek straight to start_idx and copy raw bytes: cost depends on count, not start_idx
+    with open(output_file, 'wb') as f:
+        for line in index.iter_raw_lines(start_idx, end_idx):
             f.write(line)
     
     print(f"✅ Saved to: {output_file}")
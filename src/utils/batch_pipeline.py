@@ -1,113 +1,218 @@
 """
 Batch Processing Pipeline for Fakeddit Dataset.
-Automates 4 steps: Extraction -> Image Processing -> Text Processing -> Validation.
+Automates 5 steps: Extraction -> Image Processing -> Text Processing -> Validation -> Label Studio export.
+
+All steps run in-process as a DAG (see src/utils/pipeline_runner.py): each step is
+skipped when the content hash of its inputs is unchanged since its last successful
+run, and independent batches run concurrently in a process pool. Every step reports
+wall time and peak memory.
 
 Usage:
     python src/utils/batch_pipeline.py --start 200 --count 200
+    python src/utils/batch_pipeline.py --start 200 --count 200 --num-batches 4 --workers 4
 """
 
 import os
 import sys
-import subprocess
+import json
 import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.utils.pipeline_runner import Pipeline, print_report
+
+CACHE_DIR = "data/.pipeline_cache"
+
+
+def build_batch_pipeline(start: int, count: int, input_raw: str, force: bool = False) -> Pipeline:
+    """
+    Build the extract -> image -> text -> validate -> ls_export DAG for one batch.
+
+    Heavy modules (PIL, requests, sklearn, jsonschema) are imported inside the step
+    functions, i.e. once per process instead of once per step.
+
+    Args:
+        start: Starting index (0-based)
+        count: Number of samples in batch
+        input_raw: Path to master raw file
+        force: Ignore cached step results
+    """
+    end = start + count
+    batch_name = f"batch_{start}_{end}"
+    batch_suffix = f"{start}_{end}"
+    raw_batch_dir = "data/01_raw/Fakeddit/batches"
+    raw_batch_file = f"{raw_batch_dir}/Fakeddit_{start}_{end}.jsonl"
+    # Mỗi batch có file 02_processed riêng -> không cần xóa dataset_output.jsonl chung để "cô lập"
+    output_02_dir = f"data/02_processed/Fakeddit/{batch_name}"
+    image_processed_file = f"{output_02_dir}/dataset_output.jsonl"
+    output_clean_dir = f"data/03_clean/Fakeddit/{batch_name}"
+    processed_val_file = f"{output_clean_dir}/Fakeddit/train.jsonl"
+    ls_output_file = f"{output_clean_dir}/train_for_ls.json"
+    validation_log_file = f"{output_clean_dir}/validation_report.log"
+
+    pipeline = Pipeline(batch_name, cache_path=f"{CACHE_DIR}/{batch_name}.json", force=force)
+
+    def extract():
+        from src.utils.batch_extractor import extract_batch
+        if extract_batch(input_raw, start, count, raw_batch_dir) is None:
+            raise RuntimeError(f"Could not extract records [{start}, {end}) from {input_raw}")
+
+    def process_images():
+        from src.data.fakeddit_preprocessor_image import ImageProcessor
+        # process_batch appends to the shared file: start from an empty per-batch file
+        if os.path.exists(image_processed_file):
+            os.remove(image_processed_file)
+        processor = ImageProcessor(
+            target_size=(224, 224),
+            output_base_dir="data/02_processed",
+            timeout=15,
+            max_samples=None,
+            padding_color=(0, 0, 0)
+        )
+        processor.process_batch(
+            input_jsonl=raw_batch_file,
+            shared_output=image_processed_file,
+            individual_output_base=f"data/02_processed/Fakeddit/dataset_Fakeddit_{batch_suffix}",
+            dataset_name="Fakeddit",
+            use_padding=True,
+            batch_name=batch_suffix
+        )
+
+    def process_text():
+        from src.data.fakeddit_process_text import FakedditDataProcessor
+        processor = FakedditDataProcessor(
+            input_file=image_processed_file,
+            output_02_dir=output_02_dir,
+            output_03_dir=output_clean_dir,
+            min_text_length=5,
+            max_text_length=5000,
+            train_ratio=0.7,
+            val_ratio=0.15
+        )
+        processor.process()
+
+    def validate():
+        validate_dir = os.path.join(project_root, "validate")
+        if validate_dir not in sys.path:
+            sys.path.insert(0, validate_dir)
+        try:
+            from validate_schema import run_validation
+            total_errors = run_validation(raw_batch_file, processed_val_file, workers=1,
+                                          log_file=validation_log_file)
+        except Exception as e:
+            print(f"⚠️ Validation could not run: {e}")
+            return
+        if total_errors > 0:
+            print("⚠️ Validation reported issues, but pipeline finished. Check logs.")
+
+    def export_label_studio():
+        from src.utils.convert_to_ls_json import convert_jsonl_to_json
+        try:
+            # Assuming Docker is used as per guide
+            convert_jsonl_to_json(processed_val_file, ls_output_file, docker_mode=True)
+        except Exception as e:
+            print(f"⚠️ Error in LS conversion step: {e}")
+
+    pipeline.add_step(
+        "extract", extract,
+        inputs=[input_raw], outputs=[raw_batch_file],
+        params={'start': start, 'count': count}
+    )
+    pipeline.add_step(
+        "image", process_images,
+        inputs=[raw_batch_file], outputs=[image_processed_file],
+        deps=["extract"], params={'target_size': [224, 224], 'use_padding': True}
+    )
+    pipeline.add_step(
+        "text", process_text,
+        inputs=[image_processed_file], outputs=[processed_val_file],
+        deps=["image"], params={'train_ratio': 0.7, 'val_ratio': 0.15}
+    )
+    # Validation only reports: it has no output file, so it always runs
+    pipeline.add_step(
+        "validate", validate,
+        inputs=[raw_batch_file, processed_val_file],
+        deps=["text"], cacheable=False
+    )
+    pipeline.add_step(
+        "ls_export", export_label_studio,
+        inputs=[processed_val_file], outputs=[ls_output_file],
+        deps=["text"], params={'docker': True}
+    )
+    return pipeline
+
+
+def run_batch(start: int, count: int, input_raw: str, force: bool = False) -> Dict:
+    """Run the full pipeline for one batch and save its report next to the clean data."""
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    pipeline = build_batch_pipeline(start, count, input_raw, force=force)
+    print("=" * 60)
+    print(f"🎬 STARTING PIPELINE FOR {pipeline.name.upper()}")
+    print("=" * 60)
+
+    reports = pipeline.run()
+    print_report(pipeline.name, reports)
+
+    report_dir = Path(f"data/03_clean/Fakeddit/{pipeline.name}")
+    report_dir.mkdir(parents=True, exist_ok=True)
+    with open(report_dir / "pipeline_report.json", 'w', encoding='utf-8') as f:
+        json.dump({'batch': pipeline.name, 'steps': reports}, f, indent=2, ensure_ascii=False)
+
+    failed = [r['step'] for r in reports if r['status'] == 'failed']
+    return {'batch': pipeline.name, 'steps': reports, 'failed': failed}
 
-def run_command(command: list, description: str):
-    """Run a shell command and print status."""
-    print(f"\n🚀 {description}...")
-    print(f"Command: {' '.join(command)}")
-    try:
-        result = subprocess.run(command, check=True, text=True)
-        print(f"✅ {description} completed successfully.")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed with return code {e.returncode}")
-        return False
 
 def main():
     parser = argparse.ArgumentParser(description='Automated Batch Processing Pipeline')
     parser.add_argument('--start', type=int, required=True, help='Starting index (0-based)')
     parser.add_argument('--count', type=int, default=200, help='Number of samples in batch')
     parser.add_argument('--input_raw', default='data/01_raw/Fakeddit/dataset_Fakeddit_Processed.jsonl', help='Path to master raw file')
-    
-    args = parser.parse_args()
-    
-    # 0. Setup Batch Info
-    end = args.start + args.count
-    batch_name = f"batch_{args.start}_{end}"
-    raw_batch_file = f"data/01_raw/Fakeddit/batches/Fakeddit_{args.start}_{end}.jsonl"
-    image_processed_file = "data/02_processed/dataset_output.jsonl"
-    output_clean_dir = f"data/03_clean/Fakeddit/{batch_name}"
-    
-    print("=" * 60)
-    print(f"🎬 STARTING PIPELINE FOR {batch_name.upper()}")
-    print("=" * 60)
+    parser.add_argument('--num-batches', type=int, default=1, help='Number of consecutive batches to process')
+    parser.add_argument('--workers', type=int, default=1, help='Number of batches processed concurrently')
+    parser.add_argument('--force', action='store_true', help='Ignore cache and rerun every step')
 
-    # Step 0: Ensure dataset_output.jsonl is removed to isolate this batch
-    if os.path.exists(image_processed_file):
-        print(f"🗑️ Removing old {image_processed_file} for isolation...")
-        os.remove(image_processed_file)
-
-    # Step 1: Extraction
-    extract_cmd = [
-        "python", "src/utils/batch_extractor.py",
-        "--input", args.input_raw,
-        "--start", str(args.start),
-        "--count", str(args.count)
-    ]
-    if not run_command(extract_cmd, "Extracting Raw Batch"):
-        sys.exit(1)
+    args = parser.parse_args()
 
-    # Step 2: Image Processing
-    image_cmd = [
-        "python", "src/data/fakeddit_preprocessor_image.py",
-        "--input", raw_batch_file
-    ]
-    if not run_command(image_cmd, "Image Preprocessing (Download & Resize)"):
-        sys.exit(1)
+    starts = [args.start + i * args.count for i in range(args.num_batches)]
+    results: List[Dict] = []
 
-    # Step 3: Text Processing
-    text_cmd = [
-        "python", "src/data/fakeddit_process_text.py",
-        "--input", image_processed_file,
-        "--batch-name", batch_name
-    ]
-    if not run_command(text_cmd, "Text Preprocessing & Splitting"):
-        sys.exit(1)
-
-    # Step 4: Validation
-    # We use the train.jsonl in the batch folder for validation
-    processed_val_file = f"data/03_clean/Fakeddit/{batch_name}/Fakeddit/train.jsonl"
-    validate_cmd = [
-        "python", "validate/validate_schema.py",
-        "--raw", raw_batch_file,
-        "--processed", processed_val_file
-    ]
-    if not run_command(validate_cmd, "Validating Batch Schema"):
-        print("⚠️ Validation reported issues, but pipeline finished. Check logs.")
-    # Step 5: Convert to JSON for Label Studio (using existing script)
-    # train.jsonl -> train_for_ls.json
-    try:
-        if os.path.exists(processed_val_file):
-            ls_output_file = f"{output_clean_dir}/train_for_ls.json"
-            convert_cmd = [
-                "python", "src/utils/convert_to_ls_json.py",
-                "--input", processed_val_file,
-                "--output", ls_output_file,
-                "--docker" # Assuming Docker is used as per guide, or we can make this configurable
+    if args.workers <= 1 or len(starts) == 1:
+        for start in starts:
+            results.append(run_batch(start, args.count, args.input_raw, args.force))
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(starts))) as executor:
+            futures = [
+                executor.submit(run_batch, start, args.count, args.input_raw, args.force)
+                for start in starts
             ]
-            run_command(convert_cmd, "Converting to Label Studio Format")
-        else:
-            print(f"⚠️ Could not find {processed_val_file} to convert for Label Studio.")
-    except Exception as e:
-        print(f"⚠️ Error in LS conversion step: {e}")
+            for future in as_completed(futures):
+                results.append(future.result())
+
+    results.sort(key=lambda r: int(r['batch'].split('_')[1]))
 
     print("\n" + "=" * 60)
-    print(f"🎉 BATCH {batch_name.upper()} PROCESSED SUCCESSFULLY!")
-    print("=" * 60)
-    print(f"📂 Folder for team: {output_clean_dir}")
-    print(f"📄 LS File: {output_clean_dir}/train_for_ls.json")
+    for result in results:
+        batch_name = result['batch']
+        if result['failed']:
+            print(f"❌ BATCH {batch_name.upper()} FAILED at: {', '.join(result['failed'])}")
+            continue
+        output_clean_dir = f"data/03_clean/Fakeddit/{batch_name}"
+        print(f"🎉 BATCH {batch_name.upper()} PROCESSED SUCCESSFULLY!")
+        print(f"📂 Folder for team: {output_clean_dir}")
+        print(f"📄 LS File: {output_clean_dir}/train_for_ls.json")
     print("=" * 60)
 
+    if any(r['failed'] for r in results):
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
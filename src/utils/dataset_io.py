@@ -0,0 +1,278 @@
+"""
+Shared dataset I/O layer: JSONL (interchange) and partitioned Parquet (columnar).
+
+Both formats are read/written as plain record dicts so every stage
+(liar_mapper, fakeddit_process_text, fakeddit_preprocessor_image, merge_splits,
+InteractionGraphBuilder) can switch format with a path/flag only.
+
+Parquet specifics:
+- Nested fields (image_info, text_features, ...) are stored as Arrow structs.
+- Column projection accepts dotted names, e.g. 'image_info.processed_path',
+  and only those leaves are decoded.
+- Equality/isin filters are pushed down to Arrow, so a dataset partitioned by
+  'split' only opens the matching split=... directories.
+- Arrow cannot tell a missing key from null: null values are dropped from the
+  returned dicts, matching the usual `rec.get(key, default)` access of JSONL records.
+
+Usage:
+    write_records(records, 'data/03_clean/Fakeddit/dataset.parquet', partition_cols=['split'])
+    for rec in read_records('data/03_clean/Fakeddit/dataset.parquet',
+                            columns=['clean_text', 'image_info.processed_path', 'label', 'split'],
+                            filters={'split': ['train', 'val']}):
+        ...
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet support requires pyarrow: pip install pyarrow") from e
+
+
+def is_parquet_path(path: str) -> bool:
+    """Parquet file or (partitioned) dataset directory."""
+    path = Path(path)
+    return path.suffix.lower() in PARQUET_SUFFIXES or path.is_dir()
+
+
+def _get_dotted(record: Dict, column: str):
+    value = record
+    for part in column.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None, False
+        value = value[part]
+    return value, True
+
+
+def _set_dotted(record: Dict, column: str, value: Any):
+    parts = column.split('.')
+    target = record
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+
+
+def _matches(record: Dict, filters: Optional[Dict]) -> bool:
+    if not filters:
+        return True
+    for column, allowed in filters.items():
+        value, _ = _get_dotted(record, column)
+        allowed = allowed if isinstance(allowed, (list, tuple, set)) else [allowed]
+        if value not in allowed:
+            return False
+    return True
+
+
+def _project(record: Dict, columns: Optional[List[str]]) -> Dict:
+    if columns is None:
+        return record
+    projected = {}
+    for column in columns:
+        value, found = _get_dotted(record, column)
+        if found:
+            _set_dotted(projected, column, value)
+    return projected
+
+
+def _drop_nulls(value):
+    if isinstance(value, dict):
+        return {k: _drop_nulls(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(v) for v in value]
+    return value
+
+
+def read_jsonl(path: str, columns: Optional[List[str]] = None, filters: Optional[Dict] = None) -> Iterator[Dict]:
+    """Stream records from JSONL, skipping blank/invalid lines."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Invalid JSON at {path}:{line_num}, skipped")
+                continue
+            if _matches(record, filters):
+                yield _project(record, columns)
+
+
+def _field_exists(schema, column: str) -> bool:
+    import pyarrow as pa
+
+    dtype = None
+    fields = schema
+    for part in column.split('.'):
+        if dtype is not None:
+            if not pa.types.is_struct(dtype):
+                return False
+            fields = [dtype.field(i) for i in range(dtype.num_fields)]
+        match = [f for f in fields if f.name == part]
+        if not match:
+            return False
+        dtype = match[0].type
+    return True
+
+
+def read_parquet(
+    path: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Dict] = None,
+    batch_size: int = 65536
+) -> Iterator[Dict]:
+    """Stream records from a Parquet file/dataset with projection and filter pushdown."""
+    _require_pyarrow()
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(str(path), format='parquet', partitioning='hive')
+    schema = dataset.schema
+
+    projection = None
+    if columns is not None:
+        projection = {}
+        for column in columns:
+            if _field_exists(schema, column):
+                projection[column] = pc.field(*column.split('.'))
+
+    expression = None
+    for column, allowed in (filters or {}).items():
+        if not _field_exists(schema, column):
+            # Filtering on a column the dataset does not have matches nothing
+            return
+        allowed = list(allowed) if isinstance(allowed, (list, tuple, set)) else [allowed]
+        term = pc.field(*column.split('.')).isin(allowed)
+        expression = term if expression is None else expression & term
+
+    for batch in dataset.to_batches(columns=projection, filter=expression, batch_size=batch_size):
+        for row in batch.to_pylist():
+            if projection is None:
+                yield _drop_nulls(row)
+                continue
+            record = {}
+            for column, value in row.items():
+                if value is not None:
+                    _set_dotted(record, column, _drop_nulls(value))
+            yield record
+
+
+def read_records(
+    path: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Dict] = None
+) -> Iterator[Dict]:
+    """
+    Stream records from JSONL or Parquet.
+
+    Args:
+        path: .jsonl file, .parquet file or partitioned Parquet directory
+        columns: Columns to keep (dotted names for nested fields); None = all
+        filters: {column: value or [values]}; pushed down for Parquet
+
+    Yields:
+        Record dicts (nested fields rebuilt as nested dicts)
+    """
+    if is_parquet_path(path):
+        return read_parquet(path, columns=columns, filters=filters)
+    return read_jsonl(path, columns=columns, filters=filters)
+
+
+def count_records(path: str) -> int:
+    """Number of records (Parquet: from file metadata, JSONL: non-blank lines)."""
+    if is_parquet_path(path):
+        _require_pyarrow()
+        import pyarrow.dataset as ds
+        return ds.dataset(str(path), format='parquet', partitioning='hive').count_rows()
+    with open(path, 'r', encoding='utf-8') as f:
+        return sum(1 for line in f if line.strip())
+
+
+def write_jsonl(records: Iterable[Dict], path: str, append: bool = False) -> int:
+    """Write records as JSONL. Returns number of records written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(path, 'a' if append else 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def write_parquet(
+    records: Iterable[Dict],
+    path: str,
+    partition_cols: Optional[List[str]] = None
+) -> int:
+    """
+    Write records as Parquet (nested dicts become Arrow structs).
+
+    With partition_cols the output is a hive-partitioned directory
+    (e.g. path/split=train/part-0.parquet); existing files of the written
+    partitions are replaced.
+    """
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    records = list(records)
+    path = Path(path)
+    if not records:
+        logger.warning(f"No records to write to {path}")
+        return 0
+
+    # pa.array infers the union of keys over all records (Table.from_pylist only uses the first row)
+    table = pa.Table.from_struct_array(pa.array(records))
+
+    if partition_cols:
+        ds.write_dataset(
+            table,
+            str(path),
+            format='parquet',
+            partitioning=partition_cols,
+            partitioning_flavor='hive',
+            existing_data_behavior='delete_matching'
+        )
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, str(path))
+    return len(records)
+
+
+def write_records(
+    records: Iterable[Dict],
+    path: str,
+    fmt: Optional[str] = None,
+    partition_cols: Optional[List[str]] = None
+) -> int:
+    """
+    Write records as JSONL or Parquet.
+
+    Args:
+        records: Record dicts
+        path: Output path
+        fmt: 'jsonl' or 'parquet' (default: inferred from path suffix)
+        partition_cols: Parquet only - hive partition columns (e.g. ['split'])
+
+    Returns:
+        Number of records written
+    """
+    if fmt is None:
+        fmt = 'parquet' if Path(path).suffix.lower() in PARQUET_SUFFIXES else 'jsonl'
+    if fmt == 'parquet':
+        return write_parquet(records, path, partition_cols=partition_cols)
+    if fmt == 'jsonl':
+        return write_jsonl(records, path)
+    raise ValueError(f"Unknown format: {fmt}")
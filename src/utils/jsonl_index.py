@@ -0,0 +1,216 @@
+"""
+Byte-offset index for large JSONL files.
+
+A sidecar file `<file>.idx` stores the byte offset at which every line starts,
+so any component can seek straight to record k and stream a range without
+reading the lines before it. The index is built once and, when the JSONL file
+only grows (append mode), only the appended tail is scanned on the next open.
+
+Sidecar layout (little-endian):
+    magic (8 bytes) | indexed_size u64 | num_lines u64 | tail_crc u32 | reserved u32
+    offsets: num_lines x u64
+
+Usage:
+    index = JsonlOffsetIndex('data/01_raw/Fakeddit/dataset_Fakeddit_Processed.jsonl')
+    print(len(index))
+    for line in index.iter_lines(50000, 50200):
+        ...
+"""
+
+import os
+import struct
+import tempfile
+import zlib
+from array import array
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, appends stay unguarded
+    fcntl = None
+
+INDEX_MAGIC = b'JSLIDX1\x00'
+HEADER_FORMAT = '<8sQQII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+OFFSET_SIZE = 8
+SCAN_BLOCK_SIZE = 8 * 1024 * 1024
+# Số byte cuối (trước indexed_size) dùng để phát hiện file bị ghi đè thay vì append
+TAIL_CHECK_BYTES = 4096
+
+
+def _tail_crc(f, size: int) -> int:
+    start = max(0, size - TAIL_CHECK_BYTES)
+    f.seek(start)
+    return zlib.crc32(f.read(size - start))
+
+
+def _line_starts_after_newlines(block: bytes, base: int) -> array:
+    """Absolute offsets right after every b'\\n' in block (i.e. candidate line starts)."""
+    if np is not None:
+        starts = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10).astype(np.uint64) + (base + 1)
+        return array('Q', starts.tobytes())
+    out = array('Q')
+    pos = block.find(b'\n')
+    while pos != -1:
+        out.append(base + pos + 1)
+        pos = block.find(b'\n', pos + 1)
+    return out
+
+
+class JsonlOffsetIndex:
+    """
+    Line-offset index over a JSONL file (one record per line, blank lines included,
+    i.e. record k is exactly `f.readlines()[k]`).
+    """
+
+    def __init__(self, jsonl_path: str, index_path: Optional[str] = None, auto_refresh: bool = True):
+        """
+        Args:
+            jsonl_path: Path to JSONL file
+            index_path: Path to sidecar index (default: <jsonl_path>.idx)
+            auto_refresh: Build/update the index on construction
+        """
+        self.jsonl_path = Path(jsonl_path)
+        self.index_path = Path(index_path) if index_path else Path(str(jsonl_path) + '.idx')
+        self._num_lines = 0
+        self._indexed_size = 0
+        if auto_refresh:
+            self.refresh()
+
+    def __len__(self) -> int:
+        return self._num_lines
+
+    def _read_header(self):
+        if not self.index_path.exists():
+            return None
+        with open(self.index_path, 'rb') as f:
+            raw = f.read(HEADER_SIZE)
+        if len(raw) < HEADER_SIZE:
+            return None
+        magic, indexed_size, num_lines, tail_crc, _ = struct.unpack(HEADER_FORMAT, raw)
+        if magic != INDEX_MAGIC:
+            return None
+        if os.path.getsize(self.index_path) < HEADER_SIZE + num_lines * OFFSET_SIZE:
+            return None
+        return indexed_size, num_lines, tail_crc
+
+    def _scan(self, f, start: int, end: int, prev_is_newline: bool) -> array:
+        """Line-start offsets in [start, end): after every newline, plus `start` itself."""
+        offsets = array('Q')
+        if start < end and prev_is_newline:
+            offsets.append(start)
+        f.seek(start)
+        pos = start
+        while pos < end:
+            block = f.read(min(SCAN_BLOCK_SIZE, end - pos))
+            if not block:
+                break
+            starts = _line_starts_after_newlines(block, pos)
+            pos += len(block)
+            # A newline at the very end of the file does not start a new line
+            if len(starts) and starts[-1] >= end:
+                starts.pop()
+            offsets.extend(starts)
+        return offsets
+
+    def _write(self, offsets: array, indexed_size: int, tail_crc: int, append_from: Optional[int] = None):
+        header = struct.pack(HEADER_FORMAT, INDEX_MAGIC, indexed_size,
+                             (append_from or 0) + len(offsets), tail_crc, 0)
+        if append_from is None:
+            # Unique temp file: several workers may build the same index on first use
+            fd, tmp_path = tempfile.mkstemp(prefix=self.index_path.name + '.', suffix='.tmp',
+                                            dir=self.index_path.parent)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(header)
+                    offsets.tofile(f)
+                os.replace(tmp_path, self.index_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        else:
+            with open(self.index_path, 'r+b') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                # Offsets first, header last: a crash leaves the old header (still valid)
+                f.seek(HEADER_SIZE + append_from * OFFSET_SIZE)
+                offsets.tofile(f)
+                f.truncate()
+                f.flush()
+                f.seek(0)
+                f.write(header)
+
+    def refresh(self) -> 'JsonlOffsetIndex':
+        """
+        Bring the sidecar index up to date.
+
+        - No index / file rewritten: full build.
+        - File grew (append): scan only the new tail.
+        - Unchanged: nothing is read except the header and a 4 KB tail checksum.
+        """
+        if not self.jsonl_path.exists():
+            raise FileNotFoundError(f"JSONL not found: {self.jsonl_path}")
+
+        size = os.path.getsize(self.jsonl_path)
+        header = self._read_header()
+
+        with open(self.jsonl_path, 'rb') as f:
+            if header is not None:
+                indexed_size, num_lines, tail_crc = header
+                if indexed_size <= size and _tail_crc(f, indexed_size) == tail_crc:
+                    if indexed_size < size:
+                        prev_is_newline = True
+                        if indexed_size > 0:
+                            f.seek(indexed_size - 1)
+                            prev_is_newline = f.read(1) == b'\n'
+                        new_offsets = self._scan(f, indexed_size, size, prev_is_newline)
+                        self._write(new_offsets, size, _tail_crc(f, size), append_from=num_lines)
+                        num_lines += len(new_offsets)
+                    self._indexed_size = size
+                    self._num_lines = num_lines
+                    return self
+
+            offsets = self._scan(f, 0, size, prev_is_newline=True)
+            self._write(offsets, size, _tail_crc(f, size))
+
+        self._indexed_size = size
+        self._num_lines = len(offsets)
+        return self
+
+    def offset(self, k: int) -> int:
+        """Byte offset of line k (O(1): one 8-byte read from the sidecar)."""
+        if k == self._num_lines:
+            return self._indexed_size
+        if not 0 <= k < self._num_lines:
+            raise IndexError(f"Line {k} out of range (0..{self._num_lines - 1})")
+        with open(self.index_path, 'rb') as f:
+            f.seek(HEADER_SIZE + k * OFFSET_SIZE)
+            return struct.unpack('<Q', f.read(OFFSET_SIZE))[0]
+
+    def iter_raw_lines(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Stream raw lines [start, end) without touching the lines before `start`."""
+        end = self._num_lines if end is None else min(end, self._num_lines)
+        if start >= end:
+            return
+        with open(self.jsonl_path, 'rb') as f:
+            f.seek(self.offset(start))
+            for _ in range(end - start):
+                yield f.readline()
+
+    def iter_lines(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """Stream decoded lines [start, end) (newline kept, like readlines())."""
+        for raw in self.iter_raw_lines(start, end):
+            yield raw.decode('utf-8')
+
+    def read_line(self, k: int) -> str:
+        """Return line k."""
+        for line in self.iter_lines(k, k + 1):
+            return line
+        raise IndexError(f"Line {k} out of range")
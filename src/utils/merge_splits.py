@@ -1,19 +1,39 @@
 """
 Merge train/val/test JSONL files into single file with 'split' field.
 For unified graph construction.
+
+Fast mode (--fast) keeps each record's original bytes and injects the split
+field before the closing brace instead of re-serialising it; lines are
+validated in parallel chunks and records are deduplicated by id across the
+three inputs (first occurrence wins: train > val > test).
 """
 
+import os
+import sys
 import json
+import time
 import argparse
+import multiprocessing
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+# Add project root to path
+project_root = str(Path(__file__).resolve().parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.utils.dataset_io import read_records, write_records
 
 
 def merge_jsonl_files(
     train_path: str,
     val_path: str,
     test_path: str,
-    output_path: str
+    output_path: str,
+    output_format: str = 'jsonl',
+    fast: bool = False,
+    workers: Optional[int] = None,
+    strict: bool = False
 ) -> Dict[str, int]:
     """
     Merge train/val/test JSONL into single file with 'split' field.
@@ -22,12 +42,24 @@ def merge_jsonl_files(
         train_path: Path to train JSONL
         val_path: Path to val JSONL
         test_path: Path to test JSONL
-        output_path: Path to output merged JSONL
+        output_path: Path to output merged JSONL (or Parquet directory)
+        output_format: 'jsonl' or 'parquet' (hive-partitioned by split)
+        fast: Raw-passthrough merge (JSONL only): byte-level split injection,
+            parallel validation, dedupe by id across splits
+        workers: Number of processes for fast mode (default: os.cpu_count())
+        strict: Fast mode only - raise ValueError if any line is not a valid JSON object
         
     Returns:
         Dict with counts per split
     """
     counts = {'train': 0, 'val': 0, 'test': 0}
+    split_files = [('train', train_path), ('val', val_path), ('test', test_path)]
+    
+    if output_format == 'parquet':
+        return _merge_to_parquet(split_files, output_path, counts)
+    
+    if fast:
+        return _fast_merge(split_files, output_path, counts, workers=workers, strict=strict)
     
     # Ensure output directory exists
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
@@ -66,6 +98,181 @@ def merge_jsonl_files(
     return counts
 
 
+def _merge_to_parquet(split_files, output_path: str, counts: Dict[str, int]) -> Dict[str, int]:
+    """Merge splits into a Parquet dataset partitioned by 'split' (output_path/split=train/...)."""
+    records = []
+    for split_name, file_path in split_files:
+        if not Path(file_path).exists():
+            print(f"⚠️ File không tồn tại, bỏ qua: {file_path}")
+            continue
+        
+        print(f"📖 Đang đọc {split_name}: {file_path}")
+        for record in read_records(file_path):
+            record['split'] = split_name
+            records.append(record)
+            counts[split_name] += 1
+    
+    write_records(records, output_path, fmt='parquet', partition_cols=['split'])
+    return counts
+
+
+FAST_CHUNK_BYTES = 8 * 1024 * 1024
+MAX_REPORTED_ERRORS = 10
+
+
+def _file_chunks(file_path: str, chunk_bytes: int = FAST_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """Byte ranges of ~chunk_bytes, each boundary right after a newline."""
+    file_size = os.path.getsize(file_path)
+    boundaries = [0]
+    with open(file_path, 'rb') as f:
+        while boundaries[-1] + chunk_bytes < file_size:
+            f.seek(boundaries[-1] + chunk_bytes)
+            f.readline()
+            pos = f.tell()
+            if pos >= file_size:
+                break
+            boundaries.append(pos)
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _inject_split_chunk(task):
+    """
+    Validate one chunk and inject the split field at the byte level.
+    
+    Returns:
+        (output bytes, [(id, end offset in output bytes)], [(local line no, error)], number of lines)
+    """
+    file_path, start, end, split_name = task
+    split_bytes = json.dumps(split_name).encode('utf-8')
+    suffix = b', "split": ' + split_bytes + b'}\n'
+    
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    
+    out = []
+    out_size = 0
+    entries = []
+    errors = []
+    lines = data.split(b'\n')
+    if lines and lines[-1] == b'':
+        lines.pop()
+    
+    for line_idx, raw in enumerate(lines):
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            errors.append((line_idx, f"JSON error: {e}"))
+            continue
+        if not isinstance(record, dict):
+            errors.append((line_idx, "not a JSON object"))
+            continue
+        
+        if 'split' in record or not record:
+            # Hiếm: key đã tồn tại / object rỗng -> serialise lại dòng này
+            record['split'] = split_name
+            piece = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        else:
+            piece = line[:-1].rstrip() + suffix
+        
+        out.append(piece)
+        out_size += len(piece)
+        entries.append((record.get('id'), out_size))
+    
+    return b''.join(out), entries, errors, len(lines)
+
+
+def _fast_merge(
+    split_files,
+    output_path: str,
+    counts: Dict[str, int],
+    workers: Optional[int] = None,
+    strict: bool = False
+) -> Dict[str, int]:
+    """Raw-passthrough merge: parallel chunk validation + byte-level split injection + id dedupe."""
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    total_bytes = 0
+    for split_name, file_path in split_files:
+        if not Path(file_path).exists():
+            print(f"⚠️ File không tồn tại, bỏ qua: {file_path}")
+            continue
+        print(f"📖 Đang đọc {split_name}: {file_path}")
+        total_bytes += os.path.getsize(file_path)
+        tasks.extend((file_path, start, end, split_name) for start, end in _file_chunks(file_path))
+    
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    seen_ids = set()
+    duplicates = {'train': 0, 'val': 0, 'test': 0}
+    invalid = 0
+    reported = []
+    line_base = {}
+    
+    start_time = time.perf_counter()
+    tmp_path = f"{output_path}.tmp"
+    pool = multiprocessing.Pool(min(workers, len(tasks))) if workers > 1 and len(tasks) > 1 else None
+    try:
+        results = pool.imap(_inject_split_chunk, tasks) if pool else map(_inject_split_chunk, tasks)
+        with open(tmp_path, 'wb') as f_out:
+            # imap giữ đúng thứ tự chunk -> thứ tự output giống chế độ thường
+            for (file_path, _, _, split_name), (data, entries, errors, num_lines) in zip(tasks, results):
+                base = line_base.get(file_path, 0)
+                line_base[file_path] = base + num_lines
+                
+                invalid += len(errors)
+                for line_idx, message in errors:
+                    if len(reported) < MAX_REPORTED_ERRORS:
+                        reported.append(f"{file_path}:{base + line_idx + 1}: {message}")
+                
+                keep = []
+                prev_end = 0
+                for record_id, piece_end in entries:
+                    if record_id is not None:
+                        key = json.dumps(record_id)
+                        if key in seen_ids:
+                            duplicates[split_name] += 1
+                            prev_end = piece_end
+                            continue
+                        seen_ids.add(key)
+                    keep.append((prev_end, piece_end))
+                    prev_end = piece_end
+                
+                counts[split_name] += len(keep)
+                if len(keep) == len(entries):
+                    f_out.write(data)
+                else:
+                    for piece_start, piece_end in keep:
+                        f_out.write(data[piece_start:piece_end])
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    
+    if invalid and strict:
+        os.remove(tmp_path)
+        raise ValueError(f"{invalid} invalid lines, first: {reported[0]}")
+    os.replace(tmp_path, output_path)
+    elapsed = time.perf_counter() - start_time
+    
+    for message in reported:
+        print(f"⚠️ {message}")
+    if invalid > len(reported):
+        print(f"⚠️ ... và {invalid - len(reported)} dòng lỗi khác")
+    
+    total_dups = sum(duplicates.values())
+    if total_dups:
+        print(f"🔁 Bỏ {total_dups} bản ghi trùng id "
+              f"(train {duplicates['train']}, val {duplicates['val']}, test {duplicates['test']})")
+    throughput = total_bytes / 1024 ** 2 / elapsed if elapsed > 0 else float('inf')
+    print(f"⚡ {total_bytes / 1024 ** 2:.1f} MB in {elapsed:.2f}s ({throughput:.1f} MB/s, "
+          f"{workers if pool else 1} workers, {invalid} invalid lines)")
+    return counts
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Merge train/val/test JSONL files into single file'
@@ -88,7 +295,29 @@ def main():
     parser.add_argument(
         '--output',
         default='data/04_graph/merged_data.jsonl',
-        help='Path to output merged JSONL'
+        help='Path to output merged JSONL (or Parquet directory with --format parquet)'
+    )
+    parser.add_argument(
+        '--format',
+        choices=['jsonl', 'parquet'],
+        default='jsonl',
+        help='Output format (parquet = dataset partitioned by split)'
+    )
+    parser.add_argument(
+        '--fast',
+        action='store_true',
+        help='Raw-passthrough JSONL merge: no re-serialisation, parallel validation, dedupe by id'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of processes for --fast (default: CPU count)'
+    )
+    parser.add_argument(
+        '--strict',
+        action='store_true',
+        help='With --fast: fail if any line is not a valid JSON object'
     )
     
     args = parser.parse_args()
@@ -101,7 +330,11 @@ def main():
         args.train,
         args.val, 
         args.test,
-        args.output
+        args.output,
+        output_format=args.format,
+        fast=args.fast,
+        workers=args.workers,
+        strict=args.strict
     )
     
     total = sum(counts.values())
@@ -0,0 +1,272 @@
+"""
+In-process DAG runner with content-hash step caching.
+
+Each step declares its input files, output files and parameters. Before a
+step runs, its cache key (step name + params + content hash of every input)
+is compared with the key stored from the last successful run; if they match
+and all outputs still exist, the step is skipped.
+
+Usage:
+    pipeline = Pipeline("batch_200_400", cache_path="data/.pipeline_cache/batch_200_400.json")
+    pipeline.add_step("extract", extract_fn, inputs=[raw], outputs=[batch_file])
+    pipeline.add_step("image", image_fn, inputs=[batch_file], outputs=[img_out], deps=["extract"])
+    report = pipeline.run()
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str, stat_cache: Optional[Dict] = None) -> str:
+    """
+    Content hash (blake2b) of a file.
+
+    If stat_cache is given, the hash is memoised by (size, mtime_ns) so a large
+    unchanged file (e.g. the master Fakeddit JSONL) is only read once.
+    """
+    st = os.stat(path)
+    stat_key = f"{st.st_size}:{st.st_mtime_ns}"
+    if stat_cache is not None:
+        cached = stat_cache.get(str(path))
+        if cached and cached[0] == stat_key:
+            return cached[1]
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            h.update(block)
+    digest = h.hexdigest()
+
+    if stat_cache is not None:
+        stat_cache[str(path)] = [stat_key, digest]
+    return digest
+
+
+class PeakMemoryMonitor:
+    """
+    Track peak memory while a step runs.
+
+    Uses a sampling thread on process RSS when psutil is installed (captures
+    torch/PIL buffers too), otherwise falls back to tracemalloc (Python heap only).
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self.source = 'rss' if psutil is not None else 'tracemalloc'
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        proc = psutil.Process()
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, proc.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if self.source == 'rss':
+            self.peak_bytes = psutil.Process().memory_info().rss
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        else:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.source == 'rss':
+            self._stop.set()
+            self._thread.join()
+        else:
+            _, self.peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return False
+
+
+class PipelineStep:
+    """A node of the pipeline DAG."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], None],
+        inputs: Optional[List[str]] = None,
+        outputs: Optional[List[str]] = None,
+        deps: Optional[List[str]] = None,
+        params: Optional[Dict] = None,
+        cacheable: bool = True
+    ):
+        """
+        Args:
+            name: Unique step name
+            func: Zero-argument callable that produces the outputs
+            inputs: Files whose content determines the cache key
+            outputs: Files the step must produce (step reruns if any is missing)
+            deps: Names of upstream steps
+            params: Extra parameters folded into the cache key
+            cacheable: If False the step always runs
+        """
+        self.name = name
+        self.func = func
+        self.inputs = [str(p) for p in (inputs or [])]
+        self.outputs = [str(p) for p in (outputs or [])]
+        self.deps = list(deps or [])
+        self.params = params or {}
+        self.cacheable = cacheable
+
+
+class Pipeline:
+    """
+    Run a DAG of steps in-process, skipping steps whose inputs are unchanged.
+    """
+
+    def __init__(self, name: str, cache_path: str, force: bool = False):
+        """
+        Args:
+            name: Pipeline name (used in logs/reports)
+            cache_path: JSON file storing step cache keys and file hashes
+            force: Ignore cache and rerun every step
+        """
+        self.name = name
+        self.cache_path = Path(cache_path)
+        self.force = force
+        self.steps: Dict[str, PipelineStep] = {}
+
+    def add_step(self, name: str, func: Callable[[], None], **kwargs) -> PipelineStep:
+        if name in self.steps:
+            raise ValueError(f"Duplicate step name: {name}")
+        step = PipelineStep(name, func, **kwargs)
+        self.steps[name] = step
+        return step
+
+    def _topological_order(self) -> List[PipelineStep]:
+        order, state = [], {}
+
+        def visit(name):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cycle detected at step: {name}")
+            if name not in self.steps:
+                raise ValueError(f"Unknown dependency: {name}")
+            state[name] = 'visiting'
+            for dep in self.steps[name].deps:
+                visit(dep)
+            state[name] = 'done'
+            order.append(self.steps[name])
+
+        for name in self.steps:
+            visit(name)
+        return order
+
+    def _load_cache(self) -> Dict:
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, OSError):
+                pass
+        return {'steps': {}, 'files': {}}
+
+    def _save_cache(self, cache: Dict):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    def _step_key(self, step: PipelineStep, file_hashes: Dict) -> Optional[str]:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(step.name.encode('utf-8'))
+        h.update(json.dumps(step.params, sort_keys=True, default=str).encode('utf-8'))
+        for path in step.inputs:
+            if not os.path.exists(path):
+                return None
+            h.update(path.encode('utf-8'))
+            h.update(hash_file(path, file_hashes).encode('utf-8'))
+        return h.hexdigest()
+
+    def run(self) -> List[Dict]:
+        """
+        Execute the pipeline.
+
+        Returns:
+            List of per-step reports: name, status ('ran'/'skipped'/'failed'),
+            wall_time_s, peak_mem_mb, mem_source
+        """
+        cache = self._load_cache()
+        reports = []
+
+        for step in self._topological_order():
+            key = self._step_key(step, cache['files'])
+            outputs_exist = all(os.path.exists(p) for p in step.outputs)
+
+            if (not self.force and step.cacheable and key is not None
+                    and cache['steps'].get(step.name) == key and outputs_exist):
+                print(f"⏩ [{self.name}] {step.name}: inputs unchanged, skipped")
+                reports.append({'step': step.name, 'status': 'skipped',
+                                'wall_time_s': 0.0, 'peak_mem_mb': None, 'mem_source': None})
+                continue
+
+            print(f"\n🚀 [{self.name}] {step.name}...")
+            start = time.perf_counter()
+            status = 'ran'
+            error = None
+            with PeakMemoryMonitor() as mem:
+                try:
+                    step.func()
+                except Exception as e:
+                    status = 'failed'
+                    error = str(e)
+            elapsed = time.perf_counter() - start
+
+            reports.append({
+                'step': step.name,
+                'status': status,
+                'wall_time_s': round(elapsed, 3),
+                'peak_mem_mb': round(mem.peak_bytes / 1024 ** 2, 1),
+                'mem_source': mem.source,
+                **({'error': error} if error else {})
+            })
+
+            if status == 'failed':
+                print(f"❌ [{self.name}] {step.name} failed: {error}")
+                cache['steps'].pop(step.name, None)
+                self._save_cache(cache)
+                break
+
+            print(f"✅ [{self.name}] {step.name} done in {elapsed:.2f}s")
+            if key is not None:
+                cache['steps'][step.name] = key
+            # Outputs are the next steps' inputs; hash them now while they are in page cache
+            for path in step.outputs:
+                if os.path.exists(path):
+                    hash_file(path, cache['files'])
+            self._save_cache(cache)
+
+        return reports
+
+
+def print_report(name: str, reports: List[Dict]):
+    """Print a per-step timing/memory table."""
+    print()
+    print("=" * 60)
+    print(f"PIPELINE REPORT: {name}")
+    print("=" * 60)
+    print(f"{'Step':<20}{'Status':<10}{'Wall (s)':>10}{'Peak mem (MB)':>16}")
+    for r in reports:
+        mem = f"{r['peak_mem_mb']:.1f}" if r['peak_mem_mb'] is not None else '-'
+        print(f"{r['step']:<20}{r['status']:<10}{r['wall_time_s']:>10.2f}{mem:>16}")
+    print("=" * 60)
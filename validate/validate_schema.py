@@ -3,168 +3,354 @@ import json
 import os
 import time
 import logging
+import shutil
 import sys # <-- THÊM MỚI ĐỂ SỬA LỖI WINDOWS
+import tempfile
+import zlib
+import multiprocessing
 from collections import Counter
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
-from jsonschema import validate, ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 # Giả định schema_definitions.py đã được tạo ở bước 1
-from schema_definitions import CORE_SCHEMA, EXTENDED_SCHEMA 
+from schema_definitions import CORE_SCHEMA, EXTENDED_SCHEMA
 
 # Cấu hình Logging
 LOG_FILE = 'validation_report.log'
-logging.basicConfig(level=logging.INFO, 
-                    format='%(levelname)s: %(message)s',
-                    handlers=[
-                        # Thêm encoding='utf-8' cho FileHandler
-                        logging.FileHandler(LOG_FILE, mode='w', encoding='utf-8'), 
-                        # Dùng sys.stdout để ép UTF-8 trên console Windows
-                        logging.StreamHandler(sys.stdout) 
-                    ])
+LOG_FORMAT = '%(levelname)s: %(message)s'
+# Không cấu hình logging lúc import: batch_pipeline import module này in-process (basicConfig
+# của nó đã chạy trước) và worker spawn import lại module. run_validation tự gắn FileHandler.
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Kích thước tối thiểu của một chunk khi chia file cho các worker
+MIN_CHUNK_BYTES = 8 * 1024 * 1024
+# Mỗi bucket ID trùng lặp ứng với khoảng bấy nhiêu byte dữ liệu đầu vào
+# (giới hạn bộ nhớ khi đếm ID: chỉ một bucket nằm trong RAM tại một thời điểm)
+DUP_BUCKET_BYTES = 256 * 1024 * 1024
+
+# Validator đã compile, dùng lại trong mỗi process (tránh build lại cho từng dòng)
+_WORKER_VALIDATOR = None
+
+
+def compile_validator(schema):
+    """Kiểm tra schema một lần và trả về validator đã compile để dùng lại."""
+    validator_cls = validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
+
+
+def _init_worker(schema):
+    global _WORKER_VALIDATOR
+    _WORKER_VALIDATOR = compile_validator(schema)
+
 
 # --- CÁC HÀM KIỂM TRA CHÍNH ---
 
-def validate_jsonl_file(file_path, schema, schema_name):
+def _check_extended_logic(data, now) -> List[Tuple[int, str, str]]:
+    """
+    Logic nghiệp vụ cho EXTENDED_SCHEMA.
+
+    Returns:
+        List (level, prefix, suffix) - số dòng được ghép vào khi gộp report
+    """
+    issues = []
+    img_info = data.get('image_info', {})
+    text_content = data.get('clean_text', '')
+
+    # 2.1. Kiểm tra Quy tắc Cấu trúc cụ thể (image_size phải là [224, 224])
+    if img_info.get('image_size') not in ([224, 224], None):
+        issues.append((logging.ERROR, "LỖI LOGIC", ": image_size không phải [224, 224]."))
+
+    # 2.2. Kiểm tra consistency của video/keyframe
+    is_video = img_info.get('is_video', False)
+    keyframe_paths = img_info.get('keyframe_paths', [])
+    if is_video and not keyframe_paths:
+        issues.append((logging.ERROR, "LỖI LOGIC", ": is_video=True nhưng keyframe_paths trống."))
+    elif not is_video and keyframe_paths:
+        issues.append((logging.ERROR, "LỖI LOGIC", ": is_video=False nhưng keyframe_paths có dữ liệu."))
+
+    # 2.3. Kiểm tra clean_text consistency (ĐÃ SỬA LỖI LOGIC isupper - Lỗi 1)
+
+    # Logic 1: Kiểm tra độ dài
+    is_length_valid = len(text_content) >= 5 and len(text_content) <= 5000
+
+    # Logic 2: Kiểm tra chữ hoa (any upper case char)
+    has_uppercase = any(c.isupper() for c in text_content if c.isalpha())
+
+    if not is_length_valid:
+        issues.append((logging.ERROR, "LỖI LOGIC", ": clean_text không nhất quán (quá ngắn/quá dài)."))
+    elif has_uppercase:
+        issues.append((logging.ERROR, "LỖI LOGIC", ": clean_text chứa ký tự chữ hoa (chưa lowercase)."))
+
+    # 2.4. Kiểm tra timestamp logic
+    if data.get('timestamp') and data.get('timestamp') > now:
+        issues.append((logging.ERROR, "LỖI LOGIC", ": timestamp tương lai."))
+
+    # 2.5. Kiểm tra media_url <-> is_video
+    if data.get('media_url') and not img_info.get('processed_path'):
+        issues.append((logging.WARNING, "CẢNH BÁO", ": Có media_url thô nhưng thiếu processed_path."))
+
+    return issues
+
+
+def _validate_chunk(task) -> Dict:
+    """
+    Validate một đoạn byte [start, end) của file JSONL (chạy trong worker).
+
+    ID của các bản ghi hợp lệ được ghi ra các file bucket trong spill_dir
+    theo crc32(id) để phát hiện trùng lặp mà không giữ toàn bộ ID trong RAM.
+    """
+    (file_path, start, end, chunk_idx, schema_name, now,
+     spill_dir, num_buckets, max_reports) = task
+    validator = _WORKER_VALIDATOR
+    is_extended = schema_name == "EXTENDED_SCHEMA"
+
+    result = {
+        'chunk_idx': chunk_idx,
+        'struct_errors': 0,
+        'logic_errors': 0,
+        'total_records': 0,
+        'num_lines': 0,
+        'reports': [],
+        'dropped_reports': 0,
+    }
+    reports = result['reports']
+
+    def report(level, prefix, line_idx, suffix):
+        if max_reports is not None and len(reports) >= max_reports:
+            result['dropped_reports'] += 1
+            return
+        reports.append((level, prefix, line_idx, suffix))
+
+    id_files = [
+        open(os.path.join(spill_dir, f"{chunk_idx:05d}_{b:04d}.ids"), 'w', encoding='utf-8')
+        for b in range(num_buckets)
+    ]
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            pos = start
+            line_idx = -1
+            for raw_line in f:
+                if pos >= end:
+                    break
+                pos += len(raw_line)
+                line_idx += 1
+                if not raw_line.strip():
+                    continue
+                result['total_records'] += 1
+
+                try:
+                    data = json.loads(raw_line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    report(logging.ERROR, "LỖI CÚ PHÁP", line_idx, ": JSON không hợp lệ.")
+                    result['struct_errors'] += 1
+                    continue
+
+                # 1. Kiểm tra Cấu trúc và Kiểu dữ liệu (JSONSchema)
+                error = best_match(validator.iter_errors(data))
+                if error is not None:
+                    report(logging.ERROR, "LỖI SCHEMA", line_idx, f" ({error.path}): {error.message}")
+                    result['struct_errors'] += 1
+                    continue
+
+                # Thu thập ID
+                if 'id' in data:
+                    post_id = json.dumps(data['id'], ensure_ascii=False)
+                    bucket = zlib.crc32(post_id.encode('utf-8')) % num_buckets
+                    id_files[bucket].write(post_id + '\n')
+
+                # 2. Kiểm tra Logic Nghiệp vụ
+                if is_extended:
+                    for level, prefix, suffix in _check_extended_logic(data, now):
+                        report(level, prefix, line_idx, suffix)
+                        if level >= logging.ERROR:
+                            result['logic_errors'] += 1
+            result['num_lines'] = line_idx + 1
+    finally:
+        for fh in id_files:
+            fh.close()
+
+    return result
+
+
+def _count_bucket_duplicates(task) -> List[str]:
+    """Đếm ID trong một bucket (đọc spill file của mọi chunk) và trả về các ID trùng."""
+    spill_dir, bucket, num_chunks = task
+    counts = Counter()
+    for chunk_idx in range(num_chunks):
+        path = os.path.join(spill_dir, f"{chunk_idx:05d}_{bucket:04d}.ids")
+        with open(path, 'r', encoding='utf-8') as f:
+            counts.update(line.rstrip('\n') for line in f)
+    return [json.loads(post_id) for post_id, count in counts.items() if count > 1]
+
+
+def _split_into_chunks(file_path, num_chunks) -> List[Tuple[int, int]]:
+    """Chia file thành các đoạn byte, mỗi biên nằm ngay sau một ký tự xuống dòng."""
+    file_size = os.path.getsize(file_path)
+    num_chunks = max(1, min(num_chunks, file_size // MIN_CHUNK_BYTES or 1))
+    boundaries = [0]
+    with open(file_path, 'rb') as f:
+        for i in range(1, num_chunks):
+            f.seek(file_size * i // num_chunks)
+            f.readline()
+            pos = f.tell()
+            if boundaries[-1] < pos < file_size:
+                boundaries.append(pos)
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def validate_jsonl_file(file_path, schema, schema_name, workers: Optional[int] = None,
+                        max_logged_errors: Optional[int] = None):
     """
     Thực hiện kiểm tra cấu trúc (jsonschema) và logic nghiệp vụ trong một lần quét (One-Pass).
+
+    File được chia thành các chunk theo byte và kiểm tra song song trên process pool
+    với validator đã compile sẵn; report lỗi của các chunk được gộp lại theo thứ tự dòng.
+
+    Args:
+        file_path: Đường dẫn file JSONL
+        schema: JSON schema (CORE_SCHEMA / EXTENDED_SCHEMA)
+        schema_name: Tên schema, quyết định có kiểm tra logic nghiệp vụ hay không
+        workers: Số process (mặc định: os.cpu_count()); 1 = chạy tuần tự trong process hiện tại
+        max_logged_errors: Số dòng lỗi tối đa ghi ra log (mặc định: tất cả). Số đếm lỗi luôn chính xác.
     """
     logger.info(f"\n--- Bắt đầu kiểm tra {schema_name} ({file_path}) ---")
-    
+
     validation_summary = {
         'struct_errors': 0,
         'logic_errors': 0,
         'duplicate_ids': [],
-        'post_ids': [],
-        'user_ids': set()
+        'total_records': 0
     }
-    
+
     if not os.path.exists(file_path):
         logger.error(f"LỖI: Không tìm thấy file tại đường dẫn: {file_path}")
         validation_summary['struct_errors'] += 1
         return validation_summary
 
-    total_records = 0
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line_number, line in enumerate(f): 
-            if not line.strip(): continue
-            total_records += 1
-            
-            try:
-                data = json.loads(line)
-                
-                # 1. Kiểm tra Cấu trúc và Kiểu dữ liệu (JSONSchema)
-                validate(instance=data, schema=schema)
-                
-                # Thu thập ID
-                if 'id' in data: validation_summary['post_ids'].append(data['id'])
-                if 'user_id' in data: validation_summary['user_ids'].add(data['user_id'])
-                
-                # 2. Kiểm tra Logic Nghiệp vụ
-                if schema_name == "EXTENDED_SCHEMA":
-                    img_info = data.get('image_info', {})
-                    text_content = data.get('clean_text', '')
-                    
-                    # 2.1. Kiểm tra Quy tắc Cấu trúc cụ thể (image_size phải là [224, 224])
-                    if img_info.get('image_size') not in ([224, 224], None):
-                        logger.error(f"LỖI LOGIC Dòng {line_number + 1}: image_size không phải [224, 224].")
-                        validation_summary['logic_errors'] += 1
-                        
-                    # 2.2. Kiểm tra consistency của video/keyframe
-                    is_video = img_info.get('is_video', False)
-                    keyframe_paths = img_info.get('keyframe_paths', [])
-                    if is_video and not keyframe_paths:
-                        logger.error(f"LỖI LOGIC Dòng {line_number + 1}: is_video=True nhưng keyframe_paths trống.")
-                        validation_summary['logic_errors'] += 1
-                    elif not is_video and keyframe_paths:
-                        logger.error(f"LỖI LOGIC Dòng {line_number + 1}: is_video=False nhưng keyframe_paths có dữ liệu.")
-                        validation_summary['logic_errors'] += 1
-
-                    # 2.3. Kiểm tra clean_text consistency (ĐÃ SỬA LỖI LOGIC isupper - Lỗi 1)
-                    
-                    # Logic 1: Kiểm tra độ dài
-                    is_length_valid = len(text_content) >= 5 and len(text_content) <= 5000
-                    
-                    # Logic 2: Kiểm tra chữ hoa (any upper case char)
-                    has_uppercase = any(c.isupper() for c in text_content if c.isalpha())
-                    
-                    if not is_length_valid:
-                        logger.error(f"LỖI LOGIC Dòng {line_number + 1}: clean_text không nhất quán (quá ngắn/quá dài).")
-                        validation_summary['logic_errors'] += 1
-                    elif has_uppercase:
-                        logger.error(f"LỖI LOGIC Dòng {line_number + 1}: clean_text chứa ký tự chữ hoa (chưa lowercase).")
-                        validation_summary['logic_errors'] += 1
-                        
-                    # 2.4. Kiểm tra timestamp logic
-                    current_epoch = int(time.time())
-                    if data.get('timestamp') and data.get('timestamp') > current_epoch:
-                        logger.error(f"LỖI LOGIC Dòng {line_number + 1}: timestamp tương lai.")
-                        validation_summary['logic_errors'] += 1
-
-                    # 2.5. Kiểm tra media_url <-> is_video 
-                    if data.get('media_url') and not img_info.get('processed_path'):
-                        logger.warning(f"CẢNH BÁO Dòng {line_number + 1}: Có media_url thô nhưng thiếu processed_path.")
-
-                
-            except json.JSONDecodeError:
-                logger.error(f"LỖI CÚ PHÁP Dòng {line_number + 1}: JSON không hợp lệ.")
-                validation_summary['struct_errors'] += 1
-            except ValidationError as e:
-                logger.error(f"LỖI SCHEMA Dòng {line_number + 1} ({e.path}): {e.message}")
-                validation_summary['struct_errors'] += 1
-                
+    workers = workers or os.cpu_count() or 1
+    chunks = _split_into_chunks(file_path, workers)
+    num_buckets = max(1, os.path.getsize(file_path) // DUP_BUCKET_BYTES + 1)
+    # Lấy thời gian hiện tại MỘT lần cho toàn bộ file
+    now = int(time.time())
+
+    spill_dir = tempfile.mkdtemp(prefix='validate_ids_')
+    try:
+        tasks = [
+            (file_path, start, end, idx, schema_name, now, spill_dir, num_buckets, max_logged_errors)
+            for idx, (start, end) in enumerate(chunks)
+        ]
+        bucket_tasks = [(spill_dir, b, len(chunks)) for b in range(num_buckets)]
+
+        if workers == 1 or len(chunks) == 1:
+            _init_worker(schema)
+            chunk_results = [_validate_chunk(t) for t in tasks]
+            bucket_results = [_count_bucket_duplicates(t) for t in bucket_tasks]
+        else:
+            with multiprocessing.Pool(min(workers, len(chunks)), initializer=_init_worker,
+                                      initargs=(schema,)) as pool:
+                chunk_results = pool.map(_validate_chunk, tasks)
+                bucket_results = pool.map(_count_bucket_duplicates, bucket_tasks)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    # Gộp report: đổi số dòng cục bộ của chunk sang số dòng toàn file
+    line_offset = 0
+    logged = 0
+    dropped = 0
+    for res in chunk_results:
+        validation_summary['struct_errors'] += res['struct_errors']
+        validation_summary['logic_errors'] += res['logic_errors']
+        validation_summary['total_records'] += res['total_records']
+        dropped += res['dropped_reports']
+        for level, prefix, line_idx, suffix in res['reports']:
+            if max_logged_errors is not None and logged >= max_logged_errors:
+                dropped += 1
+                continue
+            logger.log(level, f"{prefix} Dòng {line_offset + line_idx + 1}{suffix}")
+            logged += 1
+        line_offset += res['num_lines']
+    if dropped:
+        logger.warning(f"... và {dropped} lỗi/cảnh báo khác không được ghi ra log (--max-logged-errors).")
+
     # 3. Kiểm tra Tính Duy Nhất (Logic Cấu trúc cuối cùng)
-    id_counts = Counter(validation_summary['post_ids'])
-    validation_summary['duplicate_ids'] = [id for id, count in id_counts.items() if count > 1]
+    validation_summary['duplicate_ids'] = [post_id for dups in bucket_results for post_id in dups]
     validation_summary['struct_errors'] += len(validation_summary['duplicate_ids'])
-    
+
     if validation_summary['duplicate_ids']:
         logger.error(f"LỖI CẤU TRÚC: {len(validation_summary['duplicate_ids'])} ID bị trùng lặp.")
-        
-    logger.info(f"Hoàn tất kiểm tra {total_records} bản ghi. Tổng lỗi: {validation_summary['struct_errors'] + validation_summary['logic_errors']}.")
-    return validation_summary 
+
+    logger.info(f"Hoàn tất kiểm tra {validation_summary['total_records']} bản ghi. Tổng lỗi: {validation_summary['struct_errors'] + validation_summary['logic_errors']}.")
+    return validation_summary
 
 # --- HÀM CHẠY CHÍNH VÀ TỔNG HỢP ---
 
-def run_validation(raw_path: str, processed_path: str):
+def run_validation(raw_path: str, processed_path: str, workers: Optional[int] = None,
+                   max_logged_errors: Optional[int] = None, log_file: str = LOG_FILE):
     """
     Run validation on specified files.
-    
+
     Args:
         raw_path: Path to raw JSONL file (CORE_SCHEMA)
         processed_path: Path to processed JSONL file (EXTENDED_SCHEMA)
+        workers: Number of validation processes (default: all CPUs)
+        max_logged_errors: Cap on error lines written to the log per file (default: no cap)
+        log_file: Report file, overwritten on each run (default: validation_report.log)
     """
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    # Thêm encoding='utf-8' cho FileHandler
+    file_handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(file_handler)
+    try:
+        return _run_validation(raw_path, processed_path, workers, max_logged_errors, log_file)
+    finally:
+        logger.removeHandler(file_handler)
+        file_handler.close()
+
+
+def _run_validation(raw_path: str, processed_path: str, workers: Optional[int],
+                    max_logged_errors: Optional[int], log_file: str) -> int:
     # 1. KIỂM TRA ĐẦU VÀO (CORE SCHEMA)
-    core_results = validate_jsonl_file(raw_path, CORE_SCHEMA, "CORE_SCHEMA")
+    core_results = validate_jsonl_file(raw_path, CORE_SCHEMA, "CORE_SCHEMA",
+                                       workers=workers, max_logged_errors=max_logged_errors)
 
     # 2. KIỂM TRA ĐẦU RA (EXTENDED SCHEMA)
-    extended_results = validate_jsonl_file(processed_path, EXTENDED_SCHEMA, "EXTENDED_SCHEMA")
+    extended_results = validate_jsonl_file(processed_path, EXTENDED_SCHEMA, "EXTENDED_SCHEMA",
+                                           workers=workers, max_logged_errors=max_logged_errors)
 
     # 3. TỔNG KẾT LỖI
     total_errors = core_results['struct_errors'] + core_results['logic_errors'] + \
                    extended_results['struct_errors'] + extended_results['logic_errors']
-    
+
     logger.info("\n" + "="*70)
     logger.info("                         ✨ BÁO CÁO TỔNG KẾT VALIDATION ✨")
     logger.info("="*70)
     logger.info(f"TỔNG SỐ LỖI PHÁT HIỆN: {total_errors}")
-    logger.info(f"Report chi tiết đã được ghi vào file: {LOG_FILE}")
-    
+    logger.info(f"Report chi tiết đã được ghi vào file: {log_file}")
+
     logger.info("\n--- CHI TIẾT TÓM TẮT ---")
     logger.info(f"CORE SCHEMA (A) - Lỗi Cấu trúc: {core_results['struct_errors']}")
     logger.info(f"EXTENDED SCHEMA (B/C) - Lỗi Cấu trúc: {extended_results['struct_errors']}")
     logger.info(f"EXTENDED SCHEMA (B/C) - Lỗi Logic Nghiệp vụ: {extended_results['logic_errors']}")
-    
+
     if total_errors > 0:
         logger.error("⚠ HÀNH ĐỘNG: CẦN YÊU CẦU CÁC THÀNH VIÊN SỬA DỮ LIỆU. Vui lòng xem log.")
     else:
         logger.info("👍 DỮ LIỆU ĐẠT CHUẨN. Có thể tiếp tục Gán nhãn/Xây dựng Graph.")
-    
+
     return total_errors
 
 if __name__ == "__main__":
     import argparse
-    
+
     parser = argparse.ArgumentParser(description='Validate Fakeddit data against schemas')
     parser.add_argument(
         '--raw',
@@ -176,6 +362,22 @@ if __name__ == "__main__":
         default='data/03_clean/Fakeddit/train.jsonl',
         help='Path to processed JSONL file (EXTENDED_SCHEMA)'
     )
-    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of validation processes (default: all CPUs, 1 = sequential)'
+    )
+    parser.add_argument(
+        '--max-logged-errors',
+        type=int,
+        default=None,
+        help='Maximum number of error lines written to the log per file (default: all)'
+    )
+
     args = parser.parse_args()
-    run_validation(args.raw, args.processed)
\ No newline at end of file
+    # Dùng sys.stdout để ép UTF-8 trên console Windows
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT,
+                        handlers=[logging.StreamHandler(sys.stdout)])
+    run_validation(args.raw, args.processed, workers=args.workers,
+                   max_logged_errors=args.max_logged_errors)
@@ -14,9 +14,31 @@ import json
 import glob
 
 # --- CONFIG ---
+INPUT_STORE = "data/processed_graphs.pack"
 INPUT_FOLDER = "data/processed_graphs"
 OUTPUT_HTML = "data/cascade_visualization.html"
 
+def load_packed_store(root):
+    """Đọc store đóng gói: chỉ đọc index + edges, không cần load ma trận x."""
+    from src.data.cascade_store import PackedCascadeStore
+    
+    store = PackedCascadeStore(root)
+    summaries = []
+    
+    for idx, post_id in enumerate(store.post_ids):
+        ei = store.edge_index(idx)
+        summaries.append({
+            "post_id": str(post_id),
+            "num_nodes": int(store.num_nodes[idx]),
+            "feat_dim": int(store.feat_dim or 0),
+            "num_edges": int(store.num_edges[idx]),
+            "file_size_kb": round(store.nbytes(idx) / 1024, 1),
+            "edges": ei.t().tolist(),
+            "filename": f"{os.path.basename(root)}#{idx}"
+        })
+    
+    return summaries
+
 def load_all_graphs(folder):
     """Đọc tất cả file .pt và trích xuất thông tin."""
     files = sorted(glob.glob(os.path.join(folder, "*.pt")))
@@ -599,14 +621,18 @@ def main():
     print("📊 Cascade Graph Inspector v2")
     print("="*40)
     
-    if not os.path.exists(INPUT_FOLDER):
-        print(f"❌ Không tìm thấy folder: {INPUT_FOLDER}")
+    if os.path.exists(os.path.join(INPUT_STORE, "index.bin")):
+        print(f"📂 Đang đọc store {INPUT_STORE}...")
+        summaries = load_packed_store(INPUT_STORE)
+        print(f"✅ Đã đọc {len(summaries)} đồ thị")
+    elif os.path.exists(INPUT_FOLDER):
+        print(f"📂 Đang đọc file từ {INPUT_FOLDER}...")
+        summaries = load_all_graphs(INPUT_FOLDER)
+        print(f"✅ Đã đọc {len(summaries)} file .pt")
+    else:
+        print(f"❌ Không tìm thấy {INPUT_STORE} hoặc folder: {INPUT_FOLDER}")
         return
     
-    print(f"📂 Đang đọc file từ {INPUT_FOLDER}...")
-    summaries = load_all_graphs(INPUT_FOLDER)
-    print(f"✅ Đã đọc {len(summaries)} file .pt")
-    
     total_nodes = sum(s['num_nodes'] for s in summaries)
     total_edges = sum(s['num_edges'] for s in summaries)
     single = sum(1 for s in summaries if s['num_nodes'] == 1)